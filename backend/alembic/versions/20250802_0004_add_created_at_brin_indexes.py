@@ -0,0 +1,47 @@
+"""Add BRIN indexes on created_at for time-range scans.
+
+Revision ID: 20250802_0004
+Revises: 20250802_0003
+Create Date: 2025-08-02 03:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20250802_0004'
+down_revision = '20250802_0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Add BRIN indexes on documents and search_history created_at."""
+    # BRIN is PostgreSQL-only; other backends keep relying on table scans
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # Rows are append-only, so created_at is monotonic within each block range
+    op.create_index(
+        'ix_documents_created_brin',
+        'documents',
+        ['created_at'],
+        postgresql_using='brin',
+        postgresql_with={'pages_per_range': 32},
+    )
+    op.create_index(
+        'ix_search_history_created_brin',
+        'search_history',
+        ['created_at'],
+        postgresql_using='brin',
+        postgresql_with={'pages_per_range': 32},
+    )
+
+
+def downgrade() -> None:
+    """Remove BRIN indexes on created_at."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_search_history_created_brin', table_name='search_history')
+    op.drop_index('ix_documents_created_brin', table_name='documents')
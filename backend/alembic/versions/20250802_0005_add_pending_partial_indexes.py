@@ -0,0 +1,46 @@
+"""Add partial indexes for pending document queues.
+
+Revision ID: 20250802_0005
+Revises: 20250802_0004
+Create Date: 2025-08-02 03:45:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20250802_0005'
+down_revision = '20250802_0004'
+branch_labels = None
+depends_on = None
+
+
+# (index name, WHERE clause) for each worker queue poll
+PENDING_INDEXES = [
+    ('ix_documents_pending', 'is_processed = false'),
+    ('ix_documents_text_extraction_pending', "text_extraction_status = 'pending'"),
+    ('ix_documents_ocr_pending', "ocr_status = 'pending'"),
+]
+
+
+def upgrade() -> None:
+    """Add partial indexes on created_at covering only unprocessed documents."""
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, where in PENDING_INDEXES:
+            op.create_index(
+                name,
+                'documents',
+                ['created_at'],
+                postgresql_where=sa.text(where),
+                postgresql_concurrently=True,
+                sqlite_where=sa.text(where),
+            )
+
+
+def downgrade() -> None:
+    """Remove pending-queue partial indexes."""
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(PENDING_INDEXES):
+            op.drop_index(name, table_name='documents', postgresql_concurrently=True)
@@ -8,10 +8,10 @@ from typing import List, Optional
 
 from app.models.user import User
 from app.models.document import Document, DocumentStatus
-from app.services.file_service import FileService
-from app.services.ocr_wsl import OCRService
-from app.services.indexing_service import IndexingService
-from app.services.tagging import TaggingService
+from app.services.file_service import file_service
+from app.services.ocr_service import ocr_service
+from app.services.indexing_service import indexing_service
+from app.services.tagging import tagging_service
 from app.services.navigation_state import NavigationStateService
 from app.api.dependencies import get_current_user
 from app.core.config import settings
@@ -28,7 +28,6 @@ async def create_temporary_file(
     """Create a temporary file URL for external processing."""
     try:
         # Save file temporarily
-        file_service = FileService()
         file_path, file_id = await file_service.save_uploaded_file(file, current_user)
         
         # Generate temporary URL
@@ -56,8 +55,7 @@ async def create_temporary_file(
 
 @router.get("/temporary/{file_id}")
 async def serve_temporary_file(
-    file_id: str,
-    file_service: FileService = Depends(FileService)
+    file_id: str
 ):
     """Serve a temporary file."""
     try:
@@ -86,14 +84,13 @@ async def upload_files(
 ):
     """Upload and process multiple files (non-chunked)."""
     """Upload and process multiple files."""
-    file_service = FileService()
-    ocr_service = OCRService()
-    indexing_service = IndexingService()
-    tagging_service = TaggingService()
 
     results = []
     for file in files:
         try:
+            # Validate size and type before touching storage
+            content_type, file_size = await file_service.validate_file(file)
+
             # Save file temporarily
             file_path, file_id = await file_service.save_uploaded_file(file, current_user)
 
@@ -102,12 +99,12 @@ async def upload_files(
                 id=file_id,
                 user_id=current_user.id,
                 filename=file.filename,
-                content_type=file.content_type,
-                size=file.size
+                content_type=content_type,
+                size=file_size
             )
 
             # Process file (OCR, indexing, tagging)
-            if file.content_type.startswith(('image/', 'application/pdf')):
+            if content_type.startswith(('image/', 'application/pdf')):
                 try:
                     # Extract text
                     text, metadata = await ocr_service.extract_image_text(file_path)
@@ -117,11 +114,11 @@ async def upload_files(
                     tags = tagging_service.tag_document(document)
                     document.metadata.keywords = tags
 
-                    # Index document
+                    # Queue for the batched Qdrant upsert
                     vector = await generate_embedding(text)
-                    indexing_service.index_document(document, vector, {
+                    await indexing_service.enqueue_document(document, vector, {
                         "original_filename": file.filename,
-                        "content_type": file.content_type
+                        "content_type": content_type
                     })
 
                 except Exception as e:
@@ -158,7 +155,6 @@ async def start_chunked_upload(
 ):
     """Initialize a chunked file upload."""
     try:
-        file_service = FileService()
         file_id = str(uuid.uuid4())
         
         # Create initial document record
@@ -196,8 +192,6 @@ async def upload_chunk(
 ):
     """Upload a file chunk."""
     try:
-        file_service = FileService()
-        
         # Verify document exists and belongs to user
         document = await Document.get(file_id)
         if not document or document.user_id != current_user.id:
@@ -235,11 +229,6 @@ async def complete_chunked_upload(
 ):
     """Complete a chunked upload by assembling all chunks."""
     try:
-        file_service = FileService()
-        ocr_service = OCRService()
-        indexing_service = IndexingService()
-        tagging_service = TaggingService()
-        
         # Verify document exists and belongs to user
         document = await Document.get(file_id)
         if not document or document.user_id != current_user.id:
@@ -266,9 +255,9 @@ async def complete_chunked_upload(
                 tags = tagging_service.tag_document(document)
                 document.metadata.keywords = tags
 
-                # Index document
+                # Queue for the batched Qdrant upsert
                 vector = await generate_embedding(text)
-                indexing_service.index_document(document, vector, {
+                await indexing_service.enqueue_document(document, vector, {
                     "original_filename": document.filename,
                     "content_type": document.content_type
                 })
@@ -305,7 +294,6 @@ async def get_upload_progress(
 ):
     """Get upload progress for a chunked upload."""
     try:
-        file_service = FileService()
         document = await Document.get(file_id)
         
         if not document or document.user_id != current_user.id:
@@ -372,7 +360,6 @@ async def get_file_info(
     current_user: User = Depends(get_current_user)
 ):
     """Get information about a specific file."""
-    file_service = FileService()
     document = await Document.get(file_id)
 
     if not document or document.user_id != current_user.id:
@@ -396,7 +383,6 @@ async def delete_file(
     current_user: User = Depends(get_current_user)
 ):
     """Delete a file and its metadata."""
-    file_service = FileService()
     document = await Document.get(file_id)
 
     if not document or document.user_id != current_user.id:
@@ -411,7 +397,6 @@ async def delete_file(
             file_service.delete_file(document.storage_path)
 
         # Delete from index
-        indexing_service = IndexingService()
         indexing_service.delete_document(document.id)
 
         # Delete document record
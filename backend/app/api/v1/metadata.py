@@ -1,5 +1,6 @@
 """File metadata API endpoints."""
 
+import asyncio
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -79,7 +80,7 @@ async def get_file_metadata(
             )
         
         # Extract metadata
-        metadata = metadata_service.extract_file_metadata(document.file_path)
+        metadata = await metadata_service.extract_file_metadata_async(document.file_path)
         
         return FileMetadataResponse(**metadata)
         
@@ -128,7 +129,12 @@ async def get_batch_metadata(
         # Create mapping of file paths to document IDs
         document_map = {doc.file_path: doc.id for doc in documents}
         
-        # Extract metadata for each file
+        # The user's files are extracted together across worker processes
+        extracted = await asyncio.to_thread(
+            metadata_service.extract_batch,
+            [file_path for file_path in request.file_paths if file_path in document_map]
+        )
+        
         results = {}
         successful = 0
         failed = 0
@@ -139,13 +145,11 @@ async def get_batch_metadata(
                 failed += 1
                 continue
                 
-            try:
-                metadata = metadata_service.extract_file_metadata(file_path)
-                results[file_path] = metadata
-                successful += 1
-            except Exception as e:
-                results[file_path] = {"error": str(e)}
+            results[file_path] = extracted[file_path]
+            if "error" in extracted[file_path]:
                 failed += 1
+            else:
+                successful += 1
         
         return MetadataBatchResponse(
             files=results,
@@ -243,7 +247,7 @@ async def get_all_user_metadata(
         
         for document in documents:
             try:
-                metadata = metadata_service.extract_file_metadata(document.file_path)
+                metadata = await metadata_service.extract_file_metadata_async(document.file_path)
                 metadata_list.append(FileMetadataResponse(**metadata))
             except Exception as e:
                 # Log error but continue processing other files
@@ -71,6 +71,9 @@ class Settings(BaseSettings):
     qdrant_port: int = Field(default=6333, description="Qdrant port")
     qdrant_api_key: str = Field(default="", description="Qdrant API key")
     qdrant_timeout: int = Field(default=30, description="Qdrant connection timeout in seconds")
+    qdrant_grpc_port: int = Field(default=6334, description="Qdrant gRPC port")
+    qdrant_prefer_grpc: bool = Field(default=True, description="Use gRPC instead of REST for Qdrant")
+    qdrant_collection: str = Field(default="documents_dense", description="Qdrant collection holding document vectors")
     
     # Meilisearch Settings
     meilisearch_host: str = Field(default="localhost", description="Meilisearch host")
@@ -80,6 +83,7 @@ class Settings(BaseSettings):
         default="http://localhost:7700",
         description="Meilisearch URL"
     )
+    meilisearch_index: str = Field(default="documents", description="Meilisearch index holding document text")
     
     # Logging Settings
     log_level: str = Field(default="INFO", description="Logging level")
@@ -100,6 +104,28 @@ class Settings(BaseSettings):
         description="Log retention period"
     )
     
+    # Embedding Settings
+    embedding_model: str = Field(
+        default="sentence-transformers/all-MiniLM-L6-v2",
+        description="Hugging Face sentence embedding model used by the Celery workers"
+    )
+    embedding_onnx_path: Optional[str] = Field(
+        default=None,
+        description="Directory of the INT8 ONNX embedding model, exported on first start if empty; when unset the API uses SentenceTransformer and Celery workers use models/embedding-onnx under their working directory"
+    )
+    embedding_threads: Optional[int] = Field(
+        default=None,
+        description="Torch intra-op threads for embedding; defaults to available CPUs, capped at 8"
+    )
+    embedding_half_precision: bool = Field(
+        default=True,
+        description="Run the embedding model in FP16 on GPU or BF16 on CPUs with native BF16 support"
+    )
+    nlp_onnx_path: Optional[str] = Field(
+        default=None,
+        description="Directory of the INT8 ONNX query rewriting model, exported on first use if empty"
+    )
+    
     # Tika Settings
     tika_url: str = Field(
         default="http://localhost:9998",
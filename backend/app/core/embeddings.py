@@ -0,0 +1,186 @@
+"""ONNX Runtime models for search: the sentence encoder and query rewriter."""
+import os
+from typing import List, Optional, Union
+
+import numpy as np
+
+# Preferred model files in an export directory, most optimized first
+_MODEL_FILES = ("model_optimized_quantized.onnx", "model_optimized.onnx", "model.onnx")
+
+# Graphs making up a seq2seq export; decoder_with_past is absent without KV caching
+_SEQ2SEQ_FILES = ("encoder_model.onnx", "decoder_model.onnx", "decoder_with_past_model.onnx")
+
+
+def has_onnx_model(model_dir: str) -> bool:
+    """Check whether a directory holds an exported ONNX model."""
+    return _find_model_file(model_dir) is not None
+
+
+def _find_model_file(model_dir: str) -> Optional[str]:
+    """Return the most optimized model file present in a directory."""
+    return next(
+        (name for name in _MODEL_FILES if os.path.exists(os.path.join(model_dir, name))),
+        None
+    )
+
+
+class OnnxSentenceEncoder:
+    """Sentence embedding model served by ONNX Runtime.
+
+    Mirrors the parts of SentenceTransformer's interface that the search
+    service uses, so the two can be swapped. Expects a directory produced
+    by export_onnx_model (or any optimum feature-extraction export).
+    """
+
+    def __init__(self, model_dir: str, max_length: int = 512, num_threads: Optional[int] = None):
+        import onnxruntime
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        file_name = _find_model_file(model_dir)
+        if file_name is None:
+            raise FileNotFoundError(f"No ONNX model found in {model_dir}")
+
+        # ORT defaults to one thread per host core, even in CPU-limited containers
+        session_options = onnxruntime.SessionOptions()
+        if num_threads:
+            session_options.intra_op_num_threads = num_threads
+            session_options.inter_op_num_threads = 1
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            model_dir,
+            file_name=file_name,
+            provider="CPUExecutionProvider",
+            session_options=session_options
+        )
+        self.max_length = max_length
+
+    def get_sentence_embedding_dimension(self) -> int:
+        """Return the embedding width."""
+        return self.model.config.hidden_size
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = True,
+        show_progress_bar: bool = False
+    ) -> np.ndarray:
+        """Embed sentences as L2-normalized float32 mean-pooled vectors.
+
+        Args:
+            sentences: A sentence or list of sentences
+            batch_size: Sentences per forward pass
+            convert_to_numpy: Accepted for SentenceTransformer compatibility
+            normalize_embeddings: Accepted for SentenceTransformer compatibility;
+                vectors are always L2-normalized
+            show_progress_bar: Accepted for SentenceTransformer compatibility
+
+        Returns:
+            One vector for a single sentence, else a (n, dim) matrix
+        """
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        # Batch similar lengths together so padding stays minimal
+        order = np.argsort([-len(s) for s in sentences], kind="stable")
+        embeddings = np.empty(
+            (len(sentences), self.get_sentence_embedding_dimension()), dtype=np.float32
+        )
+        for start in range(0, len(sentences), batch_size):
+            idx = order[start:start + batch_size]
+            embeddings[idx] = self._encode_batch([sentences[i] for i in idx])
+
+        return embeddings[0] if single else embeddings
+
+    def _encode_batch(self, sentences: List[str]) -> np.ndarray:
+        """Run one forward pass and pool token states into sentence vectors."""
+        inputs = self.tokenizer(
+            sentences,
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="np"
+        )
+        hidden = np.asarray(self.model(**inputs).last_hidden_state, dtype=np.float32)
+
+        mask = inputs["attention_mask"][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.maximum(norms, 1e-12)
+
+
+def export_onnx_model(model_name: str, output_dir: str, quantize: bool = True) -> None:
+    """Export a Hugging Face encoder to an optimized ONNX model.
+
+    Applies ORT's O3 graph optimizations and, when requested, dynamic INT8
+    quantization tuned for AVX-512 VNNI CPUs.
+
+    Args:
+        model_name: Hugging Face model ID or local path
+        output_dir: Directory to write the exported model and tokenizer to
+        quantize: Whether to quantize weights to INT8
+    """
+    from optimum.onnxruntime import (
+        ORTModelForFeatureExtraction,
+        ORTOptimizer,
+        ORTQuantizer,
+    )
+    from optimum.onnxruntime.configuration import AutoOptimizationConfig, AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+
+    optimizer = ORTOptimizer.from_pretrained(model)
+    optimizer.optimize(save_dir=output_dir, optimization_config=AutoOptimizationConfig.O3())
+
+    if quantize:
+        quantizer = ORTQuantizer.from_pretrained(output_dir, file_name="model_optimized.onnx")
+        quantizer.quantize(
+            save_dir=output_dir,
+            quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+        )
+
+
+def load_onnx_text2text_pipeline(model_name: str, model_dir: str):
+    """Load a text2text-generation pipeline backed by INT8 ONNX Runtime graphs.
+
+    The model is exported and dynamically quantized into model_dir on first
+    use; later calls load the quantized graphs directly.
+
+    Args:
+        model_name: Hugging Face model ID or local path
+        model_dir: Directory holding (or to receive) the quantized export
+
+    Returns:
+        A transformers pipeline with the same call signature as the PyTorch one
+    """
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer, pipeline
+
+    quantized = {
+        name: name.replace(".onnx", "_quantized.onnx") for name in _SEQ2SEQ_FILES
+    }
+    if not os.path.exists(os.path.join(model_dir, quantized["encoder_model.onnx"])):
+        ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True).save_pretrained(model_dir)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(model_dir)
+        config = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+        for name in _SEQ2SEQ_FILES:
+            if os.path.exists(os.path.join(model_dir, name)):
+                quantizer = ORTQuantizer.from_pretrained(model_dir, file_name=name)
+                quantizer.quantize(save_dir=model_dir, quantization_config=config)
+
+    with_past = quantized["decoder_with_past_model.onnx"]
+    model = ORTModelForSeq2SeqLM.from_pretrained(
+        model_dir,
+        encoder_file_name=quantized["encoder_model.onnx"],
+        decoder_file_name=quantized["decoder_model.onnx"],
+        decoder_with_past_file_name=with_past,
+        use_cache=os.path.exists(os.path.join(model_dir, with_past))
+    )
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    return pipeline("text2text-generation", model=model, tokenizer=tokenizer)
@@ -0,0 +1,42 @@
+"""Hash backend selection for file checksums."""
+import hashlib
+import ssl
+from typing import Any, Callable, Tuple
+
+
+def _select_sha256_backend() -> Tuple[Callable[..., Any], str]:
+    """Pick the fastest available SHA-256 constructor.
+    
+    OpenSSL's SHA-256 dispatches at runtime to SHA-NI on x86 or the SHA2
+    extensions on ARMv8; CPython's builtin fallback is scalar C.
+    
+    Returns:
+        Tuple of (hash constructor, backend description)
+    """
+    try:
+        from _hashlib import openssl_sha256
+        return openssl_sha256, ssl.OPENSSL_VERSION
+    except ImportError:  # CPython built without OpenSSL
+        return hashlib.sha256, "builtin"
+
+
+def _cpu_sha_extensions() -> bool:
+    """Whether the CPU advertises SHA-256 instructions (x86 SHA-NI, ARMv8 SHA2).
+    
+    Read from /proc/cpuinfo, so this is Linux-only; elsewhere it reports
+    False even though OpenSSL may still use the instructions.
+    """
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith(("flags", "Features")):
+                    flags = line.split(":", 1)[1].split()
+                    return "sha_ni" in flags or "sha2" in flags
+    except OSError:
+        pass
+    return False
+
+
+# Resolved once at import so callers pay a single attribute lookup
+new_sha256, SHA256_BACKEND = _select_sha256_backend()
+SHA256_HARDWARE = _cpu_sha_extensions()
@@ -0,0 +1,30 @@
+"""Process-wide libmagic handle for MIME sniffing."""
+import threading
+from typing import Optional
+
+import magic
+
+_lock = threading.Lock()
+_magic: Optional[magic.Magic] = None
+
+
+def get_magic() -> magic.Magic:
+    """Return the shared libmagic handle, loading the database on first use.
+
+    Opening a handle parses and maps the whole magic database, so every
+    caller in the process shares one. python-magic serializes from_buffer
+    calls on a handle with its own lock, so sharing across threads is safe.
+    """
+    global _magic
+    if _magic is None:
+        with _lock:
+            if _magic is None:
+                _magic = magic.Magic(mime=True)
+    return _magic
+
+
+def reset_magic() -> None:
+    """Forget the handle so a forked child opens its own."""
+    global _magic
+    with _lock:
+        _magic = None
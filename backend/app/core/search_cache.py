@@ -0,0 +1,31 @@
+"""Version counter that invalidates cached search responses."""
+import threading
+from typing import Optional
+
+import redis
+from loguru import logger
+
+from .config import settings
+
+# Cached /api/v1/search responses are keyed on this counter's value
+SEARCH_CACHE_VERSION_KEY = "search:version"
+
+_lock = threading.Lock()
+_redis: Optional[redis.Redis] = None
+
+
+def bump_search_cache_version() -> None:
+    """Orphan every cached search response after an index write or delete.
+
+    Call once the write is applied, so a refetch sees it. A Redis outage is
+    logged and ignored; cached responses then lapse on their own TTL.
+    """
+    global _redis
+    try:
+        if _redis is None:
+            with _lock:
+                if _redis is None:
+                    _redis = redis.Redis.from_url(settings.redis_url)
+        _redis.incr(SEARCH_CACHE_VERSION_KEY)
+    except redis.RedisError as e:
+        logger.warning(f"Search cache invalidation failed: {e}")
@@ -1,7 +1,7 @@
 """Database session configuration."""
 
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm import scoped_session, sessionmaker, Session
 
 from app.core.config import settings
 from app.models.base import Base
@@ -16,6 +16,12 @@ engine = create_engine(
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Thread-local sessions for Celery workers, reused across tasks in a process;
+# loaded rows stay readable after commit so tasks can work outside the block
+WorkerSession = scoped_session(
+    sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+)
+
 
 def get_db() -> Session:
     """Get database session."""
@@ -12,6 +12,9 @@ from app.core.logging import setup_logging, request_id_middleware
 from app.core.exceptions import register_exception_handlers
 from app.db.base import init_db, check_db_connection
 from app.db.session import get_db
+from app.services.indexing_service import indexing_service
+from app.services.ocr_service import ocr_service
+from app.services.tagging import tagging_service
 from loguru import logger
 
 # Import API routers
@@ -53,6 +56,9 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     
     # Cleanup resources
     logger.info("Cleaning up resources...")
+    await ocr_service.close()
+    await indexing_service.close()
+    await tagging_service.close()
     
     logger.info("File Manager API shutdown complete")
 
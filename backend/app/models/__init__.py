@@ -1,9 +1,10 @@
 """Database models package."""
 from .base import Base
 from .document import Document
+from .document_record import DocumentRecord
 from .user import User
 from .search_history import SearchHistory
 from .plan import Plan
 from .device import Device
 
-__all__ = ["Base", "Document", "User", "SearchHistory", "Plan", "Device"]
\ No newline at end of file
+__all__ = ["Base", "Document", "DocumentRecord", "User", "SearchHistory", "Plan", "Device"]
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""Document database model."""
+
+from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey, JSON
+from sqlalchemy.orm import relationship
+
+from .base import Base, TimestampMixin
+
+
+class DocumentRecord(Base, TimestampMixin):
+    """Stored document row; the pydantic Document in document.py is the API shape."""
+    
+    __tablename__ = "documents"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    title = Column(String(500), nullable=False, index=True)
+    description = Column(Text, nullable=True)
+    filename = Column(String(500), nullable=False)
+    file_path = Column(String(1000), nullable=False)
+    file_size = Column(Integer, nullable=False)
+    mime_type = Column(String(100), nullable=False)
+    checksum = Column(String(64), unique=True, index=True, nullable=False)
+    is_processed = Column(Boolean, default=False, nullable=False)
+    is_indexed = Column(Boolean, default=False, nullable=False)
+    content_preview = Column(Text, nullable=True)
+    # "metadata" is reserved on declarative classes
+    doc_metadata = Column("metadata", JSON, default=dict, nullable=False)
+    tags = Column(JSON, default=list, nullable=False)
+    status = Column(String(20), default="pending", server_default="pending", nullable=False)
+    
+    # Text extraction and OCR results
+    extracted_text = Column(Text, nullable=True)
+    extracted_text_path = Column(String(1000), nullable=True)
+    ocr_text = Column(Text, nullable=True)
+    ocr_confidence = Column(JSON, nullable=True)
+    extracted_metadata = Column(JSON, nullable=True)
+    text_extraction_status = Column(String(20), default="pending", server_default="pending", nullable=False)
+    ocr_status = Column(String(20), default="pending", server_default="pending", nullable=False)
+    
+    # Foreign keys
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    
+    # Relationships
+    owner = relationship("User", back_populates="documents")
+    
+    def __repr__(self) -> str:
+        """String representation."""
+        return f"<DocumentRecord(id={self.id}, filename='{self.filename}', owner_id={self.owner_id})>"
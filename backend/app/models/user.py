@@ -51,7 +51,7 @@ class User(Base, TimestampMixin):
     preferences = Column(Text, nullable=True, default="{}")
 
     # Relationships
-    documents = relationship("Document", back_populates="owner", cascade="all, delete-orphan")
+    documents = relationship("DocumentRecord", back_populates="owner", cascade="all, delete-orphan")
     search_history = relationship("SearchHistory", back_populates="user", cascade="all, delete-orphan")
     devices = relationship("Device", back_populates="user", cascade="all, delete-orphan")
 
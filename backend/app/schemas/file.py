@@ -1,9 +1,13 @@
 """File upload schemas and validation models."""
 
-from typing import Optional
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
 
+from ..core.mime import get_magic
+
 
 class FileUploadResponse(BaseModel):
     """Response schema for file upload."""
@@ -30,33 +34,72 @@ class FileUploadError(BaseModel):
     filename: Optional[str] = Field(None, description="Filename that caused error")
 
 
+ALLOWED_MIME_TYPES = frozenset({
+    # Documents
+    'application/pdf',
+    'application/msword',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'application/vnd.ms-excel',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'application/vnd.ms-powerpoint',
+    'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    'text/plain',
+    'text/csv',
+    'text/markdown',
+    
+    # Images
+    'image/jpeg',
+    'image/png',
+    'image/gif',
+    'image/webp',
+    'image/svg+xml',
+    
+    # Archives
+    'application/zip',
+    'application/x-tar',
+    'application/x-7z-compressed',
+    'application/x-rar-compressed',
+})
+
+# Number of leading bytes handed to libmagic when sniffing an upload
+MIME_SNIFF_BYTES = 4096
+MIME_CACHE_SIZE = 4096
+
+_mime_cache: Dict[Tuple[int, bytes], str] = {}
+# Upload handlers sniff from worker threads; eviction must not interleave
+_mime_cache_lock = threading.Lock()
+
+# Load the magic database at import rather than on the first upload
+get_magic()
+
+
+def sniff_mime_type(head: bytes, file_size: int) -> str:
+    """Detect the MIME type of an upload from its leading bytes.
+
+    Results are memoized on ``(file_size, blake2b(head))`` so repeated uploads
+    of the same content skip the libmagic call.
+
+    Args:
+        head: Leading bytes of the file (only the first 4 KiB are used)
+        file_size: Total size of the file in bytes
+
+    Returns:
+        Detected MIME type
+    """
+    head = head[:MIME_SNIFF_BYTES]
+    key = (file_size, hashlib.blake2b(head, digest_size=8).digest())
+    mime_type = _mime_cache.get(key)
+    if mime_type is None:
+        mime_type = get_magic().from_buffer(head)
+        with _mime_cache_lock:
+            if len(_mime_cache) >= MIME_CACHE_SIZE:
+                _mime_cache.pop(next(iter(_mime_cache), None), None)
+            _mime_cache[key] = mime_type
+    return mime_type
+
+
 class FileValidationConfig:
     """Configuration for file validation."""
     
     MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
-    ALLOWED_MIME_TYPES = {
-        # Documents
-        'application/pdf',
-        'application/msword',
-        'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-        'application/vnd.ms-excel',
-        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        'application/vnd.ms-powerpoint',
-        'application/vnd.openxmlformats-officedocument.presentationml.presentation',
-        'text/plain',
-        'text/csv',
-        'text/markdown',
-        
-        # Images
-        'image/jpeg',
-        'image/png',
-        'image/gif',
-        'image/webp',
-        'image/svg+xml',
-        
-        # Archives
-        'application/zip',
-        'application/x-tar',
-        'application/x-7z-compressed',
-        'application/x-rar-compressed',
-    }
\ No newline at end of file
+    ALLOWED_MIME_TYPES = ALLOWED_MIME_TYPES
@@ -1,10 +1,16 @@
 """File handling service."""
 from .base import BaseService
+import asyncio
+import errno
+import mmap
 import os
+import queue
 import shutil
+import tempfile
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import BinaryIO, Dict, Optional, Set, Tuple
 from fastapi import UploadFile
 from datetime import datetime
 
@@ -12,20 +18,74 @@ from ..config import settings
 from ..models.document import Document
 from ..models.user import User
 from ..exceptions import FileStorageError
+from ..core.exceptions import ValidationException
+from ..core.hashing import new_sha256
+from ..schemas.file import FileValidationConfig, MIME_SNIFF_BYTES, sniff_mime_type
+from .metadata_service import metadata_service
 import time
 from typing import Callable
 
 
+# Reusable chunk buffers for streaming copies; bounded to cap idle memory
+_BUFFER_POOL: "queue.SimpleQueue[bytearray]" = queue.SimpleQueue()
+_BUFFER_POOL_MAX = 16
+
+
+def _acquire_buffer(size: int) -> bytearray:
+    """Take a buffer from the pool, allocating one if the pool is empty."""
+    try:
+        return _BUFFER_POOL.get_nowait()
+    except queue.Empty:
+        return bytearray(size)
+
+
+def _release_buffer(buffer: bytearray) -> None:
+    """Return a buffer to the pool unless the pool is already full."""
+    if _BUFFER_POOL.qsize() < _BUFFER_POOL_MAX:
+        _BUFFER_POOL.put_nowait(buffer)
+
+
+def _kernel_copy(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    """Copy bytes between descriptors inside the kernel."""
+    if hasattr(os, "copy_file_range"):
+        try:
+            return os.copy_file_range(src_fd, dst_fd, count, offset)
+        except OSError as e:
+            # Cross-filesystem copies fail on older kernels
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                raise
+    return os.sendfile(dst_fd, src_fd, offset, count)
+
+
 class FileService(BaseService):
     MAX_RETRIES = 3
     RETRY_DELAY = 0.1  # Initial delay in seconds
+    CHUNK_SIZE = 1024 * 1024  # Streaming read size for hashing/copying
+    CLEANUP_WORKERS = 8
+    DATE_CACHE_TTL = 60  # Seconds before the dated directory name is recomputed
+    KNOWN_DIRS_MAX = 10000  # Created directories remembered before starting over
     """Service for handling file operations."""
+
+    # Extension -> (MIME type, leading byte signatures) for unambiguous formats
+    _EXT_TO_MIME: Dict[str, Tuple[str, Tuple[bytes, ...]]] = {
+        ".pdf": ("application/pdf", (b"%PDF-",)),
+        ".png": ("image/png", (b"\x89PNG\r\n\x1a\n",)),
+        ".jpg": ("image/jpeg", (b"\xff\xd8\xff",)),
+        ".jpeg": ("image/jpeg", (b"\xff\xd8\xff",)),
+        ".gif": ("image/gif", (b"GIF87a", b"GIF89a")),
+        ".zip": ("application/zip", (b"PK\x03\x04", b"PK\x05\x06")),
+        ".7z": ("application/x-7z-compressed", (b"7z\xbc\xaf\x27\x1c",)),
+    }
+
+    # (timestamp, "YYYY/MM/DD") of the last dated directory lookup
+    _date_cache: Tuple[int, str] = (0, "")
     
     def __init__(self):
         super().__init__()
         self.storage_root = Path(settings.STORAGE_ROOT)
         self.temp_dir = self.storage_root / "temp"
         self.chunks_dir = self.storage_root / "chunks"
+        self._known_dirs: Set[str] = set()
         self.ensure_directories_exist()
         
     def health_check(self) -> dict:
@@ -53,6 +113,58 @@ class FileService(BaseService):
         os.makedirs(self.temp_dir, exist_ok=True)
         os.makedirs(self.chunks_dir, exist_ok=True)
     
+    async def validate_file(self, file: UploadFile) -> Tuple[str, int]:
+        """Validate an upload's size and content type.
+        
+        Only a bounded prefix is read for MIME sniffing; the size comes from
+        the upload metadata or the spooled file descriptor. Callers should
+        reuse the returned values rather than re-deriving them from the upload.
+        
+        Args:
+            file: FastAPI UploadFile object
+            
+        Returns:
+            Tuple of (detected MIME type, size in bytes)
+            
+        Raises:
+            ValidationException: If the file is too large or of a disallowed type
+        """
+        file_size = self._get_upload_size(file)
+        if file_size > FileValidationConfig.MAX_FILE_SIZE:
+            raise ValidationException(
+                f"File exceeds maximum size of {FileValidationConfig.MAX_FILE_SIZE} bytes"
+            )
+            
+        head = await file.read(MIME_SNIFF_BYTES)
+        await file.seek(0)
+        
+        # Extension fast path: a matching byte signature confirms the type
+        # without libmagic; anything else falls back to a full sniff
+        mime_type = None
+        expected = self._EXT_TO_MIME.get(Path(file.filename or "").suffix.lower())
+        if expected is not None:
+            expected_type, signatures = expected
+            if head.startswith(signatures):
+                mime_type = expected_type
+        if mime_type is None:
+            # libmagic releases the GIL; don't stall the event loop on it
+            mime_type = await asyncio.to_thread(sniff_mime_type, head, file_size)
+        if mime_type not in FileValidationConfig.ALLOWED_MIME_TYPES:
+            raise ValidationException(f"File type {mime_type} is not allowed")
+            
+        return mime_type, file_size
+    
+    @staticmethod
+    def _get_upload_size(file: UploadFile) -> int:
+        """Determine an upload's size without reading its contents."""
+        if file.size is not None:
+            return file.size
+        # Seek to the end and back; fileno() would roll an in-memory spool to disk
+        position = file.file.tell()
+        size = file.file.seek(0, os.SEEK_END)
+        file.file.seek(position)
+        return size
+    
     async def save_uploaded_file(
         self,
         file: UploadFile,
@@ -72,17 +184,56 @@ class FileService(BaseService):
         
     def _save_file_operation(self, file: UploadFile) -> Tuple[str, str]:
         """Core file save operation with no retry logic."""
+        # Must stay a UUID: file_id doubles as the document and Qdrant point ID,
+        # and Qdrant only accepts UUIDs or unsigned integers as point IDs
         file_id = str(uuid.uuid4())
         ext = Path(file.filename).suffix.lower()
         filename = f"{file_id}{ext}"
         filepath = self.temp_dir / filename
         
-        # Save file contents
-        with open(filepath, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Save file contents; the digest from the same pass spares metadata
+        # extraction a second read (the key survives the move to storage)
+        checksum, _ = self.save_file(file.file, filepath)
+        metadata_service.remember_checksum(str(filepath), checksum)
             
         return str(filepath), file_id
     
+    def save_file(self, source: BinaryIO, destination: Path) -> Tuple[str, int]:
+        """Stream a file to disk, hashing it in the same pass.
+        
+        Args:
+            source: Readable binary file object
+            destination: Path to write to
+            
+        Returns:
+            Tuple of (SHA-256 hex digest, size in bytes)
+        """
+        if self._has_disk_backing(source):
+            return self._copy_file_in_kernel(source, destination)
+            
+        hasher = new_sha256()
+        size = 0
+        readinto = getattr(source, "readinto", None)
+        with open(destination, "wb") as buffer:
+            if readinto is None:
+                while chunk := source.read(self.CHUNK_SIZE):
+                    hasher.update(chunk)
+                    buffer.write(chunk)
+                    size += len(chunk)
+                return hasher.hexdigest(), size
+                
+            # Fill a pooled buffer in place instead of allocating per chunk
+            pooled = _acquire_buffer(self.CHUNK_SIZE)
+            try:
+                with memoryview(pooled) as view:
+                    while n := readinto(view):
+                        hasher.update(view[:n])
+                        buffer.write(view[:n])
+                        size += n
+            finally:
+                _release_buffer(pooled)
+        return hasher.hexdigest(), size
+    
     async def move_to_permanent_storage(
         self,
         temp_path: str,
@@ -106,21 +257,89 @@ class FileService(BaseService):
         if not path.exists():
             raise FileStorageError("Source file does not exist")
             
-        # Create user directory if needed
-        user_dir = self.storage_root / str(document.user_id)
-        os.makedirs(user_dir, exist_ok=True)
-        
-        # Create dated subdirectory
-        date_str = datetime.now().strftime("%Y/%m/%d")
-        dated_dir = user_dir / date_str
-        os.makedirs(dated_dir, exist_ok=True)
+        # Create user/dated subdirectory if needed
+        date_str = self._get_date_path()
+        dated_dir = self.storage_root / str(document.user_id) / date_str
+        self._ensure_dir(dated_dir)
         
         # Move file
         dest_path = dated_dir / path.name
-        shutil.move(str(path), str(dest_path))
+        try:
+            shutil.move(str(path), str(dest_path))
+        except FileNotFoundError:
+            # Directory removed behind our back; recreate it on retry
+            self._known_dirs.discard(str(dated_dir))
+            raise
         
         return str(dest_path)
     
+    def _ensure_dir(self, path: Path) -> None:
+        """Create a directory, skipping the syscall for ones already created today."""
+        key = str(path)
+        if key not in self._known_dirs:
+            os.makedirs(key, exist_ok=True)
+            if len(self._known_dirs) >= self.KNOWN_DIRS_MAX:
+                self._known_dirs.clear()
+            self._known_dirs.add(key)
+    
+    @staticmethod
+    def _has_disk_backing(source: BinaryIO) -> bool:
+        """Check whether a file object is backed by a real on-disk descriptor."""
+        # fileno() on an in-memory SpooledTemporaryFile would force a rollover
+        if isinstance(source, tempfile.SpooledTemporaryFile) and not source._rolled:
+            return False
+        try:
+            source.fileno()
+        except (AttributeError, OSError, ValueError):
+            return False
+        return True
+    
+    def _copy_file_in_kernel(
+        self,
+        source: BinaryIO,
+        destination: Path
+    ) -> Tuple[str, int]:
+        """Copy a disk-backed file without moving its bytes through Python.
+        
+        The data is hashed from a read-only mmap of the source and copied with
+        copy_file_range(2), falling back to sendfile(2).
+        
+        Returns:
+            Tuple of (SHA-256 hex digest, size in bytes)
+        """
+        src_fd = source.fileno()
+        offset = source.tell()
+        size = os.fstat(src_fd).st_size - offset
+        
+        hasher = new_sha256()
+        if size > 0:
+            with mmap.mmap(src_fd, 0, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as view:
+                    hasher.update(view[offset:])
+                    
+        copied = 0
+        with open(destination, "wb") as buffer:
+            dst_fd = buffer.fileno()
+            while copied < size:
+                sent = _kernel_copy(src_fd, dst_fd, offset + copied, size - copied)
+                if sent == 0:
+                    break
+                copied += sent
+                
+        source.seek(offset + copied)
+        return hasher.hexdigest(), copied
+    
+    def _get_date_path(self) -> str:
+        """Return today's "YYYY/MM/DD" path, recomputed at most once a minute."""
+        now = int(time.time())
+        if now - self._date_cache[0] > self.DATE_CACHE_TTL:
+            date_str = datetime.now().strftime("%Y/%m/%d")
+            if date_str != self._date_cache[1]:
+                # New day: yesterday's directories will not be used again
+                self._known_dirs.clear()
+            self._date_cache = (now, date_str)
+        return self._date_cache[1]
+    
     async def delete_file(self, filepath: str) -> None:
         """Delete a file from storage.
         
@@ -198,15 +417,15 @@ class FileService(BaseService):
         
         # Save chunk with sequential naming
         chunk_path = chunk_dir / f"{chunk_index:05d}.part"
-        with open(chunk_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        checksum, size = self.save_file(file.file, chunk_path)
             
         return {
             "chunk_id": chunk_id,
             "file_id": file_id,
             "chunk_index": chunk_index,
             "total_chunks": total_chunks,
-            "size": os.path.getsize(chunk_path)
+            "size": size,
+            "checksum": checksum
         }
             
     async def assemble_chunks(
@@ -271,20 +490,31 @@ class FileService(BaseService):
         Returns:
             Number of chunk directories removed
         """
-        count = 0
         cutoff = datetime.now().timestamp() - (older_than_hours * 3600)
         
-        for chunk_dir in self.chunks_dir.iterdir():
-            if chunk_dir.is_dir():
-                dir_time = os.path.getmtime(chunk_dir)
-                if dir_time < cutoff:
-                    try:
-                        shutil.rmtree(chunk_dir)
-                        count += 1
-                    except Exception:
-                        continue
-                        
-        return count
+        # DirEntry caches type and stat info from the directory read
+        with os.scandir(self.chunks_dir) as entries:
+            stale_dirs = [
+                entry.path for entry in entries
+                if entry.is_dir(follow_symlinks=False)
+                and entry.stat(follow_symlinks=False).st_mtime < cutoff
+            ]
+        if not stale_dirs:
+            return 0
+            
+        # Removal is I/O-bound, so run it across a small thread pool
+        with ThreadPoolExecutor(max_workers=self.CLEANUP_WORKERS) as executor:
+            results = executor.map(self._remove_chunk_dir, stale_dirs)
+            return sum(results)
+        
+    @staticmethod
+    def _remove_chunk_dir(path: str) -> bool:
+        """Remove a chunk directory, returning whether it succeeded."""
+        try:
+            shutil.rmtree(path)
+            return True
+        except Exception:
+            return False
         
     async def _retry_operation(
         self,
@@ -292,7 +522,7 @@ class FileService(BaseService):
         max_retries: int = MAX_RETRIES,
         initial_delay: float = RETRY_DELAY
     ):
-        """Execute an operation with retry logic.
+        """Execute a blocking operation in a worker thread with retry logic.
         
         Args:
             operation: Callable to execute
@@ -310,13 +540,18 @@ class FileService(BaseService):
         
         for attempt in range(max_retries + 1):
             try:
-                return operation()
+                # Run blocking disk I/O off the event loop
+                return await asyncio.to_thread(operation)
             except Exception as e:
                 last_error = e
                 if attempt < max_retries:
-                    time.sleep(delay)
+                    await asyncio.sleep(delay)
                     delay *= 2  # Exponential backoff
                     continue
                 raise FileStorageError(
                     f"Operation failed after {max_retries} retries: {str(e)}"
                 ) from e
+
+
+# Global file service instance
+file_service = FileService()
@@ -1,36 +1,73 @@
 """Document indexing service."""
 from .base import BaseService
-from typing import Optional, List, Dict
+import asyncio
+import time
+from typing import AsyncIterator, Optional, List, Dict, Tuple, Union
 from datetime import datetime
 
+import httpx
+import numpy as np
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 from qdrant_client.http.exceptions import UnexpectedResponse
 
 from ..models.document import Document
 from ..exceptions import IndexingError
+from ..core.search_cache import bump_search_cache_version
+from ..schemas.file import ALLOWED_MIME_TYPES
+
+# Embeddings may arrive as plain lists or float32 numpy arrays
+Vector = Union[List[float], np.ndarray]
 
 class IndexingService(BaseService):
     """Service for document indexing operations."""
     
+    BULK_BATCH_SIZE = 128  # Max points per queued upsert
+    BULK_FLUSH_INTERVAL = 0.1  # Max seconds a queued point waits for a batch
+    BULK_MAX_ATTEMPTS = 3  # Flushes tried per queued point before it is dropped
+    BULK_RETRY_DELAY = 1.0  # Seconds the flusher pauses after a failed flush
+    TIKA_TIMEOUT = 60  # Seconds allowed for a single Tika parse
+    TIKA_MAX_CONNECTIONS = 32  # Concurrent Tika parses; further requests wait for a connection
+    UPLOAD_CHUNK_SIZE = 1 << 20  # Bytes read from disk per chunk of a Tika upload
+    QUANTIZATION_OVERSAMPLING = 2.0  # Quantized candidates fetched per result before rescoring
+    
     def __init__(self):
         super().__init__()
         self.client = QdrantClient(
             url=self.config.QDRANT_URL,
             api_key=self.config.QDRANT_API_KEY,
-            timeout=self.config.QDRANT_TIMEOUT
+            timeout=self.config.QDRANT_TIMEOUT,
+            # gRPC sends vectors as packed protobuf floats instead of JSON
+            prefer_grpc=self.config.qdrant_prefer_grpc,
+            grpc_port=self.config.qdrant_grpc_port
         )
         self.collection_name = self.config.QDRANT_COLLECTION
         self.vector_size = self.config.EMBEDDING_SIZE
+        self._collection_ready = False
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+        
+        # Pooled keep-alive connections to Tika; requests beyond the pool
+        # queue for a free connection instead of timing out
+        self.tika_url = self.config.tika_url
+        self._http = httpx.AsyncClient(
+            timeout=httpx.Timeout(self.TIKA_TIMEOUT, pool=None),
+            limits=httpx.Limits(
+                max_connections=self.TIKA_MAX_CONNECTIONS,
+                max_keepalive_connections=self.TIKA_MAX_CONNECTIONS
+            ),
+            transport=httpx.AsyncHTTPTransport(retries=3)
+        )
         
     def health_check(self) -> dict:
-        """Check Qdrant connection health."""
+        """Check Qdrant and Tika connection health."""
         try:
             self.client.get_collections()
             return {
                 "service": "IndexingService",
                 "qdrant_connected": True,
                 "collection_exists": self._collection_exists(),
+                "tika_connected": self._check_tika_health(),
                 "status": "healthy"
             }
         except Exception as e:
@@ -49,8 +86,88 @@ class IndexingService(BaseService):
         except Exception:
             return False
         
+    def _check_tika_health(self) -> bool:
+        """Check if the Tika server is reachable."""
+        try:
+            response = httpx.get(f"{self.tika_url}/tika", timeout=5)
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
+            
+    def is_supported_type(self, mime_type: str) -> bool:
+        """Check whether Tika extraction applies to a MIME type."""
+        return mime_type in ALLOWED_MIME_TYPES
+        
+    async def extract_text(self, file_path: str, mime_type: str) -> Tuple[str, Dict]:
+        """Extract text and metadata from a document using Tika.
+        
+        Args:
+            file_path: Path to the document
+            mime_type: MIME type of the document
+            
+        Returns:
+            Tuple of (extracted text, Tika metadata)
+            
+        Raises:
+            IndexingError: If extraction fails
+        """
+        try:
+            # Raw PUT body is streamed from the file, unlike multipart
+            response = await self._http.put(
+                f"{self.tika_url}/rmeta/text",
+                content=self._read_chunks(file_path),
+                headers={"Accept": "application/json", "Content-Type": mime_type}
+            )
+            response.raise_for_status()
+        except (httpx.HTTPError, OSError) as e:
+            raise IndexingError(f"Tika extraction failed: {str(e)}")
+        
+        # First entry is the container document; the rest are embedded files
+        metadata = response.json()[0]
+        text = metadata.pop("X-TIKA:content", None) or ""
+        return text.strip(), metadata
+    
+    async def extract_text_many(
+        self,
+        files: List[Tuple[str, str]]
+    ) -> List[Union[Tuple[str, Dict], Exception]]:
+        """Extract text from several documents concurrently.
+        
+        Parses share the pooled Tika connections, so at most
+        TIKA_MAX_CONNECTIONS run at once.
+        
+        Args:
+            files: (file path, MIME type) pairs
+            
+        Returns:
+            (text, metadata) per file, in input order, or the exception
+            raised for that file
+        """
+        return await asyncio.gather(
+            *(self.extract_text(path, mime_type) for path, mime_type in files),
+            return_exceptions=True
+        )
+    
+    async def _read_chunks(self, file_path: str) -> AsyncIterator[bytes]:
+        """Yield a file's bytes in chunks, reading off the event loop."""
+        with open(file_path, "rb") as file:
+            while chunk := await asyncio.to_thread(file.read, self.UPLOAD_CHUNK_SIZE):
+                yield chunk
+    
+    async def close(self) -> None:
+        """Close pooled Tika connections and the Qdrant channel."""
+        await self._http.aclose()
+        await asyncio.to_thread(self.client.close)
+        
     def ensure_collection_exists(self) -> None:
-        """Ensure the Qdrant collection exists."""
+        """Ensure the Qdrant collection exists.
+        
+        The check only hits Qdrant until it first succeeds; after that the
+        collection is assumed to exist for the lifetime of the service.
+        """
+        if self._collection_ready:
+            return
+            
         try:
             collections = self.client.get_collections()
             existing = any(
@@ -59,14 +176,30 @@ class IndexingService(BaseService):
             )
             
             if not existing:
-                self.client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=models.VectorParams(
-                        size=self.vector_size,
-                        distance=models.Distance.COSINE
+                try:
+                    self.client.create_collection(
+                        collection_name=self.collection_name,
+                        vectors_config=models.VectorParams(
+                            size=self.vector_size,
+                            distance=models.Distance.COSINE
+                        ),
+                        # int8 quantized copies keep HNSW traversal in RAM at 1/4 the size
+                        quantization_config=models.ScalarQuantization(
+                            scalar=models.ScalarQuantizationConfig(
+                                type=models.ScalarType.INT8,
+                                # Clip outliers so the int8 range covers the bulk of values
+                                quantile=0.99,
+                                always_ram=True
+                            )
+                        )
                     )
-                )
-                logger.info(f"Created collection {self.collection_name}")
+                    self.logger.info(f"Created collection {self.collection_name}")
+                except Exception:
+                    # Another worker may have created it first
+                    if not self._collection_exists():
+                        raise
+                        
+            self._collection_ready = True
                 
         except UnexpectedResponse as e:
             raise IndexingError(f"Qdrant connection error: {str(e)}")
@@ -74,7 +207,7 @@ class IndexingService(BaseService):
     def index_document(
         self,
         document: Document,
-        vector: List[float],
+        vector: Vector,
         metadata: Dict
     ) -> str:
         """Index a document in Qdrant.
@@ -90,36 +223,151 @@ class IndexingService(BaseService):
         try:
             self.ensure_collection_exists()
             
-            point_id = str(document.id)
-            payload = {
-                "document_id": document.id,
-                "user_id": document.user_id,
-                "text": document.ocr_text or "",
-                **metadata
-            }
-            
+            point = self._build_point(document, vector, metadata)
             operation_info = self.client.upsert(
                 collection_name=self.collection_name,
-                points=[
-                    models.PointStruct(
-                        id=point_id,
-                        vector=vector,
-                        payload=payload
-                    )
-                ]
+                points=[point]
             )
             
-            logger.debug(
+            bump_search_cache_version()
+            self.logger.debug(
                 f"Indexed document {document.id} - {operation_info}"
             )
-            return point_id
+            return point.id
             
         except Exception as e:
             raise IndexingError(f"Indexing failed: {str(e)}")
     
+    def index_documents_bulk(
+        self,
+        items: List[Tuple[Document, Vector, Dict]]
+    ) -> List[str]:
+        """Index many documents in one batched Qdrant upload.
+        
+        Args:
+            items: (document, vector, metadata) tuples to index
+            
+        Returns:
+            The Qdrant point IDs, in input order
+        """
+        if not items:
+            return []
+            
+        try:
+            self.ensure_collection_exists()
+            
+            ids = [str(document.id) for document, _, _ in items]
+            payloads = [
+                self._build_payload(document, metadata)
+                for document, _, metadata in items
+            ]
+            # One contiguous float32 matrix; the client encodes rows directly
+            vectors = np.vstack([
+                np.asarray(vector, dtype=np.float32) for _, vector, _ in items
+            ])
+            # Wait for the points to apply, or a search racing the cache
+            # bump could cache the old results under the new version
+            self.client.upload_collection(
+                collection_name=self.collection_name,
+                vectors=vectors,
+                payload=payloads,
+                ids=ids,
+                batch_size=self.BULK_BATCH_SIZE,
+                wait=True
+            )
+            bump_search_cache_version()
+            
+            self.logger.debug(f"Bulk indexed {len(ids)} documents")
+            return ids
+            
+        except Exception as e:
+            raise IndexingError(f"Bulk indexing failed: {str(e)}")
+    
+    async def enqueue_document(
+        self,
+        document: Document,
+        vector: Vector,
+        metadata: Dict
+    ) -> str:
+        """Queue a document for batched indexing.
+        
+        Queued documents are flushed in one upsert once BULK_BATCH_SIZE
+        items are waiting or BULK_FLUSH_INTERVAL has elapsed.
+        
+        Args:
+            document: Document to index
+            vector: Document embedding vector
+            metadata: Additional metadata
+            
+        Returns:
+            The Qdrant point ID the document will be stored under
+        """
+        if self._flusher is None or self._flusher.done():
+            self._queue = asyncio.Queue()
+            self._flusher = asyncio.create_task(self._flush_queue())
+        await self._queue.put((document, vector, metadata, 0))
+        return str(document.id)
+    
+    async def _flush_queue(self) -> None:
+        """Drain the indexing queue in size- or time-bounded batches."""
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.BULK_FLUSH_INTERVAL
+            while len(batch) < self.BULK_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self._queue.get(), remaining)
+                    )
+                except asyncio.TimeoutError:
+                    break
+                    
+            try:
+                await asyncio.to_thread(
+                    self.index_documents_bulk,
+                    [(document, vector, metadata) for document, vector, metadata, _ in batch]
+                )
+            except Exception as e:
+                # Anything escaping here would kill the flusher and strand the queue
+                self.logger.error(f"Queued indexing of {len(batch)} documents failed: {e}")
+                await asyncio.sleep(self.BULK_RETRY_DELAY)
+                for document, vector, metadata, attempts in batch:
+                    if attempts + 1 < self.BULK_MAX_ATTEMPTS:
+                        self._queue.put_nowait((document, vector, metadata, attempts + 1))
+                    else:
+                        self.logger.error(
+                            f"Dropping document {document.id} after {self.BULK_MAX_ATTEMPTS} failed flushes"
+                        )
+    
+    @staticmethod
+    def _build_point(
+        document: Document,
+        vector: Vector,
+        metadata: Dict
+    ) -> models.PointStruct:
+        """Build the Qdrant point for a document."""
+        return models.PointStruct(
+            id=str(document.id),
+            # Uniform float32 values encode as packed repeated floats over gRPC
+            vector=np.asarray(vector, dtype=np.float32).tolist(),
+            payload=IndexingService._build_payload(document, metadata)
+        )
+    
+    @staticmethod
+    def _build_payload(document: Document, metadata: Dict) -> Dict:
+        """Build the Qdrant payload for a document."""
+        return {
+            "document_id": document.id,
+            "user_id": document.user_id,
+            "text": document.ocr_text or "",
+            **metadata
+        }
+    
     def search_documents(
         self,
-        query_vector: List[float],
+        query_vector: Vector,
         user_id: str,
         limit: int = 10
     ) -> List[Dict]:
@@ -136,14 +384,9 @@ class IndexingService(BaseService):
         try:
             results = self.client.search(
                 collection_name=self.collection_name,
-                query_vector=query_vector,
-                query_filter=models.Filter(
-                    must=[
-                        models.FieldCondition(
-                            key="user_id",
-                            match=models.MatchValue(value=user_id)
-                        ]
-                    ),
+                query_vector=np.asarray(query_vector, dtype=np.float32),
+                query_filter=self._user_filter(user_id),
+                search_params=self._search_params(),
                 limit=limit
             )
             
@@ -159,6 +402,27 @@ class IndexingService(BaseService):
         except Exception as e:
             raise IndexingError(f"Search failed: {str(e)}")
     
+    def _search_params(self) -> models.SearchParams:
+        """Search the int8 vectors, rescoring an oversampled top set exactly."""
+        return models.SearchParams(
+            quantization=models.QuantizationSearchParams(
+                rescore=True,
+                oversampling=self.QUANTIZATION_OVERSAMPLING
+            )
+        )
+    
+    @staticmethod
+    def _user_filter(user_id: str) -> models.Filter:
+        """Build a filter restricting results to one user's documents."""
+        return models.Filter(
+            must=[
+                models.FieldCondition(
+                    key="user_id",
+                    match=models.MatchValue(value=user_id)
+                )
+            ]
+        )
+    
     def delete_document(self, document_id: str) -> None:
         """Delete a document from the index.
         
@@ -172,5 +436,10 @@ class IndexingService(BaseService):
                     points=[document_id]
                 )
             )
+            bump_search_cache_version()
         except Exception as e:
             raise IndexingError(f"Deletion failed: {str(e)}")
+
+
+# Global indexing service instance
+indexing_service = IndexingService()
@@ -1,21 +1,130 @@
 """Enhanced file metadata extraction service."""
 from .base import BaseService
+import asyncio
+import hashlib
 import os
 import mimetypes
+import stat
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, Any, Optional
-import magic
-import hashlib
+from typing import Dict, Any, BinaryIO, List, Optional, Tuple
+import mmap
+import numpy as np
+import redis
+
+try:
+    import blake3
+except ImportError:  # Optional: only needed for digest deduplication
+    blake3 = None
+
+try:
+    from numba import njit
+except ImportError:  # Optional: single-pass text statistics
+    njit = None
+
+from ..core.hashing import SHA256_BACKEND, SHA256_HARDWARE, new_sha256
+from ..core.mime import get_magic
+from ..utils import statx
+from ..schemas.file import MIME_SNIFF_BYTES
+
+# Bytes str.split() treats as whitespace (\t\n\v\f\r, \x1c-\x1f, space)
+_WHITESPACE = np.zeros(256, dtype=bool)
+_WHITESPACE[[9, 10, 11, 12, 13, 28, 29, 30, 31, 32]] = True
+
+if njit is not None:
+    @njit(cache=True, nogil=True)
+    def _scan_window(window, whitespace, prev_is_space):
+        """Count newlines, word starts and characters touching each byte once."""
+        lines = 0
+        words = 0
+        continuation = 0
+        for byte in window:
+            if byte == 10:
+                lines += 1
+            if (byte & 0xC0) == 0x80:
+                continuation += 1
+            if whitespace[byte]:
+                prev_is_space = True
+            elif prev_is_space:
+                words += 1
+                prev_is_space = False
+        return lines, words, window.size - continuation, prev_is_space
+else:
+    _scan_window = None
+
+# Python 3.11+: reads into one reusable buffer instead of a bytes object per chunk
+_file_digest = getattr(hashlib, "file_digest", None)
+
+# Unix metadata keys, their stat attributes, and their os.stat_result
+# positions (mode, ino, dev, nlink, uid, gid, ...)
+_UNIX_STAT_KEYS = ("unix_uid", "unix_gid", "unix_device", "unix_inode", "unix_nlink")
+_UNIX_STAT_ATTRS = ("st_uid", "st_gid", "st_dev", "st_ino", "st_nlink")
+_unix_stat_fields = itemgetter(4, 5, 2, 1, 3)
+
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB")
+
+# Extension to MIME type, resolved once; mimetypes.guess_type re-parses
+# the whole path as a URL on every call
+mimetypes.init()
+_EXT_TO_MIME = {ext.lower(): mime for ext, mime in mimetypes.types_map.items()}
+
+# Read-ahead hints for mapped files that are hashed front to back
+_SEQUENTIAL_ADVICE = tuple(
+    getattr(mmap, name) for name in ("MADV_SEQUENTIAL", "MADV_WILLNEED") if hasattr(mmap, name)
+)
+
+
+def _advise_sequential(mm: mmap.mmap) -> None:
+    """Ask the kernel to read a mapping ahead aggressively (no-op where unsupported)."""
+    for advice in _SEQUENTIAL_ADVICE:
+        try:
+            mm.madvise(advice)
+        except OSError:
+            pass
 
 
 class MetadataService(BaseService):
     """Service for extracting comprehensive file metadata."""
     
+    MMAP_THRESHOLD = 1 << 20  # Hash files at least this large via mmap
+    CHUNK_SIZE = 1 << 20  # Buffered read size for smaller files
+    BATCH_WORKERS = min(32, (os.cpu_count() or 1) * 4)  # Threads for batch metadata
+    CHECKSUM_CACHE_SIZE = 10000  # Digests remembered for unchanged files
+    TEXT_SCAN_WINDOW = 16 << 20  # Bytes classified per step of the text scan
+    DEDUP_MIN_SIZE = 8 << 20  # Smaller files hash faster than a Redis round trip
+    DIGEST_KEY_PREFIX = "metadata:sha256_by_blake3:"  # One expiring Redis key per known digest
+    DIGEST_TTL = 30 * 24 * 3600  # Seconds a recorded digest is kept
+    DIGEST_STORE_TIMEOUT = 0.25  # Seconds before a Redis call gives up
+    DIGEST_STORE_BACKOFF = 30  # Seconds deduplication is skipped after a Redis error
+    MIME_CACHE_SIZE = 128  # libmagic results remembered by file prefix
+    DEFER_CHECKSUM_SIZE = 100 << 20  # Batch mode hands larger files to a Celery task
+    PROCESS_WORKERS = os.cpu_count() or 1  # Processes for CPU-bound batch extraction
+    
     def __init__(self):
         """Initialize metadata service."""
         super().__init__()
         self.upload_dir = Path(self.config.STORAGE_ROOT) / "uploads"
+        self._upload_str = str(self.upload_dir)
+        self._checksum_cache: Dict[Tuple[int, int, int, int], str] = {}
+        self._mime_cache: Dict[Tuple[Optional[int], bytes], str] = {}
+        # Guards eviction in both caches; the singleton is shared by request
+        # threads and the batch pool
+        self._cache_lock = threading.Lock()
+        # The process-wide libmagic handle; its database loads only once
+        self._magic = get_magic()
+        # Shared with other workers so re-uploaded content is recognized
+        self._digest_store = redis.Redis.from_url(
+            self.config.redis_url,
+            socket_timeout=self.DIGEST_STORE_TIMEOUT,
+            socket_connect_timeout=self.DIGEST_STORE_TIMEOUT
+        )
+        self._digest_store_retry_at = 0.0
         os.makedirs(self.upload_dir, exist_ok=True)
         
     def health_check(self) -> dict:
@@ -29,6 +138,8 @@ class MetadataService(BaseService):
                 "service": "MetadataService",
                 "storage_writable": True,
                 "magic_available": self._check_magic_available(),
+                "sha256_backend": SHA256_BACKEND,
+                "sha256_hardware": SHA256_HARDWARE,
                 "status": "healthy"
             }
         except Exception as e:
@@ -42,17 +153,26 @@ class MetadataService(BaseService):
     def _check_magic_available(self) -> bool:
         """Check if python-magic is working."""
         try:
-            magic.from_buffer(b'test', mime=True)
+            self._magic.from_buffer(b'test')
             return True
         except Exception:
             return False
         
-    def extract_file_metadata(self, file_path: str) -> Dict[str, Any]:
+    def extract_file_metadata(
+        self,
+        file_path: str,
+        include_checksum: bool = True,
+        resolve_links: bool = False
+    ) -> Dict[str, Any]:
         """
         Extract comprehensive metadata from a file.
         
         Args:
             file_path: Path to the file (relative to upload_dir)
+            include_checksum: Whether to hash the file; batch callers defer
+                hashing so many files can be hashed concurrently
+            resolve_links: Whether absolute_path should follow symlinks,
+                which costs a readlink per path component
             
         Returns:
             Dictionary containing file metadata including:
@@ -68,45 +188,59 @@ class MetadataService(BaseService):
             - additional metadata based on file type
         """
         try:
-            full_path = self.upload_dir / file_path
+            # Plain string paths; pathlib objects cost more than the stat itself
+            full_path = os.path.join(self._upload_str, file_path)
+            directory, filename = os.path.split(full_path)
+            stem, extension = os.path.splitext(filename)
             
-            if not full_path.exists():
+            # Open once; stat, MIME sniffing and hashing share the descriptor
+            try:
+                fd = os.open(full_path, os.O_RDONLY)
+            except FileNotFoundError:
                 raise FileNotFoundError(f"File not found: {file_path}")
+            try:
+                stat_info = os.fstat(fd)
+                # Unchanged files reuse their previous digest
+                cache_key = self._checksum_key(stat_info)
+                cached = self._checksum_cache.get(cache_key) if include_checksum else None
+                head, checksum = self._read_head_and_checksum(
+                    fd, stat_info.st_size, include_checksum and cached is None
+                )
+            finally:
+                os.close(fd)
+            if cached is not None:
+                checksum = cached
+            elif checksum is not None:
+                self._store_checksum(cache_key, checksum)
             
-            # Basic file stats
-            stat_info = full_path.stat()
-            
-            # Extract MIME type
-            mime_type = self._get_mime_type(str(full_path))
-            
-            # Calculate checksum
-            checksum = self._calculate_checksum(str(full_path))
+            # Extract MIME type from the bytes already read
+            mime_type = self._get_mime_type(full_path, head, stat_info.st_size)
             
             # Build metadata dictionary
             metadata = {
                 "file_path": file_path,
-                "full_path": str(full_path),
-                "filename": full_path.name,
+                "full_path": full_path,
+                "filename": filename,
                 "size": stat_info.st_size,
                 "size_human": self._format_file_size(stat_info.st_size),
                 "created_date": datetime.fromtimestamp(stat_info.st_ctime).isoformat(),
                 "modified_date": datetime.fromtimestamp(stat_info.st_mtime).isoformat(),
                 "accessed_date": datetime.fromtimestamp(stat_info.st_atime).isoformat(),
                 "mime_type": mime_type,
-                "extension": full_path.suffix.lower(),
+                "extension": extension.lower(),
                 "checksum": checksum,
                 "permissions": oct(stat_info.st_mode)[-3:],
-                "is_hidden": full_path.name.startswith('.'),
-                "absolute_path": str(full_path.resolve()),
-                "directory": str(full_path.parent),
-                "stem": full_path.stem,
+                "is_hidden": filename.startswith('.'),
+                "absolute_path": os.path.realpath(full_path) if resolve_links else os.path.abspath(full_path),
+                "directory": directory,
+                "stem": stem,
             }
             
             # Add type-specific metadata
-            metadata.update(self._extract_type_specific_metadata(str(full_path), mime_type))
+            metadata.update(self._extract_type_specific_metadata(full_path, mime_type))
             
             # Add system-specific metadata
-            metadata.update(self._extract_system_metadata(str(full_path), stat_info))
+            metadata.update(self._extract_system_metadata(full_path, stat_info))
             
             self.logger.info(f"Extracted metadata for {file_path}: {metadata['size_human']}, {mime_type}")
             
@@ -116,35 +250,182 @@ class MetadataService(BaseService):
             self.logger.error(f"Error extracting metadata for {file_path}: {e}")
             raise
     
-    def _get_mime_type(self, file_path: str) -> str:
-        """Get MIME type using python-magic."""
+    async def extract_file_metadata_async(
+        self,
+        file_path: str,
+        include_checksum: bool = True,
+        resolve_links: bool = False
+    ) -> Dict[str, Any]:
+        """Extract file metadata in a worker thread.
+        
+        Hashing and the PIL/PyPDF2 parsers block, so async callers use this
+        to keep the event loop free; see extract_file_metadata for details.
+        """
+        return await asyncio.to_thread(
+            self.extract_file_metadata, file_path, include_checksum, resolve_links
+        )
+    
+    def _read_head_and_checksum(
+        self,
+        fd: int,
+        size: int,
+        include_checksum: bool
+    ) -> Tuple[bytes, Optional[str]]:
+        """Read the sniffing prefix and, optionally, hash an open file in one pass.
+        
+        Large files are mapped so the prefix and hash come from the same
+        page-cache view; small files are read with a single syscall.
+        """
+        if not include_checksum:
+            return os.read(fd, MIME_SNIFF_BYTES), None
+        if size >= self.MMAP_THRESHOLD:
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                _advise_sequential(mm)
+                return mm[:MIME_SNIFF_BYTES], self._sha256_mapped(mm, size)
+        data = os.read(fd, size)
+        return data[:MIME_SNIFF_BYTES], new_sha256(data).hexdigest()
+    
+    def _get_mime_type(
+        self, file_path: str, head: Optional[bytes] = None, file_size: Optional[int] = None
+    ) -> str:
+        """Get MIME type using python-magic, from a file prefix when available.
+        
+        libmagic only sees the prefix, so its answer is remembered per
+        (file size, blake2b of the prefix), as in schemas/file.py; files
+        sharing a header skip the database scan, and the cache keeps 8-byte
+        digests rather than whole prefixes.
+        """
         try:
-            mime_type = magic.from_file(file_path, mime=True)
-            return mime_type or "application/octet-stream"
+            if head is None:
+                with open(file_path, "rb") as f:
+                    head = f.read(MIME_SNIFF_BYTES)
+                    file_size = os.fstat(f.fileno()).st_size
+            key = (file_size, hashlib.blake2b(head, digest_size=8).digest())
+            mime_type = self._mime_cache.get(key)
+            if mime_type is None:
+                mime_type = self._magic.from_buffer(head) or "application/octet-stream"
+                with self._cache_lock:
+                    if len(self._mime_cache) >= self.MIME_CACHE_SIZE:
+                        self._mime_cache.pop(next(iter(self._mime_cache), None), None)
+                    self._mime_cache[key] = mime_type
+            return mime_type
         except Exception:
-            # Fallback to mimetypes
-            mime_type, _ = mimetypes.guess_type(file_path)
-            return mime_type or "application/octet-stream"
+            # Fallback to the file extension
+            extension = os.path.splitext(file_path)[1].lower()
+            return _EXT_TO_MIME.get(extension, "application/octet-stream")
     
     def _calculate_checksum(self, file_path: str) -> str:
-        """Calculate SHA-256 checksum of file."""
+        """Calculate SHA-256 checksum of file.
+        
+        Large files are hashed from a read-only mmap in a single update call;
+        small files (or ones mmap rejects) use buffered 1 MiB reads.
+        """
         try:
-            hash_sha256 = hashlib.sha256()
             with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_sha256.update(chunk)
-            return hash_sha256.hexdigest()
+                stat_info = os.fstat(f.fileno())
+                cache_key = self._checksum_key(stat_info)
+                cached = self._checksum_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+                    
+                if stat_info.st_size >= self.MMAP_THRESHOLD:
+                    try:
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                            _advise_sequential(mm)
+                            checksum = self._sha256_mapped(mm, stat_info.st_size)
+                        return self._store_checksum(cache_key, checksum)
+                    except (OSError, ValueError):
+                        pass
+                checksum = self._calculate_checksum_stream(f)
+            return self._store_checksum(cache_key, checksum)
         except Exception as e:
             self.logger.error(f"Error calculating checksum: {e}")
             return ""
     
+    def _calculate_checksum_stream(self, fp: BinaryIO) -> str:
+        """Calculate SHA-256 checksum of a binary stream.
+        
+        On Python 3.11+ hashlib.file_digest drives the read loop (and hashes
+        a BytesIO's buffer whole); older interpreters read CHUNK_SIZE pieces.
+        """
+        if _file_digest is not None:
+            return _file_digest(fp, new_sha256).hexdigest()
+        hash_sha256 = new_sha256()
+        for chunk in iter(lambda: fp.read(self.CHUNK_SIZE), b""):
+            hash_sha256.update(chunk)
+        return hash_sha256.hexdigest()
+    
+    def _sha256_mapped(self, buffer: mmap.mmap, size: int) -> str:
+        """Hash a mapped file, reusing the SHA-256 of content seen before.
+        
+        Large files are first hashed with multithreaded BLAKE3, which is
+        several times faster than SHA-256 and equally collision-resistant, so
+        its digest can safely stand in for the file when looking up a SHA-256
+        recorded for identical content. Falls back to plain SHA-256 when
+        blake3 is missing or Redis is unreachable; after a Redis error the
+        BLAKE3 pass is skipped for DIGEST_STORE_BACKOFF seconds.
+        """
+        if (blake3 is None or size < self.DEDUP_MIN_SIZE
+                or time.monotonic() < self._digest_store_retry_at):
+            return new_sha256(buffer).hexdigest()
+            
+        content_key = (
+            f"{self.DIGEST_KEY_PREFIX}{size}:"
+            f"{blake3.blake3(buffer, max_threads=blake3.blake3.AUTO).hexdigest()}"
+        )
+        try:
+            known = self._digest_store.get(content_key)
+        except redis.RedisError as e:
+            self._digest_store_failed(e)
+            known = None
+        if known is not None:
+            return known.decode()
+            
+        checksum = new_sha256(buffer).hexdigest()
+        if time.monotonic() >= self._digest_store_retry_at:
+            try:
+                self._digest_store.set(content_key, checksum, ex=self.DIGEST_TTL)
+            except redis.RedisError as e:
+                self._digest_store_failed(e)
+        return checksum
+    
+    def _digest_store_failed(self, error: redis.RedisError) -> None:
+        """Stop consulting the digest store for a while after an error."""
+        self._digest_store_retry_at = time.monotonic() + self.DIGEST_STORE_BACKOFF
+        self.logger.debug(f"Digest store unavailable: {error}")
+    
+    @staticmethod
+    def _checksum_key(stat_info: os.stat_result) -> Tuple[int, int, int, int]:
+        """Identify a file's content version by device, inode, size and mtime."""
+        return (stat_info.st_dev, stat_info.st_ino, stat_info.st_size, stat_info.st_mtime_ns)
+    
+    def remember_checksum(self, file_path: str, checksum: str) -> None:
+        """Record a SHA-256 computed elsewhere, e.g. while an upload was written.
+        
+        Stored under the file's content-version key, so a later extraction
+        skips re-reading the file while it is unchanged, including after a
+        rename within the same filesystem.
+        """
+        self._store_checksum(self._checksum_key(os.stat(file_path)), checksum)
+    
+    def _store_checksum(self, key: Tuple[int, int, int, int], checksum: str) -> str:
+        """Remember a checksum, evicting the oldest entry when the cache is full."""
+        with self._cache_lock:
+            if len(self._checksum_cache) >= self.CHECKSUM_CACHE_SIZE:
+                self._checksum_cache.pop(next(iter(self._checksum_cache), None), None)
+            self._checksum_cache[key] = checksum
+        return checksum
+    
     def _format_file_size(self, size_bytes: int) -> str:
-        """Format file size in human-readable format."""
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if size_bytes < 1024.0:
-                return f"{size_bytes:.1f} {unit}"
-            size_bytes /= 1024.0
-        return f"{size_bytes:.1f} PB"
+        """Format file size in human-readable format.
+        
+        The unit comes straight from the bit length; dividing by an exact
+        power of two gives the same value as repeated division by 1024.
+        """
+        unit = 0
+        if size_bytes >= 1024:
+            unit = min((int(size_bytes).bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+        return f"{size_bytes / (1 << (10 * unit)):.1f} {_SIZE_UNITS[unit]}"
     
     def _extract_type_specific_metadata(self, file_path: str, mime_type: str) -> Dict[str, Any]:
         """Extract metadata specific to file type."""
@@ -192,55 +473,142 @@ class MetadataService(BaseService):
         return {"audio_metadata": "not_implemented"}
     
     def _extract_pdf_metadata(self, file_path: str) -> Dict[str, Any]:
-        """Extract PDF-specific metadata."""
+        """Extract PDF-specific metadata.
+        
+        pikepdf (libqpdf) reads the info dictionary and page count from the
+        trailer and page tree root without parsing every page.
+        """
         try:
-            import PyPDF2
-            with open(file_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                metadata = reader.metadata
+            import pikepdf
+            try:
+                pdf = pikepdf.open(file_path)
+            except pikepdf.PasswordError:
+                return {"pdf_encrypted": True}
+            with pdf:
+                info = pdf.docinfo
                 return {
-                    "pdf_title": metadata.get('/Title', ''),
-                    "pdf_author": metadata.get('/Author', ''),
-                    "pdf_subject": metadata.get('/Subject', ''),
-                    "pdf_creator": metadata.get('/Creator', ''),
-                    "pdf_producer": metadata.get('/Producer', ''),
-                    "pdf_creation_date": str(metadata.get('/CreationDate', '')),
-                    "pdf_modification_date": str(metadata.get('/ModDate', '')),
-                    "pdf_pages": len(reader.pages),
-                    "pdf_encrypted": reader.is_encrypted
+                    "pdf_title": str(info.get('/Title', '')),
+                    "pdf_author": str(info.get('/Author', '')),
+                    "pdf_subject": str(info.get('/Subject', '')),
+                    "pdf_creator": str(info.get('/Creator', '')),
+                    "pdf_producer": str(info.get('/Producer', '')),
+                    "pdf_creation_date": str(info.get('/CreationDate', '')),
+                    "pdf_modification_date": str(info.get('/ModDate', '')),
+                    "pdf_pages": len(pdf.pages),
+                    "pdf_encrypted": pdf.is_encrypted
                 }
         except Exception as e:
             self.logger.warning(f"Could not extract PDF metadata: {e}")
             return {}
     
     def _extract_text_metadata(self, file_path: str) -> Dict[str, Any]:
-        """Extract text-specific metadata."""
+        """Extract text-specific metadata.
+        
+        Counts come from one scan of the raw UTF-8 bytes rather than a
+        decoded string: lines are newline-terminated, words are runs of
+        non-whitespace, and characters are non-continuation bytes. CRLF and
+        lone CR count as one newline each, as when read in text mode; other
+        Unicode line breaks and invalid UTF-8 bytes are not special-cased.
+        """
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                return {
-                    "text_lines": len(content.splitlines()),
-                    "text_characters": len(content),
-                    "text_words": len(content.split()),
-                    "text_encoding": 'utf-8'
-                }
+            with open(file_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        _advise_sequential(mm)
+                        lines, words, characters = self._scan_text(mm, size)
+                else:
+                    lines = words = characters = 0
+            return {
+                "text_lines": lines,
+                "text_characters": characters,
+                "text_words": words,
+                "text_encoding": 'utf-8'
+            }
         except Exception as e:
             self.logger.warning(f"Could not extract text metadata: {e}")
             return {}
     
+    def _scan_text(self, buffer, size: int) -> Tuple[int, int, int]:
+        """Count lines, words and characters in a UTF-8 buffer.
+        
+        With numba installed each window is scanned by one compiled loop;
+        otherwise by a few vectorized NumPy passes.
+        """
+        lines = words = characters = 0
+        prev_is_space = True
+        if _scan_window is None:
+            # Scratch arrays reused by every window of the NumPy path
+            span = min(self.TEXT_SCAN_WINDOW, size)
+            scratch = np.empty(span, dtype=np.uint8)
+            is_space = np.empty(span, dtype=bool)
+            mask = np.empty(span, dtype=bool)
+        for offset in range(0, size, self.TEXT_SCAN_WINDOW):
+            window = np.frombuffer(
+                buffer, dtype=np.uint8,
+                count=min(self.TEXT_SCAN_WINDOW, size - offset), offset=offset
+            )
+            if _scan_window is not None:
+                window_lines, window_words, window_chars, prev_is_space = _scan_window(
+                    window, _WHITESPACE, prev_is_space
+                )
+                lines += window_lines
+                words += window_words
+                characters += window_chars
+                continue
+            n = window.size
+            tmp, space, flags = scratch[:n], is_space[:n], mask[:n]
+            # Whitespace is the byte ranges 9-13 and 28-32; unsigned wraparound
+            # turns each range test into one subtract and compare (SIMD, unlike
+            # a table lookup)
+            np.less_equal(np.subtract(window, np.uint8(9), out=tmp), 4, out=space)
+            np.less_equal(np.subtract(window, np.uint8(28), out=tmp), 4, out=flags)
+            np.logical_or(space, flags, out=space)
+            lines += int(np.count_nonzero(np.equal(window, 10, out=flags)))
+            # A word starts wherever whitespace is followed by non-whitespace
+            words += int(np.count_nonzero(np.greater(space[:-1], space[1:], out=flags[:-1])))
+            words += int(prev_is_space and not space[0])
+            # UTF-8 continuation bytes are 0x80-0xBF
+            np.bitwise_xor(window, np.uint8(0x80), out=tmp)
+            characters += n - int(np.count_nonzero(np.less(tmp, 0x40, out=flags)))
+            prev_is_space = bool(space[-1])
+        # Text mode reads CRLF and lone CR as a single newline each
+        if buffer.find(b"\r") != -1:
+            carriage_returns, crlf_pairs = self._count_carriage_returns(buffer, size)
+            characters -= crlf_pairs
+            lines += carriage_returns - crlf_pairs
+        # A final line without a trailing newline still counts
+        if buffer[size - 1] not in (10, 13):
+            lines += 1
+        return lines, words, characters
+    
+    def _count_carriage_returns(self, buffer, size: int) -> Tuple[int, int]:
+        """Count CR bytes and CRLF pairs in a buffer, window by window."""
+        carriage_returns = crlf_pairs = 0
+        for offset in range(0, size, self.TEXT_SCAN_WINDOW):
+            n = min(self.TEXT_SCAN_WINDOW, size - offset)
+            # One byte of lookahead catches a pair split across windows
+            window = np.frombuffer(
+                buffer, dtype=np.uint8, count=min(n + 1, size - offset), offset=offset
+            )
+            is_cr = window[:n] == 13
+            carriage_returns += int(np.count_nonzero(is_cr))
+            crlf_pairs += int(np.count_nonzero(is_cr[:window.size - 1] & (window[1:] == 10)))
+        return carriage_returns, crlf_pairs
+    
     def _extract_system_metadata(self, file_path: str, stat_info) -> Dict[str, Any]:
         """Extract system-specific metadata."""
         metadata = {}
         
         try:
-            # Unix-style metadata
-            metadata.update({
-                "unix_uid": getattr(stat_info, 'st_uid', None),
-                "unix_gid": getattr(stat_info, 'st_gid', None),
-                "unix_device": getattr(stat_info, 'st_dev', None),
-                "unix_inode": getattr(stat_info, 'st_ino', None),
-                "unix_nlink": getattr(stat_info, 'st_nlink', None),
-            })
+            # Unix-style metadata, by tuple position when it is an os.stat_result
+            if isinstance(stat_info, os.stat_result):
+                metadata.update(zip(_UNIX_STAT_KEYS, _unix_stat_fields(stat_info)))
+            else:
+                metadata.update(
+                    (key, getattr(stat_info, attr, None))
+                    for key, attr in zip(_UNIX_STAT_KEYS, _UNIX_STAT_ATTRS)
+                )
             
             # Windows-specific metadata
             if hasattr(stat_info, 'st_file_attributes'):
@@ -256,30 +624,207 @@ class MetadataService(BaseService):
         
         return metadata
     
-    def get_file_info_batch(self, file_paths: list) -> Dict[str, Any]:
+    def get_file_info_batch(
+        self,
+        file_paths: list,
+        defer_large_checksums: bool = False
+    ) -> Dict[str, Any]:
         """
         Extract metadata for multiple files.
         
         Args:
             file_paths: List of file paths relative to upload_dir
+            defer_large_checksums: Whether files over DEFER_CHECKSUM_SIZE are
+                hashed by the compute_checksum Celery task instead; their
+                metadata gets checksum None and a checksum_task_id
             
         Returns:
             Dictionary with file paths as keys and metadata as values
         """
-        results = {}
+        if not file_paths:
+            return {}
+            
+        # Metadata is I/O-bound (stat, libmagic, PIL) and hashing is bound by
+        # read bandwidth, so each file is hashed as soon as its metadata is
+        # in, keeping the disk busy instead of waiting for the slowest file
+        workers = min(len(file_paths), self.BATCH_WORKERS)
+        hash_workers = min(len(file_paths), os.cpu_count() or 1)
+        results: Dict[str, Any] = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor, \
+                ThreadPoolExecutor(max_workers=hash_workers) as hasher:
+            pending = {
+                executor.submit(self._extract_metadata_safe, path): path
+                for path in file_paths
+            }
+            checksums = {}
+            for future in as_completed(pending):
+                path = pending[future]
+                meta = results[path] = future.result()
+                if "error" in meta or (defer_large_checksums and self._defer_checksum(meta)):
+                    continue
+                checksums[path] = hasher.submit(self._calculate_checksum, meta["full_path"])
+            for path, checksum in checksums.items():
+                results[path]["checksum"] = checksum.result()
         
-        for file_path in file_paths:
-            try:
-                results[file_path] = self.extract_file_metadata(file_path)
-            except Exception as e:
-                results[file_path] = {"error": str(e)}
+        # Input order, as callers iterate the result alongside file_paths
+        return {path: results[path] for path in file_paths}
+    
+    def extract_batch(self, file_paths: List[str]) -> Dict[str, Any]:
+        """Extract full metadata, checksums included, across processes.
+        
+        For CPU-heavy batches (large text scans, image decoding) where the
+        threads of get_file_info_batch would contend for the GIL. Each pool
+        process opens and maps the files itself, so only paths and the
+        resulting metadata dicts cross process boundaries.
+        
+        Args:
+            file_paths: List of file paths relative to upload_dir
+            
+        Returns:
+            Dictionary with file paths as keys, in input order, and metadata
+            (or {"error": ...}) as values; files whose worker died get an
+            error entry rather than failing the batch
+        """
+        if not file_paths:
+            return {}
+        # A few chunks per process amortize IPC while keeping the load even
+        chunksize = max(1, len(file_paths) // (4 * self.PROCESS_WORKERS))
+        chunks = [file_paths[i:i + chunksize] for i in range(0, len(file_paths), chunksize)]
+        try:
+            pool = _get_process_pool()
+            futures = [pool.submit(_extract_chunk_in_process, chunk) for chunk in chunks]
+        except BrokenProcessPool:
+            # A worker died after the last batch; start over on a fresh pool
+            _discard_process_pool(pool)
+            pool = _get_process_pool()
+            futures = [pool.submit(_extract_chunk_in_process, chunk) for chunk in chunks]
         
+        results: Dict[str, Any] = {}
+        for chunk, future in zip(chunks, futures):
+            try:
+                extracted = future.result()
+            except BrokenProcessPool as e:
+                # A worker was killed (e.g. out of memory); every chunk still
+                # pending fails the same way, and the next batch gets new workers
+                _discard_process_pool(pool)
+                extracted = [{"error": f"Metadata worker failed: {e}"} for _ in chunk]
+            for path, metadata in zip(chunk, extracted):
+                results.setdefault(path, metadata)
         return results
     
+    def _extract_metadata_safe(self, file_path: str) -> Dict[str, Any]:
+        """Extract metadata without a checksum, returning errors as data."""
+        try:
+            return self.extract_file_metadata(file_path, include_checksum=False)
+        except Exception as e:
+            return {"error": str(e)}
+    
+    def _defer_checksum(self, metadata: Dict[str, Any]) -> bool:
+        """Queue a background hash for a large file.
+        
+        Returns:
+            Whether the file was handed off
+        """
+        if metadata["size"] <= self.DEFER_CHECKSUM_SIZE:
+            return False
+        from celery import current_app
+        
+        result = current_app.send_task("compute_checksum", args=[metadata["full_path"]])
+        metadata["checksum_task_id"] = result.id
+        return True
+    
+    def calculate_checksum(self, full_path: str) -> str:
+        """Calculate the SHA-256 of a file by absolute path ("" if unreadable)."""
+        return self._calculate_checksum(full_path)
+    
+    def calculate_checksums_batch(self, full_paths: List[str]) -> List[str]:
+        """Calculate SHA-256 checksums for many files concurrently.
+        
+        OpenSSL hashes one stream per call, so throughput comes from running
+        one stream per core; hashlib releases the GIL while it hashes. Each
+        core takes an interleaved share of the files as a single job, so
+        thousands of small files cost a handful of futures, not one each.
+        
+        For callers that already hold every path. get_file_info_batch does
+        not use it: it hashes each file as its metadata arrives, so hashing
+        overlaps the metadata pass. Text extraction never hashes.
+        
+        Args:
+            full_paths: Absolute file paths
+            
+        Returns:
+            Hex digests in input order ("" for files that could not be read)
+        """
+        if len(full_paths) <= 1:
+            return [self._calculate_checksum(path) for path in full_paths]
+            
+        workers = min(len(full_paths), os.cpu_count() or 1)
+        # Interleaving spreads large and small files evenly across lanes
+        lanes = [full_paths[lane::workers] for lane in range(workers)]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            hashed = list(executor.map(
+                lambda paths: [self._calculate_checksum(path) for path in paths], lanes
+            ))
+        checksums = [""] * len(full_paths)
+        for lane, digests in enumerate(hashed):
+            checksums[lane::workers] = digests
+        return checksums
+    
     def validate_file_exists(self, file_path: str) -> bool:
-        """Check if file exists in storage."""
-        full_path = self.upload_dir / file_path
-        return full_path.exists() and full_path.is_file()
+        """Check if file exists in storage.
+        
+        Uses cached attributes, so network-backed storage is not asked to
+        revalidate the file just to confirm it is there.
+        """
+        try:
+            return stat.S_ISREG(statx.stat(os.path.join(self._upload_str, file_path)).st_mode)
+        except (OSError, ValueError):
+            return False
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Return the shared extraction pool, starting it on first use.
+    
+    Workers are spawned rather than forked so they never inherit the
+    server's threads, locks or open connections; the pool is kept for
+    the life of the process so that startup cost is paid once.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=MetadataService.PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+    return _process_pool
+
+
+def _discard_process_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next batch starts a new one."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False)
+
+
+def _extract_chunk_in_process(file_paths: List[str]) -> List[Dict[str, Any]]:
+    """Extract metadata for a chunk of files inside a pool process.
+    
+    Spawned workers import this module afresh, so metadata_service is the
+    process's own singleton, with its own handles and caches.
+    """
+    extracted = []
+    for file_path in file_paths:
+        try:
+            extracted.append(metadata_service.extract_file_metadata(file_path))
+        except Exception as e:
+            extracted.append({"error": str(e)})
+    return extracted
 
 
 # Global metadata service instance
@@ -4,49 +4,47 @@ import os
 import json
 import asyncio
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
 
-from sqlalchemy import select
-from app.models.document import Document
+from sqlalchemy import select, update
+from app.models.document_record import DocumentRecord
 from app.services.indexing_service import indexing_service
-from app.services.ocr_service import ocr_service
+from app.services.ocr_service import ocr_service, SUPPORTED_IMAGE_TYPES
 from app.db.session import SessionLocal
 
+# Formats whose text Tika can extract directly
+SUPPORTED_DOCUMENT_TYPES = frozenset({
+    'application/pdf',
+    'application/msword',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'application/vnd.ms-excel',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'application/vnd.ms-powerpoint',
+    'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    'text/plain',
+    'text/html',
+    'text/xml',
+    'text/csv',
+    'application/json',
+    'application/xml',
+    'application/rtf',
+    'application/epub+zip',
+})
+
+# Every format handled by either Tika or OCR
+_EXTRACTABLE_TYPES = SUPPORTED_DOCUMENT_TYPES | SUPPORTED_IMAGE_TYPES
+
 
 class TextExtractionService(BaseService):
     """Service for orchestrating text extraction from documents."""
     
-    def __init__(self):
-        """Initialize text extraction service."""
-        super().__init__()
-        self.supported_image_types = {
-            'image/jpeg',
-            'image/png',
-            'image/tiff',
-            'image/bmp',
-            'image/gif',
-            'image/webp'
-        }
-        
-        self.supported_document_types = {
-            'application/pdf',
-            'application/msword',
-            'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            'application/vnd.ms-excel',
-            'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            'application/vnd.ms-powerpoint',
-            'application/vnd.openxmlformats-officedocument.presentationml.presentation',
-            'text/plain',
-            'text/html',
-            'text/xml',
-            'text/csv',
-            'application/json',
-            'application/xml',
-            'application/rtf',
-            'application/epub+zip',
-        }
+    PENDING_BATCH_SIZE = 50  # Pending documents fetched and updated together
+    EXTRACTION_CONCURRENCY = 8  # Extractions in flight at once
+    
+    supported_image_types = SUPPORTED_IMAGE_TYPES
+    supported_document_types = SUPPORTED_DOCUMENT_TYPES
     
-    async def extract_text_from_document(self, document: Document) -> Dict[str, Any]:
+    async def extract_text_from_document(self, document: DocumentRecord) -> Dict[str, Any]:
         """
         Extract text from a document based on its type.
         
@@ -57,30 +55,7 @@ class TextExtractionService(BaseService):
             Dictionary with extraction results
         """
         try:
-            file_path = document.file_path
-            mime_type = document.mime_type
-            
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"File not found: {file_path}")
-            
-            results = {
-                'text_extraction_status': 'failed',
-                'ocr_status': 'failed',
-                'extracted_text': None,
-                'ocr_text': None,
-                'extracted_metadata': {},
-                'ocr_confidence': {}
-            }
-            
-            # Extract text based on file type
-            if mime_type in self.supported_document_types:
-                results.update(await self._extract_document_text(file_path, mime_type))
-            elif mime_type in self.supported_image_types:
-                results.update(await self._extract_image_text(file_path))
-            else:
-                self.logger.warning(f"Unsupported file type: {mime_type}")
-                results['text_extraction_status'] = 'unsupported'
-                results['ocr_status'] = 'unsupported'
+            results = await self._extract_results(document)
             
             # Update document in database
             await self._update_document_with_results(document.id, results)
@@ -92,26 +67,66 @@ class TextExtractionService(BaseService):
             await self._update_document_status(document.id, 'failed', str(e))
             raise
     
+    async def _extract_results(self, document: DocumentRecord) -> Dict[str, Any]:
+        """Extract text from a document without persisting the results."""
+        file_path = document.file_path
+        mime_type = document.mime_type
+        
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        
+        results = self._failed_results()
+        
+        # Extract text based on file type
+        if mime_type in self.supported_document_types:
+            results.update(await self._extract_document_text(file_path, mime_type))
+        elif mime_type in self.supported_image_types:
+            results.update(await self._extract_image_text(file_path))
+        else:
+            self.logger.warning(f"Unsupported file type: {mime_type}")
+            results['text_extraction_status'] = 'unsupported'
+            results['ocr_status'] = 'unsupported'
+        
+        return results
+    
+    @staticmethod
+    def _failed_results() -> Dict[str, Any]:
+        """Results for a document nothing could be extracted from."""
+        return {
+            'text_extraction_status': 'failed',
+            'ocr_status': 'failed',
+            'extracted_text': None,
+            'ocr_text': None,
+            'extracted_metadata': {},
+            'ocr_confidence': {}
+        }
+    
     async def _extract_document_text(self, file_path: str, mime_type: str) -> Dict[str, Any]:
         """Extract text from document files using Tika."""
         try:
-            extracted_text, metadata = await indexing_service.extract_text(file_path, mime_type)
-            
-            return {
-                'text_extraction_status': 'completed',
-                'extracted_text': extracted_text,
-                'extracted_metadata': metadata,
-                'ocr_status': 'not_required'  # Documents don't need OCR
-            }
-            
+            parsed = await indexing_service.extract_text(file_path, mime_type)
         except Exception as e:
-            self.logger.error(f"Document text extraction failed: {e}")
+            parsed = e
+        return self._document_text_results(parsed)
+    
+    def _document_text_results(self, parsed: Union[Tuple[str, Dict], BaseException]) -> Dict[str, Any]:
+        """Turn a Tika parse, or the exception it raised, into results."""
+        if isinstance(parsed, BaseException):
+            self.logger.error(f"Document text extraction failed: {parsed}")
             return {
                 'text_extraction_status': 'failed',
                 'extracted_text': None,
                 'extracted_metadata': {},
                 'ocr_status': 'not_required'
             }
+        
+        extracted_text, metadata = parsed
+        return {
+            'text_extraction_status': 'completed',
+            'extracted_text': extracted_text,
+            'extracted_metadata': metadata,
+            'ocr_status': 'not_required'  # Documents don't need OCR
+        }
     
     async def _extract_image_text(self, file_path: str) -> Dict[str, Any]:
         """Extract text from image files using OCR."""
@@ -138,8 +153,12 @@ class TextExtractionService(BaseService):
     
     async def _update_document_with_results(self, document_id: int, results: Dict[str, Any]) -> None:
         """Update document with extraction results."""
-        async with SessionLocal() as session:
-            document = await session.get(Document, document_id)
+        await asyncio.to_thread(self._write_document_results, document_id, results)
+    
+    def _write_document_results(self, document_id: int, results: Dict[str, Any]) -> None:
+        # SessionLocal is synchronous; callers run this in a worker thread
+        with SessionLocal() as session:
+            document = session.get(DocumentRecord, document_id)
             if document:
                 document.text_extraction_status = results['text_extraction_status']
                 document.ocr_status = results['ocr_status']
@@ -148,62 +167,130 @@ class TextExtractionService(BaseService):
                 document.extracted_metadata = results['extracted_metadata']
                 document.ocr_confidence = results['ocr_confidence']
                 
-                await session.commit()
+                session.commit()
                 self.logger.info(f"Updated document {document_id} with extraction results")
     
+    async def _update_documents_with_results(self, results: Dict[int, Dict[str, Any]]) -> None:
+        """Write extraction results for many documents in one bulk UPDATE."""
+        if not results:
+            return
+        await asyncio.to_thread(self._write_documents_results, results)
+    
+    def _write_documents_results(self, results: Dict[int, Dict[str, Any]]) -> None:
+        with SessionLocal() as session:
+            # A list of primary-keyed mappings runs as one executemany
+            session.execute(
+                update(DocumentRecord),
+                [
+                    {
+                        'id': document_id,
+                        'text_extraction_status': result['text_extraction_status'],
+                        'ocr_status': result['ocr_status'],
+                        'extracted_text': result['extracted_text'],
+                        'ocr_text': result['ocr_text'],
+                        'extracted_metadata': result['extracted_metadata'],
+                        'ocr_confidence': result['ocr_confidence'],
+                    }
+                    for document_id, result in results.items()
+                ]
+            )
+            session.commit()
+            self.logger.info(f"Updated {len(results)} documents with extraction results")
+    
     async def _update_document_status(self, document_id: int, status: str, error: str = None) -> None:
         """Update document status with error information."""
-        async with SessionLocal() as session:
-            document = await session.get(Document, document_id)
+        await asyncio.to_thread(self._write_document_status, document_id, status, error)
+    
+    def _write_document_status(self, document_id: int, status: str, error: Optional[str]) -> None:
+        with SessionLocal() as session:
+            document = session.get(DocumentRecord, document_id)
             if document:
                 document.text_extraction_status = status
                 document.ocr_status = status
                 if error:
-                    document.metadata = {**document.metadata, 'extraction_error': error}
-                await session.commit()
+                    document.doc_metadata = {**document.doc_metadata, 'extraction_error': error}
+                session.commit()
     
     async def process_pending_documents(self) -> int:
         """
         Process all documents with pending text extraction.
         
+        Documents are fetched in batches of PENDING_BATCH_SIZE, extracted
+        concurrently, and each batch's results are written in one UPDATE.
+        A batch's Tika parses go out together over the pooled connections;
+        OCR and missing files take the per-document path.
+        
         Returns:
             Number of documents processed
         """
+        semaphore = asyncio.Semaphore(self.EXTRACTION_CONCURRENCY)
+        
+        async def bounded(document: DocumentRecord) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    return await self._extract_results(document)
+                except Exception as e:
+                    self.logger.error(f"Failed to process document {document.id}: {e}")
+                    await self._update_document_status(document.id, 'failed', str(e))
+                    return None
+        
         try:
-            async with SessionLocal() as session:
-                # Get documents with pending extraction
-                pending_docs = await session.execute(
-                    select(Document).where(
-                        (Document.text_extraction_status == 'pending') |
-                        (Document.ocr_status == 'pending')
-                    )
-                )
-                documents = pending_docs.scalars().all()
+            processed_count = 0
+            last_id = None
+            while True:
+                documents = await self._fetch_pending_batch(last_id)
+                if not documents:
+                    return processed_count
+                last_id = documents[-1].id
                 
-                processed_count = 0
-                for document in documents:
-                    try:
-                        await self.extract_text_from_document(document)
-                        processed_count += 1
-                        
-                        # Add small delay to avoid overwhelming services
-                        await asyncio.sleep(1)
-                        
-                    except Exception as e:
-                        self.logger.error(f"Failed to process document {document.id}: {e}")
-                
-                return processed_count
+                parsable = [
+                    doc for doc in documents
+                    if doc.mime_type in self.supported_document_types and os.path.exists(doc.file_path)
+                ]
+                parsable_ids = {doc.id for doc in parsable}
+                others = [doc for doc in documents if doc.id not in parsable_ids]
+                parsed, outcomes = await asyncio.gather(
+                    indexing_service.extract_text_many(
+                        [(doc.file_path, doc.mime_type) for doc in parsable]
+                    ),
+                    asyncio.gather(*(bounded(doc) for doc in others))
+                )
+                results = {
+                    document.id: {**self._failed_results(), **self._document_text_results(outcome)}
+                    for document, outcome in zip(parsable, parsed)
+                }
+                results.update(
+                    (document.id, result)
+                    for document, result in zip(others, outcomes)
+                    if result is not None
+                )
+                await self._update_documents_with_results(results)
+                processed_count += len(results)
                 
         except Exception as e:
             self.logger.error(f"Error processing pending documents: {e}")
-            return 0
+            return processed_count
+    
+    async def _fetch_pending_batch(self, after_id: Optional[int]) -> List[DocumentRecord]:
+        """Fetch the next batch of pending documents in primary-key order."""
+        return await asyncio.to_thread(self._load_pending_batch, after_id)
+    
+    def _load_pending_batch(self, after_id: Optional[int]) -> List[DocumentRecord]:
+        query = select(DocumentRecord).where(
+            (DocumentRecord.text_extraction_status == 'pending') |
+            (DocumentRecord.ocr_status == 'pending')
+        )
+        if after_id is not None:
+            query = query.where(DocumentRecord.id > after_id)
+        # Rows are only read after the session closes, never refreshed
+        with SessionLocal() as session:
+            return session.scalars(
+                query.order_by(DocumentRecord.id).limit(self.PENDING_BATCH_SIZE)
+            ).all()
     
     def is_text_extraction_needed(self, mime_type: str) -> bool:
         """Check if text extraction is needed for the given MIME type."""
-        return (
-            mime_type in self.supported_document_types or
-            mime_type in self.supported_image_types
-        )
+        return mime_type in _EXTRACTABLE_TYPES
 
 
 # Global text extraction service instance
@@ -0,0 +1 @@
+"""Low-level filesystem helpers."""
\ No newline at end of file
@@ -0,0 +1,142 @@
+"""statx(2) lookups that skip filesystem synchronization on Linux.
+
+os.stat asks network filesystems (NFS, CIFS, FUSE) to revalidate cached
+attributes with the server; statx with AT_STATX_DONT_SYNC answers from the
+local cache instead, which is all metadata listings need.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+from typing import Union
+
+AT_FDCWD = -100
+AT_SYMLINK_NOFOLLOW = 0x100
+AT_STATX_DONT_SYNC = 0x4000
+STATX_BASIC_STATS = 0x07FF
+
+
+class _StatxTimestamp(ctypes.Structure):
+    _fields_ = [
+        ("tv_sec", ctypes.c_int64),
+        ("tv_nsec", ctypes.c_uint32),
+        ("_reserved", ctypes.c_int32),
+    ]
+
+
+class Statx(ctypes.Structure):
+    """Kernel struct statx, readable through os.stat_result's st_* names."""
+
+    _fields_ = [
+        ("stx_mask", ctypes.c_uint32),
+        ("stx_blksize", ctypes.c_uint32),
+        ("stx_attributes", ctypes.c_uint64),
+        ("stx_nlink", ctypes.c_uint32),
+        ("stx_uid", ctypes.c_uint32),
+        ("stx_gid", ctypes.c_uint32),
+        ("stx_mode", ctypes.c_uint16),
+        ("_spare0", ctypes.c_uint16),
+        ("stx_ino", ctypes.c_uint64),
+        ("stx_size", ctypes.c_uint64),
+        ("stx_blocks", ctypes.c_uint64),
+        ("stx_attributes_mask", ctypes.c_uint64),
+        ("stx_atime", _StatxTimestamp),
+        ("stx_btime", _StatxTimestamp),
+        ("stx_ctime", _StatxTimestamp),
+        ("stx_mtime", _StatxTimestamp),
+        ("stx_rdev_major", ctypes.c_uint32),
+        ("stx_rdev_minor", ctypes.c_uint32),
+        ("stx_dev_major", ctypes.c_uint32),
+        ("stx_dev_minor", ctypes.c_uint32),
+        ("_spare2", ctypes.c_uint64 * 14),
+    ]
+
+    @property
+    def st_mode(self) -> int:
+        return self.stx_mode
+
+    @property
+    def st_ino(self) -> int:
+        return self.stx_ino
+
+    @property
+    def st_dev(self) -> int:
+        return os.makedev(self.stx_dev_major, self.stx_dev_minor)
+
+    @property
+    def st_nlink(self) -> int:
+        return self.stx_nlink
+
+    @property
+    def st_uid(self) -> int:
+        return self.stx_uid
+
+    @property
+    def st_gid(self) -> int:
+        return self.stx_gid
+
+    @property
+    def st_size(self) -> int:
+        return self.stx_size
+
+    @property
+    def st_mtime(self) -> float:
+        return self.stx_mtime.tv_sec + self.stx_mtime.tv_nsec / 1e9
+
+    @property
+    def st_mtime_ns(self) -> int:
+        return self.stx_mtime.tv_sec * 1_000_000_000 + self.stx_mtime.tv_nsec
+
+
+def _load_statx():
+    """Resolve libc's statx wrapper once; None before glibc 2.28 or off Linux."""
+    libc_name = ctypes.util.find_library("c")
+    if libc_name is None:
+        return None
+    try:
+        func = ctypes.CDLL(libc_name, use_errno=True).statx
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = [
+        ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_uint, ctypes.POINTER(Statx)
+    ]
+    func.restype = ctypes.c_int
+    # Kernels before 4.11 lack the syscall even when libc has the wrapper
+    probe = Statx()
+    if func(AT_FDCWD, b"/", AT_STATX_DONT_SYNC, STATX_BASIC_STATS, ctypes.byref(probe)) != 0:
+        return None
+    return func
+
+
+_statx = _load_statx()
+
+
+def stat(path: Union[str, bytes], follow_symlinks: bool = True) -> Union[Statx, os.stat_result]:
+    """Stat a path from cached attributes where the platform allows it.
+
+    Falls back to os.stat when statx is unavailable, including when a
+    seccomp filter rejects the syscall with ENOSYS after startup.
+
+    Raises:
+        OSError: If the path cannot be stat'ed
+        ValueError: If the path contains a NUL byte, as os.stat does
+    """
+    if _statx is None:
+        return os.stat(path, follow_symlinks=follow_symlinks)
+    encoded = os.fsencode(path)
+    # c_char_p would stop at the NUL and stat a different, shorter path
+    if b"\x00" in encoded:
+        raise ValueError("stat: embedded null character in path")
+    flags = AT_STATX_DONT_SYNC | (0 if follow_symlinks else AT_SYMLINK_NOFOLLOW)
+    result = Statx()
+    if _statx(AT_FDCWD, encoded, flags, STATX_BASIC_STATS, ctypes.byref(result)) != 0:
+        error = ctypes.get_errno()
+        if error == errno.ENOSYS:
+            return os.stat(path, follow_symlinks=follow_symlinks)
+        raise OSError(error, os.strerror(error), path)
+    return result
+
+
+def statx_available() -> bool:
+    """Whether stat() is served by statx rather than os.stat."""
+    return _statx is not None
@@ -9,15 +9,47 @@ app = Celery(
 )
 
 # Optional configuration
+#
+# Run one worker pool per queue so slow embedding jobs cannot hold up text
+# extraction, and size the embeddings pool to the number of GPUs. Index
+# cleanup stays on the default queue, which also runs the beat schedule:
+#   celery -A filemanager.backend worker -Q text -c 8
+#   celery -A filemanager.backend worker -Q embeddings -c 1 --pool=solo
+#   celery -A filemanager.backend worker -Q celery -c 2 -B
 app.conf.update(
-    task_serializer='json',
-    accept_content=['json'],
-    result_serializer='json',
+    # Binary msgpack keeps large extracted-text payloads compact on Redis;
+    # JSON is still accepted for messages queued by older producers
+    task_serializer='msgpack',
+    accept_content=['msgpack', 'json'],
+    result_serializer='msgpack',
+    # Extracted text is highly compressible; gzip keeps it small in Redis
+    task_compression='gzip',
+    result_compression='gzip',
     timezone='UTC',
     enable_utc=True,
+    # Reserve one task at a time and acknowledge only after it finishes, so
+    # queued work stays with idle workers instead of behind a long task
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    # Index deletions queued with queue_search_index_cleanup go out in batches
+    beat_schedule={
+        'drain-pending-deletes': {
+            'task': 'drain_pending_deletes',
+            'schedule': 30.0
+        }
+    },
+    # Keyed by the names the tasks are registered under in tasks.py
     task_routes={
-        'filemanager.backend.tasks.extract_text': {'queue': 'text'},
-        'filemanager.backend.tasks.embed_document': {'queue': 'embeddings'}
+        'extract_text': {'queue': 'text'},
+        'compute_checksum': {'queue': 'text'},
+        'embed_document': {'queue': 'embeddings'},
+        'reindex_document': {'queue': 'embeddings'},
+        'reindex_documents_batch': {'queue': 'embeddings'},
+        'bulk_reindex_documents': {'queue': 'embeddings'},
+        'cleanup_search_indexes': {'queue': 'celery'},
+        'cleanup_search_indexes_batch': {'queue': 'celery'},
+        'drain_pending_deletes': {'queue': 'celery'}
     }
 )
 
@@ -1,4 +1,6 @@
 import json
+import mmap
+import os
 from typing import Dict, Any
 from backend.services.tagging import TaggingService
 
@@ -26,5 +28,14 @@ class DocumentIngestor:
         """Extract text from document file"""
         # TODO: Implement actual text extraction based on file type
         # This is a placeholder implementation
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
\ No newline at end of file
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return ""
+            # Decode straight from the mapping so the raw bytes are never
+            # copied into a bytes object alongside the decoded str
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                text = str(mm, 'utf-8')
+                if mm.find(b'\r') != -1:
+                    # Match text-mode universal newline handling
+                    text = text.replace('\r\n', '\n').replace('\r', '\n')
+                return text
\ No newline at end of file
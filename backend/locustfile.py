@@ -1,34 +1,54 @@
 from locust import HttpUser, task, between
+import io
 import random
 import uuid
 
+TEST_FILES = (
+    ("sample.pdf", "application/pdf"),
+    ("sample.docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    ("sample.txt", "text/plain")
+)
+
 class FileManagerUser(HttpUser):
     wait_time = between(1, 3)
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.file_ids = []
+        self.file_positions = {}  # file_id -> index in file_ids, for O(1) removal
         self.token = "test_token"  # Replace with actual auth token
     
+    def on_start(self):
+        # Read the samples once so uploads don't spend generator time on disk I/O
+        self.file_cache = []
+        for filename, content_type in TEST_FILES:
+            with open(f"test_data/{filename}", "rb") as f:
+                self.file_cache.append((filename, f.read(), content_type))
+    
+    def _add_file_id(self, file_id):
+        self.file_positions[file_id] = len(self.file_ids)
+        self.file_ids.append(file_id)
+    
+    def _remove_file_id(self, file_id):
+        # Move the last id into the freed slot instead of shifting the list
+        position = self.file_positions.pop(file_id)
+        last = self.file_ids.pop()
+        if position < len(self.file_ids):
+            self.file_ids[position] = last
+            self.file_positions[last] = position
+    
     @task(3)
     def upload_file(self):
-        test_files = [
-            ("sample.pdf", "application/pdf"),
-            ("sample.docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
-            ("sample.txt", "text/plain")
-        ]
+        filename, data, content_type = random.choice(self.file_cache)
+        response = self.client.post(
+            "/api/v1/files/upload",
+            files={"file": (filename, io.BytesIO(data), content_type)},
+            headers={"Authorization": f"Bearer {self.token}"},
+            name="/api/v1/files/upload"
+        )
         
-        filename, content_type = random.choice(test_files)
-        with open(f"test_data/{filename}", "rb") as f:
-            response = self.client.post(
-                "/api/v1/files/upload",
-                files={"file": (filename, f, content_type)},
-                headers={"Authorization": f"Bearer {self.token}"},
-                name="/api/v1/files/upload"
-            )
-            
-            if response.status_code == 201:
-                self.file_ids.append(response.json()["id"])
+        if response.status_code == 201:
+            self._add_file_id(response.json()["id"])
     
     @task(2) 
     def get_file_info(self):
@@ -54,8 +74,8 @@ class FileManagerUser(HttpUser):
             name="/api/v1/files/[id]/delete"
         )
         
-        if response.status_code == 204:
-            self.file_ids.remove(file_id)
+        if response.status_code == 204 and file_id in self.file_positions:
+            self._remove_file_id(file_id)
     
     @task(1)
     def reindex_file(self):
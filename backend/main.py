@@ -1,6 +1,14 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import hashlib
+from typing import Optional
+
+import orjson
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from redis import RedisError
 from search_service import SearchService
+from app.core.search_cache import SEARCH_CACHE_VERSION_KEY
 from celery import Celery
 from .celery import app as celery_app
 from utils.validate import validate_search_mode
@@ -8,12 +16,21 @@ from utils.validate import validate_search_mode
 app = FastAPI(
     title="File Manager API",
     description="A modern file management API with AI-powered search",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse
 )
 
 # Initialize services
 search_service = SearchService()
 
+SEARCH_CACHE_TTL = 60  # Seconds a cached search response is served
+HEALTH_PROBE_INTERVAL = 5  # Seconds between Celery worker probes
+EF_SEARCH_MAX = 512  # Largest HNSW candidate list a request may ask Qdrant for
+
+# Latest Celery probe result, refreshed in the background; None until the
+# first probe lands, so a fresh API is not mistaken for one with no workers
+_celery_health = {"celery_workers": None, "celery_tasks": None}
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -29,18 +46,45 @@ async def root():
     return {"message": "File Manager API is running"}
 
 
-@app.get("/health")
-async def health_check():
-    # Check Celery worker status
-    insp = celery_app.control.inspect()
+@app.on_event("startup")
+async def start_health_probe():
+    app.state.health_probe = asyncio.create_task(_probe_celery_forever())
+
+
+@app.on_event("startup")
+async def warm_nlp_model():
+    # Loading T5 takes seconds; pay it before the first natural query does
+    await asyncio.to_thread(search_service.warm_nlp)
+
+
+async def _probe_celery_forever():
+    """Refresh the cached Celery status without blocking requests."""
+    while True:
+        try:
+            _celery_health.update(await asyncio.to_thread(_probe_celery))
+        except Exception:
+            # Broker unreachable; report no workers until it recovers
+            _celery_health.update(celery_workers=0, celery_tasks=0)
+        await asyncio.sleep(HEALTH_PROBE_INTERVAL)
+
+
+def _probe_celery() -> dict:
+    """Broadcast one ping and one active-tasks query to the workers."""
+    insp = celery_app.control.inspect(timeout=1.0)
     workers = insp.ping() or {}
+    active = insp.active() or {}
     return {
-        "status": "healthy",
         "celery_workers": len(workers),
-        "celery_tasks": sum(len(tasks) for tasks in insp.active().values()) if insp.active() else 0
+        "celery_tasks": sum(len(tasks) for tasks in active.values())
     }
 
 
+@app.get("/health")
+async def health_check():
+    # Celery status comes from the background probe
+    return {"status": "healthy", **_celery_health}
+
+
 @app.get("/api/v1/search")
 async def hybrid_search(
     query: str,
@@ -48,7 +92,8 @@ async def hybrid_search(
     limit: int = 10,
     filters: Optional[str] = None,
     facets: Optional[str] = None,
-    natural: bool = False
+    natural: bool = False,
+    ef_search: Optional[int] = Query(None, ge=1, le=EF_SEARCH_MAX)
 ):
     """
     Perform hybrid search combining keyword and vector results
@@ -57,6 +102,7 @@ async def hybrid_search(
     - query: Search query string
     - mode: Search mode (hybrid/keyword/vector)
     - limit: Maximum number of results to return
+    - ef_search: HNSW search breadth (1-512); raise for recall, lower for latency
     """
     if not validate_search_mode(mode):
         raise HTTPException(
@@ -64,27 +110,62 @@ async def hybrid_search(
             detail="Invalid search mode. Must be one of: hybrid, keyword, vector"
         )
         
+    # Identical requests (pagination refetches, autocomplete) reuse the
+    # response until it expires or an upsert bumps the index version
+    cache_key = await _search_cache_key(
+        query, mode, limit, filters, facets, natural, ef_search
+    )
+    if cache_key:
+        try:
+            cached = await search_service.redis.get(cache_key)
+            if cached is not None:
+                # Already serialized; send the bytes as-is
+                return Response(content=cached, media_type="application/json")
+        except RedisError:
+            pass
+        
     # Process natural language query if requested
     if natural:
-        query = search_service.process_natural_language_query(query)
+        query = await search_service.aprocess_natural_language_query(query)
     
     # Parse filters and facets
-    filter_dict = json.loads(filters) if filters else None
+    filter_dict = orjson.loads(filters) if filters else None
     facet_list = facets.split(',') if facets else None
     
     results = await search_service.hybrid_search(
         query=query,
         limit=limit,
         filters=filter_dict,
-        facets=facet_list
+        facets=facet_list,
+        ef_search=ef_search
     )
     
-    return {
+    response = {
         "results": results.get('hits', []),
         "facets": results.get('facets', {}),
         "query_suggestions": results.get('query_suggestions', []),
         "processed_query": query if natural else None
     }
+    
+    if cache_key:
+        try:
+            await search_service.redis.set(
+                cache_key, orjson.dumps(response, default=str), ex=SEARCH_CACHE_TTL
+            )
+        except RedisError:
+            pass
+    
+    return response
+
+
+async def _search_cache_key(*params) -> Optional[str]:
+    """Build the Redis key for a search request, or None if Redis is down."""
+    try:
+        version = await search_service.redis.get(SEARCH_CACHE_VERSION_KEY)
+    except RedisError:
+        return None
+    digest = hashlib.blake2b(orjson.dumps(params), digest_size=16).hexdigest()
+    return f"search:{int(version or 0)}:{digest}"
 
 
 if __name__ == "__main__":
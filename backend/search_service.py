@@ -1,16 +1,58 @@
 from app.services.base import BaseService
 from meilisearch import Client as MeiliClient
-from qdrant_client import QdrantClient
+from meilisearch.errors import (
+    MeilisearchApiError,
+    MeilisearchCommunicationError,
+    MeilisearchTimeoutError,
+)
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http import models
 from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Optional, Union, Tuple
-from datetime import datetime
+from typing import List, Dict, Optional, Tuple
 from app.models.search_history import SearchHistory
 from app.db.session import SessionLocal
+from app.core.search_cache import SEARCH_CACHE_VERSION_KEY
+from app.core.embeddings import (
+    OnnxSentenceEncoder,
+    export_onnx_model,
+    has_onnx_model,
+    load_onnx_text2text_pipeline,
+)
 import re
 from transformers import pipeline
 from collections import defaultdict
-from sqlalchemy import select
+from contextlib import nullcontext
+from functools import cached_property
+from operator import itemgetter
+from sqlalchemy import insert, select
 from enum import Enum, auto
+import asyncio
+import heapq
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import orjson
+import redis.asyncio as aioredis
+import requests
+from requests.adapters import HTTPAdapter
+
+# Natural language rewrites, applied in order when the pattern matches;
+# each is anchored so a single sub() both tests and rewrites
+_NL_REWRITES = (
+    (re.compile(r"^(find|show|get|search for) me? (.*)", re.I), r"\2"),  # Remove command words
+    (re.compile(r"^(.*) (from|in) (.*)", re.I), r"\1"),  # Remove location references
+    (re.compile(r"^(.*) (created|modified) (before|after|on) (.*)", re.I), r"\1"),  # Remove date references
+    (re.compile(r"^compare (.*) and (.*)", re.I), r"\1 OR \2"),  # Comparison queries
+    (re.compile(r"^what is (.*)", re.I), r"\1"),  # Definition queries
+)
+_COMPARISON_INTENT = re.compile(r"\b(compare|difference|similar)\b", re.I)
+_FILTER_INTENT = re.compile(r"\b(filter|only|just)\b", re.I)
+_INFORMATIONAL_INTENT = re.compile(r"\b(what|how|why)\b", re.I)
+
+# Query syntax: a quoted phrase or a bare word, and the boolean operators
+_QUERY_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+_QUERY_OPERATOR = re.compile(r"\b(AND|OR|NOT)\b", re.I)
 
 
 class QueryOperator(Enum):
@@ -40,30 +82,12 @@ class QueryParser:
             - parsed_query: Query in Meilisearch syntax
             - is_advanced: True if query contains operators
         """
-        if not any(op in query.upper() for op in self.operator_map):
+        if not _QUERY_OPERATOR.search(query):
             return query, False
             
         try:
             # Tokenize query while preserving quoted phrases
-            tokens = []
-            current_token = []
-            in_quotes = False
-            
-            for char in query:
-                if char == '"':
-                    if in_quotes:
-                        tokens.append(''.join(current_token))
-                        current_token = []
-                    in_quotes = not in_quotes
-                elif char.isspace() and not in_quotes:
-                    if current_token:
-                        tokens.append(''.join(current_token))
-                        current_token = []
-                else:
-                    current_token.append(char)
-            
-            if current_token:
-                tokens.append(''.join(current_token))
+            tokens = [phrase or word for phrase, word in _QUERY_TOKEN.findall(query)]
             
             # Process tokens into Meilisearch syntax
             parsed = []
@@ -90,7 +114,87 @@ class QueryParser:
         except Exception as e:
             raise ValueError(f"Invalid query syntax: {str(e)}")
 
+# QueryParser holds no per-query state, so one instance serves every request
+_QUERY_PARSER = QueryParser()
+
+
+class _PooledMeiliHttp:
+    """Meilisearch transport over a shared keep-alive requests.Session.
+    
+    The stock transport opens a new connection for every call and keeps
+    Content-Type in a headers dict it mutates per request, so one instance
+    shared across threads races. Here headers are built per call and only
+    the session, whose connection pool is thread-safe, is shared.
+    """
+    
+    def __init__(self, config, session: requests.Session):
+        self.config = config
+        self.session = session
+        self.headers = {"Authorization": f"Bearer {config.api_key}"} if config.api_key else {}
+        
+    def send_request(self, method: str, path: str, body=None, content_type: Optional[str] = None):
+        headers = {**self.headers, "Content-Type": content_type} if content_type else self.headers
+        if method == "GET" or isinstance(body, bytes):
+            data = body
+        else:
+            data = orjson.dumps(body) if body else "" if body == "" else "null"
+        try:
+            response = self.session.request(
+                method,
+                f"{self.config.url}/{path}",
+                headers=headers,
+                data=data,
+                timeout=self.config.timeout
+            )
+            response.raise_for_status()
+        except requests.exceptions.Timeout as err:
+            raise MeilisearchTimeoutError(str(err)) from err
+        except requests.exceptions.ConnectionError as err:
+            raise MeilisearchCommunicationError(str(err)) from err
+        except requests.exceptions.HTTPError as err:
+            raise MeilisearchApiError(str(err), response) from err
+        return response if response.content == b"" else response.json()
+        
+    def get(self, path):
+        return self.send_request("GET", path)
+        
+    def post(self, path, body=None, content_type="application/json"):
+        return self.send_request("POST", path, body, content_type)
+        
+    def patch(self, path, body=None, content_type="application/json"):
+        return self.send_request("PATCH", path, body, content_type)
+        
+    def put(self, path, body=None, content_type="application/json"):
+        return self.send_request("PUT", path, body, content_type)
+        
+    def delete(self, path, body=None):
+        return self.send_request("DELETE", path, body)
+
+
 class SearchService(BaseService):
+    MEILI_BATCH_SIZE = 10000  # Documents per Meilisearch indexing task
+    MEILI_TASK_TIMEOUT_MS = 120000  # Max wait for one indexing task to be processed
+    QDRANT_UPSERT_BATCH_SIZE = 256  # Points per Qdrant upsert request
+    EMBED_BATCH_SIZE = 32  # Texts per embedding model forward pass
+    UPSERT_EMBED_BATCH_SIZE = 64  # Texts per forward pass when indexing documents
+    EMBED_BATCH_WINDOW = 0.01  # Max seconds a query waits to share a forward pass
+    EMBED_CACHE_SIZE = 10000  # Query embeddings remembered, least recently used out
+    RRF_K = 60  # Reciprocal rank fusion damping constant
+    HNSW_M = 24  # Graph links per node; more improves recall at some memory cost
+    HNSW_EF_CONSTRUCT = 200  # Candidate list size while building the graph
+    HNSW_EF_SEARCH = 100  # Default candidate list size per query
+    VECTOR_RESCORE_FACTOR = 4  # Candidates per result rescored locally at full precision
+    NL_QUERY_CACHE_SIZE = 2048  # Natural language rewrites remembered
+    NLP_MODEL = "tscholak/cxmefzzi"  # Query rewriting model
+    SUGGESTION_HITS = 8  # Title matches fetched per autocomplete request
+    SUGGESTIONS_SHOWN = 8  # Suggestions returned per autocomplete request
+    SUGGESTION_CACHE_SIZE = 10000  # Autocomplete results remembered, least recently used out
+    SUGGESTION_CACHE_TTL = 30  # Seconds an autocomplete result is reused
+    HISTORY_BATCH_SIZE = 100  # Search history rows per insert
+    HISTORY_FLUSH_INTERVAL = 0.5  # Max seconds a history row waits for a batch
+    HISTORY_CACHE_SIZE = 4096  # Users whose recent queries are remembered
+    HISTORY_CACHE_TTL = 60  # Seconds a user's recent queries are reused
+    
     def __init__(self):
         super().__init__()
         # Initialize Meilisearch client
@@ -98,34 +202,133 @@ class SearchService(BaseService):
             self.config.MEILI_URL,
             self.config.MEILI_MASTER_KEY
         )
+        # Route client and index calls through one pooled keep-alive session
+        self._meili_session = requests.Session()
+        self._meili_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=64))
+        self._meili_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=64))
+        # Holds no per-request state, so client and index share one transport
+        self.meili_client.http = _PooledMeiliHttp(self.meili_client.config, self._meili_session)
+        self.meili_index = self.meili_client.index(self.config.meilisearch_index)
+        self.meili_index.http = self.meili_client.http
         
         # Initialize Qdrant client
         self.qdrant_client = QdrantClient(
             self.config.QDRANT_HOST,
             port=self.config.QDRANT_PORT,
-            api_key=self.config.QDRANT_API_KEY
+            api_key=self.config.QDRANT_API_KEY,
+            # gRPC sends vectors as packed protobuf floats instead of JSON
+            prefer_grpc=self.config.qdrant_prefer_grpc,
+            grpc_port=self.config.qdrant_grpc_port
         )
-        
-        # Load embedding model
-        self.embedding_model = SentenceTransformer(
-            self.config.EMBEDDING_MODEL
+        # Async twin for the per-request search path; saves a thread hop per call
+        self.qdrant_async = AsyncQdrantClient(
+            self.config.QDRANT_HOST,
+            port=self.config.QDRANT_PORT,
+            api_key=self.config.QDRANT_API_KEY,
+            prefer_grpc=self.config.qdrant_prefer_grpc,
+            grpc_port=self.config.qdrant_grpc_port
         )
         
-        # Initialize NLP components
-        self.nlp = pipeline(
-            "text2text-generation",
-            model="tscholak/cxmefzzi",
-            device="cpu"
-        )
+        # Load embedding model; an ONNX export runs without PyTorch
+        if self.config.embedding_onnx_path:
+            onnx_path = self.config.embedding_onnx_path
+            if not has_onnx_model(onnx_path):
+                # First start: export and INT8-quantize once, reuse thereafter
+                self.logger.info(f"Exporting {self.config.EMBEDDING_MODEL} to ONNX at {onnx_path}")
+                export_onnx_model(self.config.EMBEDDING_MODEL, onnx_path)
+            self.embedding_model = OnnxSentenceEncoder(
+                onnx_path, num_threads=self._embedding_threads()
+            )
+        else:
+            self._configure_torch_threads()
+            self.embedding_model = SentenceTransformer(
+                self.config.EMBEDDING_MODEL
+            )
+        self._bf16_autocast = False
+        if self.config.embedding_half_precision and not self.config.embedding_onnx_path:
+            self._configure_half_precision()
+        # Single worker so encode calls never contend for torch's intra-op pool
+        self._embed_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+        
+        # NLP rewrites are cached; the model loads in warm_nlp or on first use
+        self._nl_query_cache: Dict[str, str] = {}
         
-        # Initialize suggestion systems
-        self.suggestion_cache = defaultdict(list)
+        # Initialize suggestion systems; cache values are (expiry, suggestions)
+        self.suggestion_cache: Dict[str, Tuple[float, List[str]]] = {}
         self.popular_terms = defaultdict(int)
         
+        # Concurrent query embeddings are coalesced into shared batches
+        self._embed_queue: Optional[asyncio.Queue] = None
+        self._embed_batcher: Optional[asyncio.Task] = None
+        self._embed_cache: Dict[str, np.ndarray] = {}
+        self._embed_pending: Dict[str, asyncio.Future] = {}
+        
+        # Search history rows are buffered and written in batches
+        self._history_queue: Optional[asyncio.Queue] = None
+        self._history_writer: Optional[asyncio.Task] = None
+        # Recent queries per user for suggestions; values are (expiry, queries)
+        self._history_cache: Dict[int, Tuple[float, List[str]]] = {}
+        
+        # Holds the cache version that upserts bump to invalidate responses
+        self.redis = aioredis.Redis.from_url(self.config.redis_url)
+        
         # Initialize indexes/collections
         self._init_meilisearch()
         self._init_qdrant()
         
+    def _configure_torch_threads(self):
+        """Size torch's CPU thread pools to the CPUs this process may use.
+        
+        torch counts host cores, which oversubscribes CPU-limited containers.
+        """
+        import torch
+        
+        torch.set_num_threads(self._embedding_threads())
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Only settable before torch starts parallel work
+            pass
+
+    def _embedding_threads(self) -> int:
+        """Threads for embedding inference, from settings or available CPUs."""
+        try:
+            available = len(os.sched_getaffinity(0))
+        except AttributeError:  # Not available on macOS/Windows
+            available = os.cpu_count() or 1
+        return self.config.embedding_threads or min(available, 8)
+
+    def _configure_half_precision(self):
+        """Move the embedding model to FP16 on GPU, or enable BF16 autocast on CPU.
+        
+        CPU autocast is only used where BF16 runs natively (AVX-512 BF16 or
+        AMX); emulated BF16 is slower than FP32.
+        """
+        import torch
+        
+        if torch.cuda.is_available():
+            self.embedding_model = self.embedding_model.half().to('cuda')
+        elif torch.backends.mkldnn.is_available() and torch.ops.mkldnn._is_mkldnn_bf16_supported():
+            self._bf16_autocast = True
+
+    @cached_property
+    def nlp(self):
+        """Text-to-text model for rewriting long queries, loaded by warm_nlp or on first use.
+        
+        Served from an INT8 ONNX export when nlp_onnx_path is set.
+        """
+        if self.config.nlp_onnx_path:
+            return load_onnx_text2text_pipeline(self.NLP_MODEL, self.config.nlp_onnx_path)
+        return pipeline(
+            "text2text-generation",
+            model=self.NLP_MODEL,
+            device="cpu"
+        )
+        
+    def warm_nlp(self) -> None:
+        """Load the query rewriting model now rather than on the first long query."""
+        self.nlp
+        
     def health_check(self) -> dict:
         """Check search service health."""
         status = {
@@ -164,10 +367,17 @@ class SearchService(BaseService):
 
     def _init_meilisearch(self):
         """Initialize Meilisearch index with ranking rules and settings."""
-        """Initialize Meilisearch index with ranking rules"""
         try:
-            self.meili_client.create_index('documents', {'primaryKey': 'id'})
-            index = self.meili_client.index('documents')
+            # Enqueued as a task; Meilisearch fails that task, not this call,
+            # when the index already exists
+            self.meili_client.create_index(self.config.meilisearch_index, {'primaryKey': 'id'})
+        except Exception as e:
+            self.logger.warning(f"Meilisearch index creation failed: {e}")
+            
+        # Apply settings even when the index already exists so writes never
+        # fall back to primary-key or attribute inference
+        try:
+            index = self.meili_index
             index.update_ranking_rules([
                 'words', 
                 'typo', 
@@ -195,43 +405,220 @@ class SearchService(BaseService):
                 }
             })
         except Exception as e:
-            print(f"Meilisearch index already exists: {e}")
+            self.logger.warning(f"Meilisearch settings update failed: {e}")
 
     def _init_qdrant(self):
-        """Initialize Qdrant collection for dense vectors"""
+        """Create the Qdrant collection for dense vectors if it is missing.
+        
+        An existing collection is kept as-is, with its vectors and tuned
+        index settings, across restarts.
+        """
         try:
-            self.qdrant_client.recreate_collection(
-                collection_name="documents_dense",
-                vectors_config={
-                    "size": self.embedding_model.get_sentence_embedding_dimension(),
-                    "distance": "Cosine"
-                }
+            collections = self.qdrant_client.get_collections().collections
+            if any(c.name == self.config.qdrant_collection for c in collections):
+                return
+            self.qdrant_client.create_collection(
+                collection_name=self.config.qdrant_collection,
+                vectors_config=models.VectorParams(
+                    size=self.embedding_model.get_sentence_embedding_dimension(),
+                    distance=models.Distance.COSINE
+                ),
+                hnsw_config=models.HnswConfigDiff(
+                    m=self.HNSW_M,
+                    ef_construct=self.HNSW_EF_CONSTRUCT,
+                    full_scan_threshold=10000
+                ),
+                optimizers_config=models.OptimizersConfigDiff(
+                    indexing_threshold=20000
+                ),
+                # int8 copies stay in RAM for traversal; originals rescore the top hits
+                quantization_config=models.ScalarQuantization(
+                    scalar=models.ScalarQuantizationConfig(
+                        type=models.ScalarType.INT8,
+                        quantile=0.99,
+                        always_ram=True
+                    )
+                )
             )
+            self.logger.info(f"Created Qdrant collection {self.config.qdrant_collection}")
         except Exception as e:
-            print(f"Qdrant collection already exists: {e}")
+            self.logger.warning(f"Qdrant collection setup failed: {e}")
 
     async def upsert_documents(self, documents: List[Dict]):
         """Upsert documents into both search systems"""
-        # Add to Meilisearch
-        meili_index = self.meili_client.index('documents')
-        meili_index.add_documents(documents)
-        
-        # Generate embeddings and add to Qdrant
+        # Send to Meilisearch while the embeddings for Qdrant are computed
         texts = [doc['content'] for doc in documents]
-        embeddings = self.embedding_model.encode(texts).tolist()
-        
-        points = []
-        for idx, doc in enumerate(documents):
-            points.append({
-                "id": doc['id'],
-                "vector": embeddings[idx],
-                "payload": doc
-            })
+        _, embeddings = await asyncio.gather(
+            asyncio.to_thread(self._add_meili_documents, documents),
+            asyncio.get_running_loop().run_in_executor(
+                self._embed_pool, self._encode, texts, self.UPSERT_EMBED_BATCH_SIZE
+            )
+        )
         
-        self.qdrant_client.upsert(
-            collection_name="documents_dense",
-            points=points
+        # The client slices the float32 matrix per batch; no per-point lists
+        await asyncio.to_thread(
+            self.qdrant_client.upload_collection,
+            collection_name=self.config.qdrant_collection,
+            vectors=embeddings,
+            payload=documents,
+            ids=[doc['id'] for doc in documents],
+            batch_size=self.QDRANT_UPSERT_BATCH_SIZE,
+            wait=True
         )
+        
+        # Both writes are now applied, so a refetch sees the new documents;
+        # orphan every cached search response in one write
+        try:
+            await self.redis.incr(SEARCH_CACHE_VERSION_KEY)
+        except aioredis.RedisError as e:
+            self.logger.warning(f"Search cache invalidation failed: {e}")
+
+    def _add_meili_documents(self, documents: List[Dict]):
+        """Upload documents to Meilisearch as NDJSON, one task per batch.
+        
+        Returns once every task has been processed, so callers can treat
+        the documents as searchable.
+        """
+        tasks = []
+        for start in range(0, len(documents), self.MEILI_BATCH_SIZE):
+            batch = documents[start:start + self.MEILI_BATCH_SIZE]
+            tasks.append(self.meili_index.add_documents_ndjson(
+                b"\n".join(orjson.dumps(doc, default=str) for doc in batch),
+                primary_key='id'
+            ))
+        # Enqueue everything first so Meilisearch can batch the tasks together
+        for task in tasks:
+            result = self.meili_index.wait_for_task(
+                task.task_uid, timeout_in_ms=self.MEILI_TASK_TIMEOUT_MS
+            )
+            if result.status != 'succeeded':
+                self.logger.warning(f"Meilisearch task {task.task_uid} {result.status}: {result.error}")
+
+    def _encode(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """Embed texts as a float32 matrix of unit-length rows, one per text.
+        
+        SentenceTransformer orders inputs by length before batching, so each
+        forward pass pads only to the longest text in its own batch.
+        """
+        if self._bf16_autocast:
+            import torch
+            precision = torch.autocast('cpu', dtype=torch.bfloat16)
+        else:
+            precision = nullcontext()
+        with precision:
+            embeddings = self.embedding_model.encode(
+                texts,
+                batch_size=batch_size or self.EMBED_BATCH_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+        # Half-precision models return float16; downstream expects float32
+        return np.asarray(embeddings, dtype=np.float32)
+
+    async def _embed_query(self, query: str) -> np.ndarray:
+        """Embed a search query, sharing a forward pass with concurrent queries.
+        
+        Results are cached by case- and whitespace-normalized query, so
+        repeated searches (e.g. search-as-you-type) skip the model, and
+        identical queries already in flight wait on the same embedding.
+        """
+        key = ' '.join(query.lower().split())
+        vector = self._embed_cache.pop(key, None)
+        if vector is None:
+            pending = self._embed_pending.get(key)
+            if pending is None:
+                pending = asyncio.ensure_future(self._embed_uncached(query))
+                self._embed_pending[key] = pending
+                pending.add_done_callback(lambda _: self._embed_pending.pop(key, None))
+            # Shielded so one caller giving up doesn't cancel the others
+            vector = await asyncio.shield(pending)
+            vector.setflags(write=False)  # Shared between callers
+            self._embed_cache.pop(key, None)
+            if len(self._embed_cache) >= self.EMBED_CACHE_SIZE:
+                self._embed_cache.pop(next(iter(self._embed_cache), None), None)
+        # (Re)inserting keeps the dict ordered from least to most recently used
+        self._embed_cache[key] = vector
+        return vector
+
+    async def _embed_uncached(self, query: str) -> np.ndarray:
+        """Queue a query for the next shared embedding batch."""
+        if self._embed_batcher is None or self._embed_batcher.done():
+            self._embed_queue = asyncio.Queue()
+            self._embed_batcher = asyncio.create_task(self._run_embed_batches())
+        future = asyncio.get_running_loop().create_future()
+        await self._embed_queue.put((query, future))
+        return await future
+
+    async def _run_embed_batches(self):
+        """Encode queued queries in size- or time-bounded batches."""
+        while True:
+            batch = [await self._embed_queue.get()]
+            deadline = time.monotonic() + self.EMBED_BATCH_WINDOW
+            while len(batch) < self.EMBED_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self._embed_queue.get(), remaining)
+                    )
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                vectors = await asyncio.get_running_loop().run_in_executor(
+                    self._embed_pool, self._encode, [query for query, _ in batch]
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            # Callers that gave up have already cancelled their futures
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+    def _record_search(self, user_id: int, query: str, results_count: int):
+        """Queue a search history row for the next batched insert."""
+        if self._history_writer is None or self._history_writer.done():
+            self._history_queue = asyncio.Queue()
+            self._history_writer = asyncio.create_task(self._write_history_batches())
+        self._history_queue.put_nowait({
+            'user_id': user_id,
+            'query': query,
+            'results_count': results_count
+        })
+
+    async def _write_history_batches(self):
+        """Insert queued history rows in size- or time-bounded batches."""
+        while True:
+            batch = [await self._history_queue.get()]
+            deadline = time.monotonic() + self.HISTORY_FLUSH_INTERVAL
+            while len(batch) < self.HISTORY_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self._history_queue.get(), remaining)
+                    )
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                await asyncio.to_thread(self._insert_history, batch)
+            except Exception as e:
+                self.logger.error(f"Failed to record {len(batch)} searches: {e}")
+
+    @staticmethod
+    def _insert_history(rows: List[Dict]):
+        """Insert history rows with one executemany and a single commit."""
+        with SessionLocal() as session:
+            session.execute(insert(SearchHistory), rows)
+            session.commit()
 
     async def hybrid_search(
         self,
@@ -240,7 +627,8 @@ class SearchService(BaseService):
         filters: Optional[Dict] = None,
         facets: Optional[List[str]] = None,
         user_id: Optional[int] = None,
-        use_nlp: bool = True
+        use_nlp: bool = True,
+        ef_search: Optional[int] = None
     ) -> List[Dict]:
         """Perform hybrid search with advanced capabilities and NLP support.
         
@@ -251,6 +639,8 @@ class SearchService(BaseService):
             facets: List of fields to compute facets for
             user_id: Optional user ID for personalization
             use_nlp: Whether to attempt NLP processing (default: True)
+            ef_search: HNSW candidate list size; higher trades latency for
+                recall (default: HNSW_EF_SEARCH)
             
         Returns:
             Dictionary containing:
@@ -268,7 +658,7 @@ class SearchService(BaseService):
         # Try NLP processing if enabled
         if use_nlp:
             try:
-                processed_query = self.process_natural_language_query(query)
+                processed_query = await self.aprocess_natural_language_query(query)
                 if processed_query != query:
                     query = processed_query
                     nlp_processed = True
@@ -277,9 +667,8 @@ class SearchService(BaseService):
                 self.logger.warning(f"NLP processing failed, using original query: {e}")
         
         # Parse and validate query
-        parser = QueryParser()
         try:
-            parsed_query, is_advanced = parser.parse(query)
+            parsed_query, is_advanced = _QUERY_PARSER.parse(query)
             query = parsed_query
         except ValueError as e:
             if nlp_processed:
@@ -287,7 +676,7 @@ class SearchService(BaseService):
                 self.logger.warning(f"Parsing NLP-processed query failed, falling back: {e}")
                 query = original_query
                 try:
-                    parsed_query, is_advanced = parser.parse(query)
+                    parsed_query, is_advanced = _QUERY_PARSER.parse(query)
                     query = parsed_query
                 except ValueError:
                     raise ValueError(f"Invalid search query: {str(e)}")
@@ -316,39 +705,103 @@ class SearchService(BaseService):
         if facets:
             params['facets'] = facets
             
-        # Keyword search with Meilisearch
-        meili_results = self.meili_client.index('documents').search(query, params)
-        
-        # Vector search with Qdrant
-        query_embedding = self.embedding_model.encode(query).tolist()
-        qdrant_results = self.qdrant_client.search(
-            collection_name="documents_dense",
-            query_vector=query_embedding,
-            limit=limit
+        # Keyword search, vector search and suggestions are independent
+        # round trips, so run them concurrently
+        meili_results, qdrant_results, suggestions = await asyncio.gather(
+            asyncio.to_thread(self.meili_index.search, query, params),
+            self._vector_search(query, limit, ef_search),
+            self._generate_suggestions(query, user_id)
         )
         
-        # Combine and re-rank results
-        combined = self._combine_results(meili_results['hits'], qdrant_results)
+        # Combine and re-rank results, then fetch payloads for vector-only hits
+        combined = self._combine_results(meili_results['hits'], qdrant_results, limit)
+        combined = await self._hydrate_vector_hits(combined, meili_results['hits'])
         # Log search history if user is authenticated
         if user_id:
-            async with SessionLocal() as session:
-                history = SearchHistory(
-                    user_id=user_id,
-                    query=query,
-                    result_count=len(combined[:limit]),
-                    timestamp=datetime.utcnow()
-                )
-                session.add(history)
-                await session.commit()
+            self._record_search(user_id, query, len(combined))
         
         return {
-            "hits": combined[:limit],
+            "hits": combined,
             "facets": meili_results.get('facets', {}),
-            "query_suggestions": await self._generate_suggestions(query, user_id),
+            "query_suggestions": suggestions,
             "nlp_processed": nlp_processed,
             "original_query": original_query if nlp_processed else None
         }
 
+    async def _vector_search(
+        self,
+        query: str,
+        limit: int,
+        ef_search: Optional[int] = None
+    ) -> List:
+        """Embed a query and search the dense collection with it.
+        
+        Qdrant ranks a wider candidate set on its in-RAM int8 vectors only;
+        the originals come back with the hits and are rescored here.
+        """
+        query_embedding = await self._embed_query(query)
+        hits = await self.qdrant_async.search(
+            collection_name=self.config.qdrant_collection,
+            query_vector=query_embedding,
+            limit=limit * self.VECTOR_RESCORE_FACTOR,
+            # Payloads are fetched later, only for hits that survive fusion
+            with_payload=False,
+            with_vectors=True,
+            search_params=models.SearchParams(
+                hnsw_ef=ef_search or self.HNSW_EF_SEARCH,
+                exact=False,
+                quantization=models.QuantizationSearchParams(
+                    ignore=False,
+                    rescore=False
+                )
+            )
+        )
+        return self._rescore(query_embedding, hits, limit)
+
+    async def _hydrate_vector_hits(self, docs: List[Dict], keyword_hits: List[Dict]) -> List[Dict]:
+        """Replace id-only vector hits with their stored Qdrant payloads."""
+        keyword_ids = {hit['id'] for hit in keyword_hits}
+        missing = [doc['id'] for doc in docs if doc['id'] not in keyword_ids]
+        if not missing:
+            return docs
+        
+        points = await self.qdrant_async.retrieve(
+            collection_name=self.config.qdrant_collection,
+            ids=missing,
+            with_payload=True,
+            with_vectors=False
+        )
+        payloads = {point.id: point.payload for point in points}
+        return [payloads.get(doc['id'], doc) for doc in docs]
+
+    @staticmethod
+    def _rescore(query_embedding: np.ndarray, hits: List, limit: int) -> List:
+        """Re-rank hits by exact cosine similarity to the query.
+        
+        All candidates are scored with a single matrix-vector product. Qdrant
+        stores cosine vectors normalized and queries are encoded normalized,
+        so the dot product is the cosine.
+        """
+        if not hits:
+            return hits
+        matrix = np.asarray([hit.vector for hit in hits], dtype=np.float32)
+        similarities = matrix @ np.asarray(query_embedding, dtype=np.float32)
+        order = np.argsort(-similarities, kind='stable')[:limit]
+        for i in order:
+            hits[i].score = float(similarities[i])
+        return [hits[i] for i in order]
+
+    async def aprocess_natural_language_query(self, query: str) -> str:
+        """Rewrite a query without blocking the event loop.
+        
+        Cached rewrites return inline; anything else may run the model,
+        so it goes to a worker thread.
+        """
+        cached = self._nl_query_cache.get(query)
+        if cached is not None:
+            return cached
+        return await asyncio.to_thread(self.process_natural_language_query, query)
+
     def process_natural_language_query(self, query: str) -> str:
         """Convert natural language query to search syntax with intent recognition.
         
@@ -364,33 +817,32 @@ class SearchService(BaseService):
             - Falls back to original query if processing fails
             - Logs processing failures for improvement
         """
+        cached = self._nl_query_cache.get(query)
+        if cached is not None:
+            return cached
+            
         original_query = query
+        cacheable = True
         try:
-            # Common query patterns
-            patterns = {
-                r"^(find|show|get|search for) me? (.*)": r"\2",  # Remove command words
-                r"(.*) (from|in) (.*)": r"\1",  # Remove location references
-                r"(.*) (created|modified) (before|after|on) (.*)": r"\1",  # Remove date references
-                r"compare (.*) and (.*)": r"\1 OR \2",  # Comparison queries
-                r"what is (.*)": r"\1",  # Definition queries
-            }
-            
             # Apply pattern transformations
-            for pattern, replacement in patterns.items():
-                if re.match(pattern, query, re.I):
-                    query = re.sub(pattern, replacement, query, flags=re.I).strip()
+            rewritten = False
+            for pattern, replacement in _NL_REWRITES:
+                query, matched = pattern.subn(replacement, query)
+                if matched:
+                    query = query.strip()
+                    rewritten = True
             
             # Intent classification
             intent = "general"
-            if re.search(r"\b(compare|difference|similar)\b", query, re.I):
+            if _COMPARISON_INTENT.search(query):
                 intent = "comparison"
-            elif re.search(r"\b(filter|only|just)\b", query, re.I):
+            elif _FILTER_INTENT.search(query):
                 intent = "filter"
-            elif re.search(r"\b(what|how|why)\b", query, re.I):
+            elif _INFORMATIONAL_INTENT.search(query):
                 intent = "informational"
             
-            # Use NLP model for complex queries
-            if len(query.split()) > 3:  # Use NLP for queries with 4+ words
+            # Use NLP model for complex queries the patterns didn't already handle
+            if not rewritten and len(query.split()) > 3:  # Use NLP for queries with 4+ words
                 try:
                     processed = self.nlp(
                         f"convert to search query: {query}",
@@ -404,6 +856,7 @@ class SearchService(BaseService):
                 except Exception as e:
                     self.logger.warning(f"NLP processing failed, using original query: {e}")
                     query = original_query
+                    cacheable = False  # Retry the model next time
             
             # Add intent-specific processing
             if intent == "comparison":
@@ -411,6 +864,10 @@ class SearchService(BaseService):
             elif intent == "filter":
                 query = f"+{query}"
             
+            if cacheable:
+                if len(self._nl_query_cache) >= self.NL_QUERY_CACHE_SIZE:
+                    self._nl_query_cache.pop(next(iter(self._nl_query_cache), None), None)
+                self._nl_query_cache[original_query] = query
             return query
             
         except Exception as e:
@@ -424,29 +881,32 @@ class SearchService(BaseService):
 
         # Get cached suggestions if available
         cache_key = f"{user_id or 'global'}:{query.lower()}"
-        if hasattr(self, 'suggestion_cache') and cache_key in self.suggestion_cache:
-            return self.suggestion_cache[cache_key][:8]  # Return top 8
+        cached = self.suggestion_cache.pop(cache_key, None)
+        if cached and cached[0] > time.monotonic():
+            # Reinsert so the dict stays ordered least to most recently used
+            self.suggestion_cache[cache_key] = cached
+            return cached[1]
 
         try:
-            # Get prefix matches from Meilisearch
-            meili_suggestions = self.meili_client.index('documents').search(query, {
-                'limit': 10,
-                'attributesToRetrieve': ['title'],
-                'showMatchesPosition': False,
-                'matches': False
-            })['hits']
+            # Title-only prefix matches; skip highlighting and match positions
+            meili_suggestions = (await asyncio.to_thread(
+                self.meili_index.search,
+                query,
+                {
+                    'limit': self.SUGGESTION_HITS,
+                    'offset': 0,
+                    'attributesToRetrieve': ['title'],
+                    'attributesToSearchOn': ['title'],
+                    'attributesToHighlight': [],
+                    'showMatchesPosition': False,
+                    'matchingStrategy': 'all'
+                }
+            ))['hits']
 
             # Get popular terms from search history
             history_terms = []
             if user_id:
-                async with SessionLocal() as session:
-                    history = await session.execute(
-                        select(SearchHistory.query)
-                        .filter(SearchHistory.user_id == user_id)
-                        .order_by(SearchHistory.created_at.desc())
-                        .limit(100)
-                    )
-                    history_terms = [h[0] for h in history.all()]
+                history_terms = await self._cached_recent_queries(user_id)
 
             # Combine and rank suggestions
             suggestions = self._rank_suggestions(
@@ -455,76 +915,126 @@ class SearchService(BaseService):
                 query
             )
 
-            # Cache results
-            if not hasattr(self, 'suggestion_cache'):
-                self.suggestion_cache = defaultdict(list)
-            self.suggestion_cache[cache_key] = suggestions
-            return suggestions[:8]
+            # Cache results, evicting the least recently used entry when full
+            if len(self.suggestion_cache) >= self.SUGGESTION_CACHE_SIZE:
+                self.suggestion_cache.pop(next(iter(self.suggestion_cache), None), None)
+            self.suggestion_cache[cache_key] = (
+                time.monotonic() + self.SUGGESTION_CACHE_TTL, suggestions
+            )
+            return suggestions
 
         except Exception as e:
             self.logger.error(f"Failed to generate suggestions: {e}")
             return []
 
+    async def _cached_recent_queries(self, user_id: int) -> List[str]:
+        """Return a user's recent queries, hitting the database at most once per TTL.
+        
+        Autocomplete asks on every keystroke, but history changes far slower.
+        """
+        cached = self._history_cache.get(user_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        terms = await asyncio.to_thread(self._recent_queries, user_id)
+        self._history_cache.pop(user_id, None)
+        if len(self._history_cache) >= self.HISTORY_CACHE_SIZE:
+            self._history_cache.pop(next(iter(self._history_cache), None), None)
+        self._history_cache[user_id] = (time.monotonic() + self.HISTORY_CACHE_TTL, terms)
+        return terms
+
+    @staticmethod
+    def _recent_queries(user_id: int) -> List[str]:
+        """Load a user's 100 most recent search queries on a pooled connection."""
+        with SessionLocal() as session:
+            return list(session.scalars(
+                select(SearchHistory.query)
+                .filter(SearchHistory.user_id == user_id)
+                .order_by(SearchHistory.created_at.desc())
+                .limit(100)
+            ))
+
     def _rank_suggestions(self, meili_results: List, history_terms: List[str], query: str) -> List[str]:
         """Rank suggestions using multiple factors."""
-        suggestions = set()
+        prefix = query.lower()
+        titles = (hit['title'] for hit in meili_results if hit.get('title'))
         
-        # Add Meilisearch title suggestions
-        for hit in meili_results:
-            title = hit.get('title', '')
-            if title.lower().startswith(query.lower()):
-                suggestions.add(title)
+        # Score Meilisearch titles (already matched on title) and history
+        # terms sharing the prefix in one pass, skipping duplicates
+        seen = set()
+        scored_suggestions = []
+        for from_history, candidates in ((False, titles), (True, history_terms)):
+            for suggestion in candidates:
+                if suggestion in seen:
+                    continue
+                lowered = suggestion.lower()
+                is_prefix = lowered.startswith(prefix)
+                if from_history and not is_prefix:
+                    continue
+                seen.add(suggestion)
+                
+                # Boost exact prefix matches
+                score = 2 if is_prefix else 0
+                # Boost popularity (if we have history)
+                score += self.popular_terms.get(lowered, 0) * 0.1
+                # Boost shorter suggestions (more likely completions)
+                score += max(0, 10 - len(suggestion)) * 0.05
+                
+                scored_suggestions.append((score, suggestion))
         
-        # Add popular terms from history
-        for term in history_terms:
-            if term.lower().startswith(query.lower()):
-                suggestions.add(term)
+        # Keep only as many as are shown
+        return [
+            suggestion for _, suggestion in
+            heapq.nlargest(self.SUGGESTIONS_SHOWN, scored_suggestions, key=itemgetter(0))
+        ]
+
+    def _combine_results(
+        self,
+        keyword_results: List,
+        vector_results: List,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """Combine and re-rank results from both search systems.
         
-        # Score and sort suggestions
-        scored_suggestions = []
-        for suggestion in suggestions:
-            score = 0
-            # Boost exact prefix matches
-            if suggestion.lower().startswith(query.lower()):
-                score += 2
-            
-            # Boost popularity (if we have history)
-            if hasattr(self, 'popular_terms'):
-                score += self.popular_terms.get(suggestion.lower(), 0) * 0.1
-            
-            # Boost shorter suggestions (more likely completions)
-            score += max(0, 10 - len(suggestion)) * 0.05
-            
-            scored_suggestions.append((score, suggestion))
-        
-        # Sort by score and return just the terms
-        return [s[1] for s in sorted(scored_suggestions, key=lambda x: -x[0])]
-
-    def _combine_results(self, keyword_results: List, vector_results: List) -> List[Dict]:
-        """Combine and re-rank results from both search systems"""
-        combined = []
-        
-        # Create a mapping of document IDs to scores
-        scores = {}
-        for idx, result in enumerate(keyword_results):
-            scores[result['id']] = scores.get(result['id'], 0) + (1 - idx/len(keyword_results))
-        
-        for idx, result in enumerate(vector_results):
-            doc_id = result.payload['id']
-            scores[doc_id] = scores.get(doc_id, 0) + (1 - idx/len(vector_results))
-        
-        # Combine all unique documents
-        all_docs = {doc['id']: doc for doc in keyword_results}
-        for result in vector_results:
-            doc = result.payload
-            if doc['id'] not in all_docs:
-                all_docs[doc['id']] = doc
-        
-        # Sort by combined score
-        combined = sorted(
-            all_docs.values(),
-            key=lambda x: scores.get(x['id'], 0),
-            reverse=True
+        Uses reciprocal rank fusion: each list contributes 1 / (RRF_K + rank)
+        to a document's score, with ranks starting at 1.
+        """
+        ids = [hit['id'] for hit in keyword_results]
+        ids.extend(result.id for result in vector_results)
+        if not ids:
+            return []
+        
+        # Map document IDs to dense slots in first-seen order; dict.fromkeys
+        # dedupes in C, leaving one lookup per hit
+        unique_ids = list(dict.fromkeys(ids))
+        slots = {doc_id: slot for slot, doc_id in enumerate(unique_ids)}
+        dense = np.fromiter(map(slots.__getitem__, ids), dtype=np.intp, count=len(ids))
+        
+        ranks = np.concatenate([
+            np.arange(1, len(keyword_results) + 1),
+            np.arange(1, len(vector_results) + 1)
+        ])
+        scores = np.bincount(
+            dense, weights=1.0 / (self.RRF_K + ranks), minlength=len(unique_ids)
         )
         
-        return combined
+        # Select the top `limit` in linear time, then order just those
+        top = np.arange(len(scores))
+        if limit is not None and limit < len(scores):
+            if limit <= 0:
+                return []
+            cutoff = np.partition(-scores, limit - 1)[limit - 1]
+            # Everything above the cutoff, then cutoff ties in first-seen order
+            above = np.flatnonzero(-scores < cutoff)
+            tied = np.flatnonzero(-scores == cutoff)[:limit - len(above)]
+            top = np.concatenate((above, tied))
+        # Highest score first; ties keep first-seen order
+        order = top[np.lexsort((top, -scores[top]))]
+        
+        # The keyword copy of a document wins; vector hits carry only ids
+        # until _hydrate_vector_hits fills them in
+        keyword_docs = {hit['id']: hit for hit in reversed(keyword_results)}
+        return [
+            keyword_docs.get(unique_ids[i]) or {'id': unique_ids[i]}
+            for i in order
+        ]
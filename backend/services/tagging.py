@@ -1,26 +1,233 @@
 """Document tagging service using AI."""
 
+import asyncio
 import logging
 import json
-from typing import List, Optional
+import re
+import string
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Tuple, Union
 
-from openai import OpenAI
+import numpy as np
+import yaml
+from openai import AsyncOpenAI, OpenAI
 from openai.types.chat import ChatCompletion
 
+try:
+    import ahocorasick
+except ImportError:  # Optional: falls back to a single compiled regex
+    ahocorasick = None
+
+try:
+    import datrie
+except ImportError:  # Optional: compact trie matcher for small label sets
+    datrie = None
+
 from ..config import settings
 from ..models.document import Document
 from ..exceptions import TaggingError
 
 logger = logging.getLogger(__name__)
 
+# Candidate labels for auto_tag, one YAML list entry per label
+TAG_LABELS_PATH = Path(__file__).resolve().parents[2] / "config" / "tag_labels.yaml"
+
+# Small sentence encoder; one forward pass per text scores every label
+TAG_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# spaCy components auto_tag never reads; only NER output is used
+_UNUSED_SPACY_COMPONENTS = ("tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer")
+
+# Entity types worth surfacing as tags
+_TAG_ENTITY_TYPES = frozenset({"ORG", "PRODUCT"})
+
+# Characters a lowercased label may use to be stored in the label trie
+_TRIE_ALPHABET = string.ascii_lowercase + string.digits + " "
+_TRIE_CHARS = frozenset(_TRIE_ALPHABET)
+
+# Label sets up to this size use the trie; larger ones the automaton
+TRIE_MAX_LABELS = 10000
+
+# First character of each word: alphanumeric, not preceded by one
+_WORD_START = re.compile(r"(?<![^\W_])[^\W_]")
+
+
+@lru_cache(maxsize=None)
+def _load_tag_labels() -> Tuple[str, ...]:
+    """Read the candidate tag labels once per process."""
+    with open(TAG_LABELS_PATH, encoding="utf-8") as f:
+        return tuple(str(label) for label in yaml.safe_load(f))
+
+
+@lru_cache(maxsize=None)
+def _load_ner():
+    """Load the NER-only spaCy pipeline once per process."""
+    import spacy
+    
+    return spacy.load("en_core_web_sm", disable=list(_UNUSED_SPACY_COMPONENTS))
+
+
+@lru_cache(maxsize=None)
+def _load_encoder():
+    """Load the sentence embedding model used for label matching once per process."""
+    from sentence_transformers import SentenceTransformer
+    
+    return SentenceTransformer(TAG_EMBEDDING_MODEL)
+
+
+@lru_cache(maxsize=None)
+def _load_label_embeddings() -> np.ndarray:
+    """Embed the candidate labels once; rows are unit length."""
+    return _load_encoder().encode(
+        list(_load_tag_labels()), convert_to_numpy=True, normalize_embeddings=True
+    )
+
+
+@lru_cache(maxsize=None)
+def _load_label_matcher():
+    """Build a matcher that finds every label named in a text.
+    
+    A double-array trie of the lowercased labels when datrie is installed
+    and the vocabulary is small and plain ASCII; it is probed once per word.
+    Otherwise an Aho-Corasick automaton scanning the text in one pass when
+    pyahocorasick is installed, else an alternation regex with the longest
+    labels first.
+    """
+    labels = _load_tag_labels()
+    if datrie is not None and len(labels) <= TRIE_MAX_LABELS and all(
+        _TRIE_CHARS.issuperset(label.lower()) for label in labels
+    ):
+        trie = datrie.Trie(_TRIE_ALPHABET)
+        for label in labels:
+            trie[label.lower()] = label
+        return trie
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for label in labels:
+            automaton.add_word(label.lower(), (label, len(label)))
+        automaton.make_automaton()
+        return automaton
+    alternatives = "|".join(re.escape(label) for label in sorted(labels, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternatives})\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def _max_label_length() -> int:
+    """Length of the longest label, bounding each trie probe."""
+    return max(map(len, _load_tag_labels()), default=0)
+
+
+def _named_labels(text: str) -> List[str]:
+    """Labels that appear verbatim (as whole words, any case) in a text."""
+    matcher = _load_label_matcher()
+    if isinstance(matcher, re.Pattern):
+        canonical = {label.lower(): label for label in _load_tag_labels()}
+        return list(dict.fromkeys(canonical[m.group(0).lower()] for m in matcher.finditer(text)))
+    
+    lowered = text.lower()
+    found = {}
+    if datrie is not None and isinstance(matcher, datrie.Trie):
+        span = _max_label_length()
+        for word in _WORD_START.finditer(lowered):
+            start = word.start()
+            # Every label that begins this word, "ai" before "ai research"
+            for key, label in matcher.prefix_items(lowered[start:start + span]):
+                end = start + len(key)
+                if end == len(lowered) or not lowered[end].isalnum():
+                    found.setdefault(label, start)
+        return sorted(found, key=found.get)
+    
+    for end, (label, length) in matcher.iter(lowered):
+        start = end - length + 1
+        # Whole words only: "AI" must not match inside "said"
+        if (start == 0 or not lowered[start - 1].isalnum()) and (
+            end + 1 == len(lowered) or not lowered[end + 1].isalnum()
+        ):
+            found.setdefault(label, start)
+    return sorted(found, key=found.get)
+
+
+# Structured output schema; strict mode guarantees replies match it
+TAGS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "tags",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "tags": {"type": "array", "items": {"type": "string"}}
+            },
+            "required": ["tags"],
+            "additionalProperties": False
+        }
+    }
+}
+
 class TaggingService:
     """Service for generating document tags using AI."""
     
+    MAX_CONCURRENT_REQUESTS = 16  # In-flight completions per tag_documents call
+    LABEL_THRESHOLD = 0.3  # Minimum cosine similarity for a label to become a tag
+    MAX_LABELS = 5  # Labels kept per text, most similar first
+    NER_BATCH_SIZE = 32  # Texts per spaCy batch in auto_tag_batch
+    
     def __init__(self):
         self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.aclient = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         self.model = settings.OPENAI_MODEL
         self.max_tokens = settings.OPENAI_MAX_TOKENS
         self.temperature = settings.OPENAI_TEMPERATURE
+        self.labels = list(_load_tag_labels())
+    
+    def auto_tag(self, text: str) -> List[str]:
+        """Tag text with labels from tag_labels.yaml and named entities.
+        
+        Labels the text names verbatim come first, then those most similar
+        in meaning, then ORG/PRODUCT entities.
+        
+        Args:
+            text: Text to tag
+            
+        Returns:
+            List of tags, labels first
+        """
+        return self.auto_tag_batch([text])[0]
+    
+    def auto_tag_batch(self, texts: List[str]) -> List[List[str]]:
+        """Tag many texts, running each model over the batch at once.
+        
+        Args:
+            texts: Texts to tag
+            
+        Returns:
+            One tag list per text, in input order
+        """
+        if not texts:
+            return []
+            
+        # Cosine similarity of every text to every label in one matrix product
+        embeddings = _load_encoder().encode(
+            texts, convert_to_numpy=True, normalize_embeddings=True
+        )
+        similarities = embeddings @ _load_label_embeddings().T
+        docs = _load_ner().pipe(texts, batch_size=self.NER_BATCH_SIZE)
+        
+        results = []
+        for text, row, doc in zip(texts, similarities, docs):
+            # Labels the text names outright need no similarity threshold
+            tags = _named_labels(text)
+            tags += [
+                self.labels[i]
+                for i in np.argsort(-row, kind="stable")[:self.MAX_LABELS]
+                if row[i] >= self.LABEL_THRESHOLD and self.labels[i] not in tags
+            ]
+            for ent in doc.ents:
+                if ent.label_ in _TAG_ENTITY_TYPES and ent.text not in tags:
+                    tags.append(ent.text)
+            results.append(tags)
+        return results
     
     def tag_document(self, document: Document) -> List[str]:
         """Generate tags for a document based on its content.
@@ -34,46 +241,100 @@ class TaggingService:
         Raises:
             TaggingError: If tagging fails
         """
+        request = self._build_request(document)
+        try:
+            response: ChatCompletion = self.client.chat.completions.create(**request)
+            return self._parse_response(response)
+        except TaggingError:
+            raise
+        except Exception as e:
+            logger.error(f"Tagging failed: {str(e)}")
+            raise TaggingError(f"Tagging service error: {str(e)}")
+    
+    async def tag_documents(
+        self,
+        documents: List[Document]
+    ) -> List[Union[List[str], TaggingError]]:
+        """Generate tags for many documents with concurrent requests.
+        
+        Args:
+            documents: Documents to tag
+            
+        Returns:
+            One entry per document, in input order: its tags, or the
+            TaggingError that tagging it raised
+        """
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+        
+        async def tag_one(document: Document) -> List[str]:
+            request = self._build_request(document)
+            try:
+                async with semaphore:
+                    response = await self.aclient.chat.completions.create(**request)
+                return self._parse_response(response)
+            except TaggingError:
+                raise
+            except Exception as e:
+                logger.error(f"Tagging failed: {str(e)}")
+                raise TaggingError(f"Tagging service error: {str(e)}")
+        
+        return await asyncio.gather(
+            *(tag_one(document) for document in documents),
+            return_exceptions=True
+        )
+    
+    async def close(self) -> None:
+        """Close the pooled OpenAI HTTP connections."""
+        self.client.close()
+        await self.aclient.close()
+    
+    def _build_request(self, document: Document) -> dict:
+        """Build the chat completion arguments for a document.
+        
+        Raises:
+            TaggingError: If the document has no text
+        """
         if not document.ocr_text or not document.ocr_text.strip():
             raise TaggingError("Document has no text content to analyze")
         
-        try:
-            prompt = f"""
-            Analyze the following document text and generate 3-5 relevant tags.
-            Return ONLY a JSON array of tag strings.
-            
-            Document text:
-            {document.ocr_text}
-            """
+        prompt = f"""
+        Analyze the following document text and generate 3-5 relevant tags.
+        
+        Document text:
+        {document.ocr_text}
+        """
+        
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": "You are a helpful document tagging assistant."},
+                {"role": "user", "content": prompt}
+            ],
+            "response_format": TAGS_RESPONSE_FORMAT,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens
+        }
+    
+    @staticmethod
+    def _parse_response(response: ChatCompletion) -> List[str]:
+        """Extract the tag list from a completion.
+        
+        Raises:
+            TaggingError: If the response is empty or malformed
+        """
+        if not response.choices:
+            raise TaggingError("No response from tagging service")
             
-            response: ChatCompletion = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful document tagging assistant."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=self.temperature,
-                max_tokens=self.max_tokens
-            )
+        content = response.choices[0].message.content
+        if not content:
+            raise TaggingError("Empty response from tagging service")
             
-            if not response.choices:
-                raise TaggingError("No response from tagging service")
-                
-            content = response.choices[0].message.content
-            if not content:
-                raise TaggingError("Empty response from tagging service")
-                
-            try:
-                tags = json.loads(content)
-                if not isinstance(tags, list):
-                    raise ValueError("Response is not a list")
-                    
-                return [str(tag) for tag in tags]
-                
-            except (json.JSONDecodeError, ValueError) as e:
-                logger.error(f"Failed to parse tags: {str(e)}")
-                raise TaggingError("Invalid tag response format")
-                
-        except Exception as e:
-            logger.error(f"Tagging failed: {str(e)}")
-            raise TaggingError(f"Tagging service error: {str(e)}")
\ No newline at end of file
+        try:
+            return [str(tag) for tag in json.loads(content)["tags"]]
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            logger.error(f"Failed to parse tags: {str(e)}")
+            raise TaggingError("Invalid tag response format")
+
+
+# Global tagging service instance
+tagging_service = TaggingService()
@@ -1,87 +1,741 @@
 from celery import shared_task
+from celery.signals import worker_process_init, worker_process_shutdown
+from celery.utils.time import get_exponential_backoff_interval
 from loguru import logger
-from typing import Optional
+import asyncio
+from contextlib import contextmanager
+from typing import IO, Callable, List, Optional, Tuple, Union
+import hashlib
+import tempfile
+import threading
+import time
 import requests
-from io import BytesIO
-from PIL import Image
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import cv2
+import numpy as np
+import orjson
+from PIL import Image, ImageOps
 import pytesseract
-import PyPDF2
+import pypdfium2 as pdfium
 import magic
+import redis
 
-@shared_task(bind=True, name='extract_text')
+try:
+    from tesserocr import PSM, PyTessBaseAPI
+except ImportError:  # Optional: recognize in-process via libtesseract
+    PyTessBaseAPI = None
+
+DOWNLOAD_CONNECT_TIMEOUT = 3.05  # Seconds to wait for the file server to accept
+DOWNLOAD_TIMEOUT = 30  # Seconds to wait on the file server per read
+DOWNLOAD_CHUNK_SIZE = 1 << 20  # Bytes read from the response per iteration
+SPOOL_MAX_SIZE = 8 << 20  # Downloads larger than this spill to a temp file
+EXTRACTED_TEXT_TTL = 7 * 24 * 3600  # Seconds OCR/PDF text is kept by content hash
+EXTRACTED_URL_TTL = 24 * 3600  # Seconds text is kept by URL and ETag/Last-Modified
+PDF_MIN_PAGE_TEXT = 20  # Pages with fewer text-layer characters are OCRed
+PDF_OCR_DPI = 300  # Render resolution for scanned PDF pages
+EXTRACT_MAX_RETRIES = 3  # Attempts after the first for transient download failures
+EXTRACT_RETRY_BACKOFF = 60  # Seconds before the first retry, doubled each time
+EXTRACT_RETRY_BACKOFF_MAX = 600  # Cap on the delay between retries
+
+# Download failures that may succeed on another attempt; HTTP errors are
+# classified by status in _is_retryable
+_TRANSIENT_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError
+)
+
+
+_http_session = None
+
+
+@worker_process_init.connect
+def _reset_process_state(**kwargs) -> None:
+    """Drop handles inherited from the parent so each worker opens its own."""
+    global _http_session
+    from app.core.mime import reset_magic
+    from app.db.session import engine
+    
+    _http_session = None
+    reset_magic()
+    # Leave the parent's pooled connections to the parent
+    engine.dispose(close=False)
+
+
+@worker_process_shutdown.connect
+def _close_db(**kwargs) -> None:
+    """Return this worker's session and close its pooled connections."""
+    from app.db.session import WorkerSession, engine
+    
+    WorkerSession.remove()
+    engine.dispose()
+
+
+def _get_http_session() -> requests.Session:
+    """Return this process's pooled session for file downloads."""
+    global _http_session
+    if _http_session is None:
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.2)
+        )
+        _http_session = requests.Session()
+        _http_session.mount('http://', adapter)
+        _http_session.mount('https://', adapter)
+    return _http_session
+
+
+def _get_mime_sniffer() -> magic.Magic:
+    """Return this process's libmagic handle, loading the database once."""
+    from app.core.mime import get_magic
+    
+    return get_magic()
+
+
+def _download(file_url: str) -> Tuple[IO[bytes], str]:
+    """Stream a file into a spooled buffer, rewound for reading.
+    
+    Small files stay in memory; larger ones are written to disk as they
+    arrive instead of being held whole in RAM.
+    
+    Returns:
+        Tuple of (buffer, SHA-256 hex digest of the content)
+    """
+    buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    digest = hashlib.sha256()
+    try:
+        with _get_http_session().get(
+            file_url, stream=True, timeout=(DOWNLOAD_CONNECT_TIMEOUT, DOWNLOAD_TIMEOUT)
+        ) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                buffer.write(chunk)
+                digest.update(chunk)
+    except Exception:
+        buffer.close()
+        raise
+    buffer.seek(0)
+    return buffer, digest.hexdigest()
+
+
+_text_cache: Optional[redis.Redis] = None
+
+
+def _cache_get(key: str) -> Optional[str]:
+    """Read extracted text from Redis, treating an outage as a miss."""
+    global _text_cache
+    try:
+        if _text_cache is None:
+            from app.core.config import settings
+            _text_cache = redis.Redis.from_url(settings.redis_url)
+        cached = _text_cache.get(key)
+    except redis.RedisError as e:
+        logger.warning(f"Extracted text cache unavailable: {e}")
+        return None
+    return cached.decode('utf-8') if cached is not None else None
+
+
+def _cache_set(key: str, text: str, ttl: int) -> None:
+    """Store extracted text in Redis if it was reachable."""
+    if _text_cache is None:
+        return
+    try:
+        _text_cache.set(key, text.encode('utf-8'), ex=ttl)
+    except redis.RedisError:
+        pass
+
+
+def _extract_cached(
+    digest: str,
+    extractor: Callable[[IO[bytes]], str],
+    file_data: IO[bytes]
+) -> str:
+    """Run an expensive extractor once per file content.
+    
+    Retries and re-uploads of the same bytes reuse the stored text. Cache
+    failures only cost the cache, never the extraction.
+    """
+    key = f"extracted_text:{digest}"
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+    
+    text = extractor(file_data)
+    _cache_set(key, text, EXTRACTED_TEXT_TTL)
+    return text
+
+
+def _url_cache_key(file_url: str, file_type: Optional[str]) -> Optional[str]:
+    """Key a URL's extracted text by the validator its server sends.
+    
+    A HEAD request is far cheaper than downloading the file again; servers
+    without an ETag or Last-Modified header get no key, since there would
+    be no way to notice the file changing.
+    """
+    try:
+        response = _get_http_session().head(
+            file_url, allow_redirects=True, timeout=(DOWNLOAD_CONNECT_TIMEOUT, DOWNLOAD_TIMEOUT)
+        )
+    except requests.RequestException:
+        return None
+    validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+    if not response.ok or not validator:
+        return None
+    key = f"{file_url}|{validator}|{file_type or ''}"
+    return f"extracted_url:{hashlib.sha1(key.encode('utf-8')).hexdigest()}"
+
+
+# One Tesseract handle per worker process; loading language data is the
+# expensive part, and a handle serves one image at a time
+_tesseract_api = None
+_tesseract_lock = threading.Lock()
+
+
+def _binarize(image: Image.Image) -> Image.Image:
+    """Grayscale, stretch contrast and adaptively threshold an image for OCR."""
+    gray = ImageOps.autocontrast(image.convert('L'))
+    binary = cv2.adaptiveThreshold(
+        np.asarray(gray), 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 10
+    )
+    return Image.fromarray(binary)
+
+
+def _recognize(image: Image.Image) -> str:
+    """Run Tesseract on a prepared image, reusing one handle per process."""
+    global _tesseract_api
+    
+    if PyTessBaseAPI is None:
+        return pytesseract.image_to_string(image)
+    
+    with _tesseract_lock:
+        if _tesseract_api is None:
+            _tesseract_api = PyTessBaseAPI(psm=PSM.AUTO)
+        _tesseract_api.SetImage(image)
+        return _tesseract_api.GetUTF8Text()
+
+
+def _ocr_image(file_data: IO[bytes]) -> str:
+    """Recognize text in an image, in-process when tesserocr is installed."""
+    with Image.open(file_data) as image:
+        binary = _binarize(image)
+    return _recognize(binary)
+
+
+@worker_process_init.connect
+def _warm_ocr(**kwargs) -> None:
+    """Pay PIL plugin registration and Tesseract model loading before the first task."""
+    Image.init()
+    if PyTessBaseAPI is None:
+        return
+    try:
+        _recognize(Image.new('L', (10, 10), 255))
+    except Exception as e:  # A broken install surfaces again on the first OCR task
+        logger.warning(f"Tesseract warm-up failed: {e}")
+
+
+def _extract_pdf_text(file_data: IO[bytes]) -> str:
+    """Extract PDF text one page at a time, releasing each page when done.
+    
+    Pages with a text layer are read directly; only pages that yield
+    almost nothing (scans) are rendered and sent through OCR.
+    """
+    pdf = pdfium.PdfDocument(file_data)
+    try:
+        texts = []
+        for index in range(len(pdf)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            text = textpage.get_text_range()
+            textpage.close()
+            if len(text.strip()) < PDF_MIN_PAGE_TEXT:
+                bitmap = page.render(scale=PDF_OCR_DPI / 72)
+                text = _recognize(_binarize(bitmap.to_pil()))
+                bitmap.close()
+            texts.append(text)
+            page.close()
+        return "\n".join(texts)
+    finally:
+        pdf.close()
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether a failed extraction is worth repeating.
+    
+    Only network trouble, rate limiting and server errors qualify; 4xx
+    responses and parse failures would fail the same way again after
+    another download and OCR run.
+    """
+    if isinstance(error, requests.HTTPError):
+        status = error.response.status_code if error.response is not None else None
+        return status is None or status == 429 or status >= 500
+    return isinstance(error, _TRANSIENT_ERRORS)
+
+
+@shared_task(bind=True, name='extract_text', max_retries=EXTRACT_MAX_RETRIES)
 def extract_text(self, file_url: str, file_type: Optional[str] = None) -> str:
     """Extract text from various file types"""
     try:
-        response = requests.get(file_url)
-        response.raise_for_status()
-        file_data = BytesIO(response.content)
+        # Repeat requests for an unchanged file skip the download entirely
+        url_key = _url_cache_key(file_url, file_type)
+        cached = _cache_get(url_key) if url_key else None
+        if cached is not None:
+            return cached
         
-        if not file_type:
-            mime = magic.Magic(mime=True)
-            file_type = mime.from_buffer(file_data.read(1024))
-            file_data.seek(0)
-
-        if file_type.startswith('image/'):
-            image = Image.open(file_data)
-            return pytesseract.image_to_string(image)
-        elif file_type == 'application/pdf':
-            reader = PyPDF2.PdfReader(file_data)
-            return "\n".join(page.extract_text() for page in reader.pages)
-        else:
-            return file_data.read().decode('utf-8', errors='ignore')
+        file_data, digest = _download(file_url)
+        with file_data:
+            if not file_type:
+                file_type = _get_mime_sniffer().from_buffer(file_data.read(2048))
+                file_data.seek(0)
+
+            if file_type.startswith('image/'):
+                text = _extract_cached(digest, _ocr_image, file_data)
+            elif file_type == 'application/pdf':
+                text = _extract_cached(digest, _extract_pdf_text, file_data)
+            else:
+                text = file_data.read().decode('utf-8', errors='ignore')
+        if url_key:
+            _cache_set(url_key, text, EXTRACTED_URL_TTL)
+        return text
     except Exception as e:
-        logger.error(f"Text extraction failed: {str(e)}")
-        raise self.retry(exc=e, countdown=60)
+        logger.error(f"Text extraction failed for {file_url} ({file_type or 'unknown type'}): {e}")
+        if not _is_retryable(e):
+            raise
+        raise self.retry(exc=e, countdown=get_exponential_backoff_interval(
+            EXTRACT_RETRY_BACKOFF, self.request.retries, EXTRACT_RETRY_BACKOFF_MAX, full_jitter=True
+        ))
+
+
+@shared_task(name='compute_checksum')
+def compute_checksum(full_path: str) -> str:
+    """Hash a file too large to checksum inline during batch metadata."""
+    from app.services.metadata_service import metadata_service
+    
+    return metadata_service.calculate_checksum(full_path)
+
+
+EMBED_BATCH_SIZE = 32  # Texts per ONNX Runtime forward pass
+DEFAULT_EMBEDDING_ONNX_DIR = "models/embedding-onnx"  # Used when embedding_onnx_path is unset
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+
+def _get_encoder():
+    """Load the INT8 ONNX sentence encoder once per worker process."""
+    global _encoder
+    with _encoder_lock:
+        if _encoder is None:
+            from app.core.config import settings
+            from app.core.embeddings import (
+                OnnxSentenceEncoder,
+                export_onnx_model,
+                has_onnx_model,
+            )
+            
+            model_dir = settings.embedding_onnx_path or DEFAULT_EMBEDDING_ONNX_DIR
+            if not has_onnx_model(model_dir):
+                export_onnx_model(settings.embedding_model, model_dir)
+            _encoder = OnnxSentenceEncoder(model_dir, num_threads=settings.embedding_threads)
+    return _encoder
+
 
 @shared_task(bind=True, name='embed_document')
-def embed_document(self, text: str) -> list[float]:
-    """Generate embeddings for document text"""
+def embed_document(
+    self,
+    text: Union[str, List[str]]
+) -> Union[bytes, List[bytes]]:
+    """Generate embeddings for document text.
+    
+    Accepts one text or a list of texts; a list is embedded in batched
+    forward passes and returns one vector per text. Vectors are returned
+    as float16 bytes, a tenth the size of a JSON float list on the broker;
+    read them back with decode_embedding.
+    """
     try:
-        # TODO: Implement actual embedding logic
-        # This is a placeholder - replace with your embedding service
-        return [0.0] * 768  # Example 768-dim vector
+        texts = [text] if isinstance(text, str) else text
+        vectors = _get_encoder().encode(texts, batch_size=EMBED_BATCH_SIZE)
+        packed = [vector.tobytes() for vector in vectors.astype(np.float16)]
+        return packed[0] if isinstance(text, str) else packed
     except Exception as e:
         logger.error(f"Embedding failed: {str(e)}")
         raise self.retry(exc=e, countdown=60)
 
 
+def decode_embedding(payload: bytes, dtype: np.dtype = np.float32) -> np.ndarray:
+    """Turn an embed_document result back into a vector.
+    
+    Pass dtype=np.float16 to keep the stored precision; that is a
+    read-only view of the payload with no copy.
+    """
+    vector = np.frombuffer(payload, dtype=np.float16)
+    return vector if dtype == np.float16 else vector.astype(dtype)
+
+
+def decode_embeddings(payloads: List[bytes], dtype: np.dtype = np.float32) -> np.ndarray:
+    """Turn a batched embed_document result into one contiguous (n, dim) matrix."""
+    if not payloads:
+        return np.empty((0, 0), dtype=dtype)
+    return decode_embedding(b"".join(payloads), dtype).reshape(len(payloads), -1)
+
+
+PENDING_DELETES_KEY = "search:pending_deletes"  # Redis set drained by drain_pending_deletes
+CLEANUP_BATCH_SIZE = 100  # Document IDs per cleanup_search_indexes_batch task
+PENDING_DELETES_DRAIN_LIMIT = 10000  # IDs popped per drain run
+
+_search_clients = None
+_pending_deletes = None
+
+
+def _get_pending_deletes() -> redis.Redis:
+    """Connect to the Redis holding the pending-delete set once per process."""
+    global _pending_deletes
+    if _pending_deletes is None:
+        from app.core.config import settings
+        _pending_deletes = redis.Redis.from_url(settings.redis_url)
+    return _pending_deletes
+
+
+def _qdrant_options() -> dict:
+    """Connection settings shared by the worker's Qdrant clients.
+    
+    gRPC unless qdrant_prefer_grpc is off: vectors then travel as packed
+    floats instead of JSON text, and the upserts share one HTTP/2 connection.
+    """
+    from app.core.config import settings
+    
+    return {
+        "host": settings.qdrant_host,
+        "port": settings.qdrant_port,
+        "grpc_port": settings.qdrant_grpc_port,
+        "prefer_grpc": settings.qdrant_prefer_grpc,
+        "api_key": settings.qdrant_api_key or None,
+        "timeout": settings.qdrant_timeout
+    }
+
+
+def _get_search_clients():
+    """Create the Qdrant and Meilisearch clients once per worker process."""
+    global _search_clients
+    if _search_clients is None:
+        from meilisearch import Client as MeiliClient
+        from qdrant_client import QdrantClient
+        from app.core.config import settings
+        
+        _search_clients = (
+            QdrantClient(**_qdrant_options()),
+            MeiliClient(settings.meilisearch_url, settings.meilisearch_api_key)
+        )
+    return _search_clients
+
+
+def _cleanup_search_indexes(file_ids: List[int]) -> List[int]:
+    """Remove deleted documents from Qdrant and Meilisearch in one call each.
+    
+    Returns:
+        The IDs removed; IDs still present in the database are skipped
+    """
+    from qdrant_client.http import models
+    from app.core.config import settings
+    from app.core.search_cache import bump_search_cache_version
+    from app.db.session import WorkerSession
+    from app.models.document_record import DocumentRecord
+    
+    with WorkerSession() as db:
+        # Verify documents were deleted from DB (shouldn't exist)
+        existing = {
+            doc_id for (doc_id,) in
+            db.query(DocumentRecord.id).filter(DocumentRecord.id.in_(file_ids)).all()
+        }
+    if existing:
+        logger.warning(f"Documents {sorted(existing)} still exist in DB - skipping index cleanup")
+    removed = [file_id for file_id in file_ids if file_id not in existing]
+    if not removed:
+        return []
+        
+    qdrant_client, meili_client = _get_search_clients()
+    qdrant_client.delete(
+        collection_name=settings.qdrant_collection,
+        points_selector=models.PointIdsList(points=removed)
+    )
+    logger.info(f"Removed {len(removed)} documents from Qdrant")
+    
+    meili_client.index(settings.meilisearch_index).delete_documents(removed)
+    logger.info(f"Removed {len(removed)} documents from Meilisearch")
+    bump_search_cache_version()
+    return removed
+
+
 @shared_task(bind=True, name='cleanup_search_indexes')
 def cleanup_search_indexes(self, file_id: int):
     """
     Clean up document from all search indexes (Qdrant + Meilisearch).
     
+    Prefer cleanup_search_indexes_batch, or queue_search_index_cleanup for
+    deletes that can wait for the next drain, when removing many documents.
+    
     Args:
         file_id: ID of the document to remove
         
     Raises:
         Exception: If cleanup fails (will trigger retry)
     """
-    from loguru import logger
-    from app.db.session import SessionLocal
-    from app.models.document import Document
-    
     try:
-        db = SessionLocal()
-        
-        # Verify document was deleted from DB (shouldn't exist)
-        doc = db.query(Document).filter(Document.id == file_id).first()
-        if doc:
-            logger.warning(f"Document {file_id} still exists in DB - skipping index cleanup")
-            return
-            
-        # TODO: Implement Qdrant client
-        # qdrant_client.delete(collection_name="documents", points=[file_id])
-        logger.info(f"Removed document {file_id} from Qdrant")
-        
-        # TODO: Implement Meilisearch client
-        # meilisearch_client.index('documents').delete_document(file_id)
-        logger.info(f"Removed document {file_id} from Meilisearch")
-        
+        _cleanup_search_indexes([file_id])
     except Exception as e:
         logger.error(f"Failed to cleanup search indexes for document {file_id}: {e}")
         raise self.retry(exc=e, countdown=60)
 
 
+@shared_task(bind=True, name='cleanup_search_indexes_batch')
+def cleanup_search_indexes_batch(self, file_ids: List[int]):
+    """
+    Clean up many documents from all search indexes with one request per system.
+    
+    Args:
+        file_ids: IDs of the documents to remove
+        
+    Raises:
+        Exception: If cleanup fails (will trigger retry)
+    """
+    try:
+        _cleanup_search_indexes(file_ids)
+    except Exception as e:
+        logger.error(f"Failed to cleanup search indexes for {len(file_ids)} documents: {e}")
+        raise self.retry(exc=e, countdown=60)
+
+
+def queue_search_index_cleanup(*file_ids: int) -> None:
+    """Mark documents for removal by the next drain_pending_deletes run."""
+    _get_pending_deletes().sadd(PENDING_DELETES_KEY, *file_ids)
+
+
+@shared_task(name='drain_pending_deletes')
+def drain_pending_deletes() -> int:
+    """Dispatch queued index deletions as batch cleanup tasks.
+    
+    Scheduled by Celery beat; see beat_schedule in celery.py.
+    
+    Returns:
+        Number of document IDs dispatched
+    """
+    popped = _get_pending_deletes().spop(PENDING_DELETES_KEY, PENDING_DELETES_DRAIN_LIMIT)
+    file_ids = sorted(int(file_id) for file_id in popped)
+    for start in range(0, len(file_ids), CLEANUP_BATCH_SIZE):
+        cleanup_search_indexes_batch.delay(file_ids[start:start + CLEANUP_BATCH_SIZE])
+    return len(file_ids)
+
+
+MEILI_UPLOAD_MAX_BYTES = 10 << 20  # NDJSON bytes per Meilisearch request
+MEILI_UPLOAD_MAX_DOCS = 5000  # Documents per Meilisearch request
+REINDEX_BATCH_SIZE = 100  # Documents loaded and embedded per bulk reindex step
+REINDEX_UPSERT_BATCH_SIZE = 32  # Points per Qdrant upsert request
+REINDEX_UPSERT_CONCURRENCY = 2  # Upsert requests in flight at once
+
+
+async def _upsert_points(points: list) -> None:
+    """Upsert points in fixed-size batches with bounded concurrency.
+    
+    The async client lives for one call: its gRPC channel is bound to the
+    event loop that asyncio.run creates for the task.
+    """
+    from qdrant_client import AsyncQdrantClient
+    from app.core.config import settings
+    
+    client = AsyncQdrantClient(**_qdrant_options())
+    semaphore = asyncio.Semaphore(REINDEX_UPSERT_CONCURRENCY)
+    
+    async def upsert(batch: list) -> None:
+        async with semaphore:
+            await client.upsert(collection_name=settings.qdrant_collection, points=batch)
+    
+    try:
+        await asyncio.gather(*(
+            upsert(points[start:start + REINDEX_UPSERT_BATCH_SIZE])
+            for start in range(0, len(points), REINDEX_UPSERT_BATCH_SIZE)
+        ))
+    finally:
+        await client.close()
+
+
+def _search_document(doc, text: str) -> dict:
+    """Build the fields SearchService indexes for a document row."""
+    return {
+        "id": doc.id,
+        "title": doc.title,
+        "content": text,
+        "tags": doc.tags or [],
+        "filename": doc.filename,
+        "type": doc.mime_type,
+        "size": doc.file_size,
+        "owner": doc.owner_id
+    }
+
+
+def _meili_document(doc, text: str) -> bytes:
+    """Serialize one document as a Meilisearch NDJSON line.
+    
+    Every field is a JSON column or plain scalar, so anything orjson cannot
+    encode is a bug and raises rather than being indexed as its repr.
+    """
+    return orjson.dumps(
+        {**_search_document(doc, text), "metadata": doc.doc_metadata or {}},
+        option=orjson.OPT_NON_STR_KEYS
+    )
+
+
+class MeiliBulkUploader:
+    """Buffer serialized documents and send them to Meilisearch in large batches.
+    
+    Meilisearch indexes each request as one task, so fewer, bigger payloads
+    keep its writer busy on documents rather than task overhead. A batch is
+    sent once it reaches max_bytes or max_docs; the rest goes out on flush
+    or when the uploader's with-block exits.
+    """
+    
+    def __init__(
+        self,
+        index,
+        max_bytes: int = MEILI_UPLOAD_MAX_BYTES,
+        max_docs: int = MEILI_UPLOAD_MAX_DOCS
+    ):
+        self.index = index
+        self.max_bytes = max_bytes
+        self.max_docs = max_docs
+        self._lines: List[bytes] = []
+        self._bytes = 0
+    
+    def add(self, line: bytes) -> None:
+        """Queue one NDJSON document line, flushing when a limit is reached."""
+        self._lines.append(line)
+        self._bytes += len(line) + 1
+        if self._bytes >= self.max_bytes or len(self._lines) >= self.max_docs:
+            self.flush()
+    
+    def flush(self) -> None:
+        """Send everything buffered as one NDJSON request."""
+        if not self._lines:
+            return
+        self.index.add_documents_ndjson(b"\n".join(self._lines), primary_key='id')
+        logger.info(f"Sent {len(self._lines)} documents to Meilisearch")
+        self._lines = []
+        self._bytes = 0
+    
+    def __enter__(self) -> "MeiliBulkUploader":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.flush()
+
+
+def _reindex_documents(file_ids: List[int], uploader: Optional[MeiliBulkUploader] = None) -> None:
+    """Re-embed documents together and write them to Qdrant and Meilisearch.
+    
+    Meilisearch documents go through the given uploader, so a bulk caller
+    can collect several steps into one request; without one they are sent
+    as a single request before returning.
+    """
+    from qdrant_client.http import models
+    from app.core.config import settings
+    from app.core.search_cache import bump_search_cache_version
+    from app.db.session import WorkerSession
+    from app.models.document_record import DocumentRecord
+    
+    with WorkerSession() as db:
+        docs = db.query(DocumentRecord).filter(DocumentRecord.id.in_(file_ids)).all()
+    missing = set(file_ids) - {doc.id for doc in docs}
+    if missing:
+        logger.error(f"Documents {sorted(missing)} not found in DB")
+        raise ValueError(f"Documents {sorted(missing)} not found")
+    
+    # Text-layer extraction first; OCR covers scans that have none
+    texts = [doc.extracted_text or doc.ocr_text or "" for doc in docs]
+    vectors = _get_encoder().encode(texts, batch_size=EMBED_BATCH_SIZE)
+    points = [
+        models.PointStruct(
+            id=doc.id,
+            vector=vector.tolist(),
+            payload=_search_document(doc, text)
+        )
+        for doc, text, vector in zip(docs, texts, vectors)
+    ]
+    asyncio.run(_upsert_points(points))
+    logger.info(f"Updated {len(docs)} documents in Qdrant")
+    
+    if uploader is None:
+        _, meili_client = _get_search_clients()
+        with MeiliBulkUploader(meili_client.index(settings.meilisearch_index)) as uploader:
+            for doc, text in zip(docs, texts):
+                uploader.add(_meili_document(doc, text))
+        bump_search_cache_version()
+    else:
+        # The bulk caller bumps the version once its uploader has flushed
+        for doc, text in zip(docs, texts):
+            uploader.add(_meili_document(doc, text))
+
+
+DEFAULT_INDEXING_THRESHOLD = 20000  # Qdrant's default, matching SearchService
+INDEX_WAIT_TIMEOUT = 600  # Seconds to wait for HNSW to finish after a bulk load
+INDEX_POLL_INTERVAL = 1.0  # Seconds between collection status checks
+
+
+def pause_indexing(collection: str) -> None:
+    """Stop Qdrant from building HNSW segments while points are loaded."""
+    from qdrant_client.http import models
+    
+    qdrant_client, _ = _get_search_clients()
+    qdrant_client.update_collection(
+        collection_name=collection,
+        optimizer_config=models.OptimizersConfigDiff(indexing_threshold=0)
+    )
+
+
+def resume_indexing(collection: str, threshold: int = DEFAULT_INDEXING_THRESHOLD) -> None:
+    """Restore the indexing threshold so Qdrant builds HNSW in one pass."""
+    from qdrant_client.http import models
+    
+    qdrant_client, _ = _get_search_clients()
+    qdrant_client.update_collection(
+        collection_name=collection,
+        optimizer_config=models.OptimizersConfigDiff(indexing_threshold=threshold)
+    )
+
+
+def wait_for_index(collection: str, timeout: float = INDEX_WAIT_TIMEOUT) -> bool:
+    """Poll until the collection's optimizers are idle.
+    
+    Returns:
+        True if indexing finished within the timeout
+    """
+    from qdrant_client.http import models
+    
+    qdrant_client, _ = _get_search_clients()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if qdrant_client.get_collection(collection).status == models.CollectionStatus.GREEN:
+            return True
+        time.sleep(INDEX_POLL_INTERVAL)
+    return False
+
+
+@contextmanager
+def paused_indexing(collection: str, threshold: int = DEFAULT_INDEXING_THRESHOLD):
+    """Defer HNSW construction for the duration of a bulk load.
+    
+    Unindexed points are served by brute force and held in RAM until the
+    final index build completes, so memory stays high until then.
+    """
+    pause_indexing(collection)
+    try:
+        yield
+    finally:
+        resume_indexing(collection, threshold)
+        if not wait_for_index(collection):
+            logger.warning(f"Qdrant collection {collection} still indexing after bulk load")
+
+
 @shared_task(bind=True, name='reindex_document')
 def reindex_document(self, file_id: int):
     """
@@ -93,44 +747,55 @@ def reindex_document(self, file_id: int):
     Raises:
         Exception: If reindexing fails (will trigger retry)
     """
-    from loguru import logger
-    from app.db.session import SessionLocal
-    from app.models.document import Document
-    
     try:
-        db = SessionLocal()
-        doc = db.query(Document).filter(Document.id == file_id).first()
-        
-        if not doc:
-            logger.error(f"Document {file_id} not found in DB")
-            raise ValueError(f"Document {file_id} not found")
-            
-        # TODO: Implement text extraction if needed
-        # text = extract_text(doc.file_path)
-        
-        # TODO: Implement Qdrant update
-        # qdrant_client.upsert(
-        #     collection_name="documents",
-        #     points=[{
-        #         "id": doc.id,
-        #         "vector": embed_document(text),
-        #         "payload": {
-        #             "title": doc.title,
-        #             "content": text
-        #         }
-        #     }]
-        # )
-        logger.info(f"Updated document {file_id} in Qdrant")
+        _reindex_documents([file_id])
+    except Exception as e:
+        logger.error(f"Failed to reindex document {file_id}: {e}")
+        raise self.retry(exc=e, countdown=60)
+
+
+@shared_task(bind=True, name='reindex_documents_batch')
+def reindex_documents_batch(self, file_ids: List[int]):
+    """
+    Reindex many documents, embedding them together and upserting in batches.
+    
+    Args:
+        file_ids: IDs of the documents to reindex
         
-        # TODO: Implement Meilisearch update
-        # meilisearch_client.index('documents').add_documents([{
-        #     "id": doc.id,
-        #     "title": doc.title,
-        #     "content": text,
-        #     "metadata": doc.metadata
-        # }])
-        logger.info(f"Updated document {file_id} in Meilisearch")
+    Raises:
+        Exception: If reindexing fails (will trigger retry)
+    """
+    try:
+        _reindex_documents(file_ids)
+    except Exception as e:
+        logger.error(f"Failed to reindex {len(file_ids)} documents: {e}")
+        raise self.retry(exc=e, countdown=60)
+
+
+@shared_task(bind=True, name='bulk_reindex_documents')
+def bulk_reindex_documents(self, file_ids: List[int]):
+    """
+    Reindex a large set of documents with HNSW indexing paused.
+    
+    Use this for migrations instead of fanning out reindex_document, which
+    would have Qdrant re-optimize after every insert.
+    
+    Args:
+        file_ids: IDs of the documents to reindex
         
+    Raises:
+        Exception: If reindexing fails (will trigger retry)
+    """
+    from app.core.config import settings
+    from app.core.search_cache import bump_search_cache_version
+    
+    try:
+        _, meili_client = _get_search_clients()
+        with paused_indexing(settings.qdrant_collection), \
+                MeiliBulkUploader(meili_client.index(settings.meilisearch_index)) as uploader:
+            for start in range(0, len(file_ids), REINDEX_BATCH_SIZE):
+                _reindex_documents(file_ids[start:start + REINDEX_BATCH_SIZE], uploader)
+        bump_search_cache_version()
     except Exception as e:
-        logger.error(f"Failed to reindex document {file_id}: {e}")
-        raise self.retry(exc=e, countdown=60)
\ No newline at end of file
+        logger.error(f"Failed to bulk reindex {len(file_ids)} documents: {e}")
+        raise self.retry(exc=e, countdown=60)
@@ -1,38 +1,46 @@
 #!/usr/bin/env python3
 """Test script for file upload endpoint."""
 
-import requests
+import asyncio
+import httpx
 import os
 from pathlib import Path
 
-def test_upload_endpoint():
-    """Test the file upload endpoint."""
-    
-    # Create a test file
-    test_file_path = Path("test_upload.txt")
-    test_content = "This is a test file for upload endpoint testing."
-    
-    with open(test_file_path, "w") as f:
-        f.write(test_content)
-    
-    try:
-        # Test upload endpoint
-        url = "http://localhost:8000/api/v1/files/upload"
-        
+async def _upload(test_file_path: Path):
+    """Upload a file, streaming it from disk in chunks."""
+
+    # Test upload endpoint
+    url = "http://localhost:8000/api/v1/files/upload"
+
+    async with httpx.AsyncClient() as client:
         with open(test_file_path, "rb") as f:
+            # httpx reads file parts in chunks while sending, so the
+            # multipart body is never assembled in memory
             files = {"file": ("test_upload.txt", f, "text/plain")}
             data = {"title": "Test Upload", "description": "Test file upload"}
-            
-            response = requests.post(url, files=files, data=data)
-            
+
+            response = await client.post(url, files=files, data=data)
+
         print(f"Status Code: {response.status_code}")
         print(f"Response: {response.json()}")
-        
+
         # Test upload info endpoint
         info_url = "http://localhost:8000/api/v1/files/upload"
-        info_response = requests.get(info_url)
+        info_response = await client.get(info_url)
         print(f"Upload Info: {info_response.json()}")
-        
+
+def test_upload_endpoint():
+    """Test the file upload endpoint."""
+
+    # Create a test file
+    test_file_path = Path("test_upload.txt")
+    test_content = "This is a test file for upload endpoint testing."
+
+    with open(test_file_path, "w") as f:
+        f.write(test_content)
+
+    try:
+        asyncio.run(_upload(test_file_path))
     except Exception as e:
         print(f"Error testing upload: {e}")
     finally:
@@ -41,4 +49,4 @@ def test_upload_endpoint():
             test_file_path.unlink()
 
 if __name__ == "__main__":
-    test_upload_endpoint()
\ No newline at end of file
+    test_upload_endpoint()
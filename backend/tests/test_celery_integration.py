@@ -1,12 +1,16 @@
+import httpx
 import pytest
+import pytest_asyncio
 from unittest.mock import patch, MagicMock
 from filemanager.backend.main import app
 from filemanager.backend.celery import app as celery_app
-from fastapi.testclient import TestClient
 
-@pytest.fixture
-def client():
-    return TestClient(app)
+@pytest_asyncio.fixture
+async def client():
+    """Call the app in-process over ASGI, without a socket or worker thread."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
 
 @pytest.fixture(autouse=True)
 def mock_celery():
@@ -15,9 +19,14 @@ def mock_celery():
         mock.control.inspect.return_value.active.return_value = {'worker1': [{'id': 'task1'}]}
         yield mock
 
+@pytest.mark.asyncio
 class TestCeleryIntegration:
-    def test_health_check(self, client):
-        response = client.get("/health")
+    async def test_health_check(self, client):
+        from filemanager.backend import main
+        
+        # The client runs no startup hooks, so take one probe by hand
+        with patch.dict(main._celery_health, main._probe_celery()):
+            response = await client.get("/health")
         assert response.status_code == 200
         assert response.json() == {
             "status": "healthy",
@@ -25,20 +34,29 @@ class TestCeleryIntegration:
             "celery_tasks": 1
         }
 
+    async def test_health_check_before_first_probe(self, client):
+        response = await client.get("/health")
+        assert response.status_code == 200
+        assert response.json() == {
+            "status": "healthy",
+            "celery_workers": None,
+            "celery_tasks": None
+        }
+
     @patch('filemanager.backend.tasks.extract_text.delay')
-    def test_file_processing_flow(self, mock_extract, client):
+    async def test_file_processing_flow(self, mock_extract, client):
         mock_extract.return_value = MagicMock(id='task123')
         
         # Simulate file upload and processing
-        response = client.post("/api/v1/upload", files={"file": ("test.pdf", b"content")})
+        response = await client.post("/api/v1/upload", files={"file": ("test.pdf", b"content")})
         assert response.status_code == 202
         assert response.json() == {"task_id": "task123"}
 
     @patch('filemanager.backend.tasks.embed_document.delay')
-    def test_embedding_flow(self, mock_embed, client):
+    async def test_embedding_flow(self, mock_embed, client):
         mock_embed.return_value = MagicMock(id='task456')
         
-        response = client.post("/api/v1/embed", json={"text": "sample"})
+        response = await client.post("/api/v1/embed", json={"text": "sample"})
         assert response.status_code == 202
         assert response.json() == {"task_id": "task456"}
 
@@ -55,11 +73,18 @@ def mock_tika():
         mock.return_value = {'content': 'parsed text'}
         yield mock
 
-def test_search_integration(client, mock_qdrant):
-    response = client.get("/api/v1/search?query=test")
+@pytest.mark.asyncio
+async def test_search_integration(client, mock_qdrant):
+    response = await client.get("/api/v1/search?query=test")
     assert response.status_code == 200
     assert 'results' in response.json()
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("ef_search", [0, 100000])
+async def test_search_rejects_out_of_range_ef_search(client, ef_search):
+    response = await client.get(f"/api/v1/search?query=test&ef_search={ef_search}")
+    assert response.status_code == 422
+
 def test_text_extraction_integration(mock_tika):
     from filemanager.backend.tasks import extract_text
     result = extract_text('http://test.com/file', 'application/pdf')
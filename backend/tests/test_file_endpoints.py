@@ -1,6 +1,7 @@
 """Tests for file management API endpoints."""
+import httpx
 import pytest
-from fastapi.testclient import TestClient
+import pytest_asyncio
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from unittest.mock import MagicMock
@@ -13,7 +14,14 @@ from backend.app.tests.conftest import override_get_db
 from backend.app.services.navigation_state import NavigationStateService
 
 app.dependency_overrides[get_db] = override_get_db
-client = TestClient(app)
+pytestmark = pytest.mark.asyncio
+
+@pytest_asyncio.fixture
+async def aclient():
+    """Call the app in-process over ASGI, without a socket or worker thread."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
 
 @pytest.fixture
 def test_user(test_db: Session):
@@ -34,32 +42,32 @@ def test_user(test_db: Session):
 @pytest.fixture
 def test_documents(test_db: Session, test_user: User):
     """Create test documents for navigation."""
-    docs = []
-    for i in range(1, 21):
-        doc = Document(
-            title=f"Test Doc {i}",
-            filename=f"test_{i}.txt",
-            file_path=f"/test/test_{i}.txt",
-            file_size=100 * i,
-            mime_type="text/plain",
-            checksum=f"abc{i}",
-            status="processed",
-            owner_id=test_user.id,
-            updated_at=datetime.utcnow() - timedelta(hours=i),
-            last_accessed_at=datetime.utcnow() - timedelta(hours=i)
-        )
-        if i % 5 == 0:
-            doc.starred = True
-        if i % 3 == 0:
-            doc.shared_with = ["user2"]
-        test_db.add(doc)
-        docs.append(doc)
+    now = datetime.utcnow()
+    rows = [
+        {
+            "title": f"Test Doc {i}",
+            "filename": f"test_{i}.txt",
+            "file_path": f"/test/test_{i}.txt",
+            "file_size": 100 * i,
+            "mime_type": "text/plain",
+            "checksum": f"abc{i}",
+            "status": "processed",
+            "owner_id": test_user.id,
+            "updated_at": now - timedelta(hours=i),
+            "last_accessed_at": now - timedelta(hours=i),
+            "starred": i % 5 == 0,
+            "shared_with": ["user2"] if i % 3 == 0 else []
+        }
+        for i in range(1, 21)
+    ]
+    # One multi-row INSERT, without per-object identity map bookkeeping
+    test_db.bulk_insert_mappings(Document, rows)
     test_db.commit()
-    return docs
+    return test_db.query(Document).filter(Document.owner_id == test_user.id).all()
 
-def test_browse_files_basic(test_db: Session, test_user: User, test_documents):
+async def test_browse_files_basic(aclient, test_db: Session, test_user: User, test_documents):
     """Test basic folder browsing."""
-    response = client.get(
+    response = await aclient.get(
         "/api/v1/files/browse",
         headers={"Authorization": f"Bearer {test_user.id}"}
     )
@@ -68,10 +76,10 @@ def test_browse_files_basic(test_db: Session, test_user: User, test_documents):
     assert len(data["items"]) == 20
     assert data["has_more"] is False
 
-def test_browse_files_pagination(test_db: Session, test_user: User, test_documents):
+async def test_browse_files_pagination(aclient, test_db: Session, test_user: User, test_documents):
     """Test cursor-based pagination."""
     # First page
-    response = client.get(
+    response = await aclient.get(
         "/api/v1/files/browse?per_page=5",
         headers={"Authorization": f"Bearer {test_user.id}"}
     )
@@ -82,7 +90,7 @@ def test_browse_files_pagination(test_db: Session, test_user: User, test_documen
     assert "next_cursor" in data
 
     # Second page
-    response = client.get(
+    response = await aclient.get(
         f"/api/v1/files/browse?per_page=5&cursor={data['next_cursor']}",
         headers={"Authorization": f"Bearer {test_user.id}"}
     )
@@ -91,10 +99,10 @@ def test_browse_files_pagination(test_db: Session, test_user: User, test_documen
     assert len(data["items"]) == 5
     assert data["has_more"] is True
 
-def test_browse_files_sorting(test_db: Session, test_user: User, test_documents):
+async def test_browse_files_sorting(aclient, test_db: Session, test_user: User, test_documents):
     """Test different sorting options."""
     # Sort by size descending
-    response = client.get(
+    response = await aclient.get(
         "/api/v1/files/browse?sort_by=size&sort_order=desc",
         headers={"Authorization": f"Bearer {test_user.id}"}
     )
@@ -103,7 +111,7 @@ def test_browse_files_sorting(test_db: Session, test_user: User, test_documents)
     assert data["items"][0]["size"] > data["items"][1]["size"]
 
     # Sort by date ascending
-    response = client.get(
+    response = await aclient.get(
         "/api/v1/files/browse?sort_by=date&sort_order=asc",
         headers={"Authorization": f"Bearer {test_user.id}"}
     )
@@ -111,9 +119,9 @@ def test_browse_files_sorting(test_db: Session, test_user: User, test_documents)
     data = response.json()
     assert data["items"][0]["updated_at"] < data["items"][1]["updated_at"]
 
-def test_browse_files_view_modes(test_db: Session, test_user: User, test_documents):
+async def test_browse_files_view_modes(aclient, test_db: Session, test_user: User, test_documents):
     """Test different view modes."""
-    response = client.get(
+    response = await aclient.get(
         "/api/v1/files/browse?view_mode=grid",
         headers={"Authorization": f"Bearer {test_user.id}"}
     )
@@ -121,18 +129,18 @@ def test_browse_files_view_modes(test_db: Session, test_user: User, test_documen
     data = response.json()
     assert data["view_mode"] == "grid"
 
-def test_breadcrumbs(test_db: Session, test_user: User):
+async def test_breadcrumbs(aclient, test_db: Session, test_user: User):
     """Test breadcrumb generation."""
-    response = client.get(
+    response = await aclient.get(
         "/api/v1/files/breadcrumbs?path=/test/path",
         headers={"Authorization": f"Bearer {test_user.id}"}
     )
     assert response.status_code == 200
     assert isinstance(response.json(), list)
 
-def test_recent_files(test_db: Session, test_user: User, test_documents):
+async def test_recent_files(aclient, test_db: Session, test_user: User, test_documents):
     """Test recent files collection."""
-    response = client.get(
+    response = await aclient.get(
         "/api/v1/files/collections/recent",
         headers={"Authorization": f"Bearer {test_user.id}"}
     )
@@ -141,9 +149,9 @@ def test_recent_files(test_db: Session, test_user: User, test_documents):
     assert len(data["items"]) == 10
     assert data["has_more"] is True
 
-def test_starred_files(test_db: Session, test_user: User, test_documents):
+async def test_starred_files(aclient, test_db: Session, test_user: User, test_documents):
     """Test starred files collection."""
-    response = client.get(
+    response = await aclient.get(
         "/api/v1/files/collections/starred",
         headers={"Authorization": f"Bearer {test_user.id}"}
     )
@@ -152,9 +160,9 @@ def test_starred_files(test_db: Session, test_user: User, test_documents):
     assert len(data["items"]) == 4  # 20/5 = 4 starred docs
     assert all(doc["starred"] for doc in data["items"])
 
-def test_shared_files(test_db: Session, test_user: User, test_documents):
+async def test_shared_files(aclient, test_db: Session, test_user: User, test_documents):
     """Test shared files collection."""
-    response = client.get(
+    response = await aclient.get(
         "/api/v1/files/collections/shared",
         headers={"Authorization": f"Bearer {test_user.id}"}
     )
@@ -163,12 +171,12 @@ def test_shared_files(test_db: Session, test_user: User, test_documents):
     assert len(data["items"]) == 6  # 20/3 ≈ 6 shared docs
     assert test_user.id in data["items"][0]["shared_with"]
 
-def test_navigation_state_persistence(test_db: Session, test_user: User):
+async def test_navigation_state_persistence(aclient, test_db: Session, test_user: User):
     """Test navigation state persistence."""
     mock_service = MagicMock(spec=NavigationStateService)
     app.dependency_overrides[NavigationStateService] = lambda: mock_service
 
-    response = client.get(
+    response = await aclient.get(
         "/api/v1/files/browse",
         headers={"Authorization": f"Bearer {test_user.id}"}
     )
@@ -177,7 +185,7 @@ def test_navigation_state_persistence(test_db: Session, test_user: User):
 
     app.dependency_overrides.pop(NavigationStateService)
 
-def test_browse_files_unauthorized():
+async def test_browse_files_unauthorized(aclient):
     """Test unauthorized access to browse endpoint."""
-    response = client.get("/api/v1/files/browse")
+    response = await aclient.get("/api/v1/files/browse")
     assert response.status_code == 401
\ No newline at end of file
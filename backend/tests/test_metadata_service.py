@@ -25,11 +25,28 @@ class TestMetadataService:
     
     def test_calculate_checksum(self):
         """Test checksum calculation."""
+        import hashlib
+        import io
+        from app.services.metadata_service import MetadataService
+        
+        service = MetadataService()
+        
+        checksum = service._calculate_checksum_stream(io.BytesIO(b"test content"))
+        assert checksum == hashlib.sha256(b"test content").hexdigest()
+        
+        # Test same content produces same checksum
+        assert service._calculate_checksum_stream(io.BytesIO(b"test content")) == checksum
+        
+        # Reads span chunk boundaries
+        content = b"x" * (service.CHUNK_SIZE + 1)
+        assert service._calculate_checksum_stream(io.BytesIO(content)) == hashlib.sha256(content).hexdigest()
+    
+    def test_calculate_checksums_batch(self):
+        """Test the batch API matches the single-file path, in input order."""
         from app.services.metadata_service import MetadataService
         
         service = MetadataService()
         
-        # Create a temporary file
         with tempfile.NamedTemporaryFile(mode='w', delete=False) as f:
             f.write("test content")
             temp_path = f.name
@@ -37,15 +54,94 @@ class TestMetadataService:
         try:
             checksum = service._calculate_checksum(temp_path)
             assert len(checksum) == 64  # SHA-256 produces 64 hex chars
-            assert checksum.isalnum()  # Should be hexadecimal
-            
-            # Test same content produces same checksum
-            checksum2 = service._calculate_checksum(temp_path)
-            assert checksum == checksum2
+            assert service.calculate_checksums_batch([temp_path, "/nonexistent", temp_path]) == [
+                checksum, "", checksum
+            ]
+        finally:
+            os.unlink(temp_path)
+    
+    def test_remember_checksum(self):
+        """Test a recorded checksum is reused until the file changes."""
+        import shutil
+        from app.services.metadata_service import MetadataService
+        
+        service = MetadataService()
+        
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', dir=service.upload_dir, delete=False) as f:
+            f.write("uploaded content")
+            temp_path = f.name
+        moved_path = temp_path + ".moved"
+        
+        try:
+            service.remember_checksum(temp_path, "recorded")
+            shutil.move(temp_path, moved_path)
+            metadata = service.extract_file_metadata(os.path.basename(moved_path))
+            assert metadata["checksum"] == "recorded"
             
+            with open(moved_path, "a") as f:
+                f.write(" changed")
+            metadata = service.extract_file_metadata(os.path.basename(moved_path))
+            assert metadata["checksum"] == service._calculate_checksum(moved_path)
+        finally:
+            os.unlink(moved_path)
+    
+    def test_calculate_checksum_mapped(self):
+        """Test files hashed through mmap match hashlib."""
+        import hashlib
+        from app.services.metadata_service import MetadataService
+        
+        service = MetadataService()
+        content = os.urandom(service.MMAP_THRESHOLD * 4 + 123)
+        
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(content)
+            temp_path = f.name
+        
+        try:
+            assert service._calculate_checksum(temp_path) == hashlib.sha256(content).hexdigest()
         finally:
             os.unlink(temp_path)
     
+    def test_sha256_mapped_digest_store(self):
+        """Test the digest store is reused, expires keys and tolerates Redis errors."""
+        import hashlib
+        import mmap
+        from unittest.mock import MagicMock, patch
+        import redis
+        from app.services import metadata_service as module
+        
+        if module.blake3 is None:
+            pytest.skip("blake3 not installed")
+        
+        service = module.MetadataService()
+        service._digest_store = MagicMock()
+        content = os.urandom(1024)
+        expected = hashlib.sha256(content).hexdigest()
+        buffer = mmap.mmap(-1, len(content))
+        buffer.write(content)
+        
+        with patch.object(service, "DEDUP_MIN_SIZE", 0):
+            # Miss: hashed once, recorded under its own expiring key
+            service._digest_store.get.return_value = None
+            assert service._sha256_mapped(buffer, len(content)) == expected
+            key, value = service._digest_store.set.call_args.args
+            assert key.startswith(service.DIGEST_KEY_PREFIX)
+            assert value == expected
+            assert service._digest_store.set.call_args.kwargs["ex"] == service.DIGEST_TTL
+            
+            # Hit: the recorded digest is returned as-is
+            service._digest_store.get.return_value = b"recorded"
+            assert service._sha256_mapped(buffer, len(content)) == "recorded"
+            
+            # Redis down: plain SHA-256, and the store is left alone while backing off
+            service._digest_store.get.side_effect = redis.ConnectionError("down")
+            assert service._sha256_mapped(buffer, len(content)) == expected
+            service._digest_store.reset_mock()
+            assert service._sha256_mapped(buffer, len(content)) == expected
+            service._digest_store.get.assert_not_called()
+            service._digest_store.set.assert_not_called()
+        buffer.close()
+    
     def test_extract_text_metadata(self):
         """Test text file metadata extraction."""
         from app.services.metadata_service import MetadataService
@@ -65,12 +161,46 @@ class TestMetadataService:
             assert "text_characters" in metadata
             
             assert metadata["text_lines"] == 3
-            assert metadata["text_words"] >= 6  # "Line", "1", "Line", "2", "Line", "3"
-            assert metadata["text_characters"] > 0
+            assert metadata["text_words"] == 6  # "Line", "1", "Line", "2", "Line", "3"
+            assert metadata["text_characters"] == 20
+            
+            # Multi-byte characters count once; all str.split() whitespace separates
+            text = "caf\u00e9 na\u00efve\t\x1cword\n"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            metadata = service._extract_text_metadata(temp_path)
+            assert metadata["text_lines"] == 1
+            assert metadata["text_words"] == len(text.split())
+            assert metadata["text_characters"] == len(text)
             
         finally:
             os.unlink(temp_path)
     
+    def test_scan_text_across_windows(self):
+        """Test one-pass text counts carry state across scan windows."""
+        from app.services.metadata_service import MetadataService
+        
+        service = MetadataService()
+        data = "héllo wörld\nfoo bar".encode()
+        
+        # Small windows split words and multi-byte characters mid-sequence
+        for window in (1, 3, 4, 64):
+            service.TEXT_SCAN_WINDOW = window
+            assert service._scan_text(data, len(data)) == (2, 4, 19)
+    
+    def test_scan_text_carriage_returns(self):
+        """Test CRLF and lone CR count as one newline, as in text mode."""
+        from app.services.metadata_service import MetadataService
+        
+        service = MetadataService()
+        for data in (b"one\r\ntwo\r\nthree", b"one\rtwo\r\n", b"a\r\n\r\nb\r", b"\r\r\n"):
+            text = data.decode().replace("\r\n", "\n").replace("\r", "\n")
+            expected = (len(text.splitlines()), len(text.split()), len(text))
+            # Windows of 1 and 3 bytes split CRLF pairs across windows
+            for window in (1, 3, 64):
+                service.TEXT_SCAN_WINDOW = window
+                assert service._scan_text(data, len(data)) == expected
+    
     def test_validate_file_exists(self):
         """Test file existence validation."""
         from app.services.metadata_service import MetadataService
@@ -111,6 +241,59 @@ class TestMetadataService:
         mime_type = service._get_mime_type("test.pdf")
         assert mime_type == "application/pdf" or mime_type == "application/octet-stream"
     
+    def test_get_mime_type_cache_key(self):
+        """Test sniffed types are cached on size and a short prefix digest."""
+        from unittest.mock import MagicMock
+        from app.services.metadata_service import MetadataService
+        
+        service = MetadataService()
+        service._magic = MagicMock()
+        service._magic.from_buffer.return_value = "application/pdf"
+        head = b"%PDF-1.7\n" + b"\0" * 4000
+        
+        assert service._get_mime_type("a.pdf", head, 5000) == "application/pdf"
+        assert service._get_mime_type("b.pdf", head, 5000) == "application/pdf"
+        service._magic.from_buffer.assert_called_once_with(head)
+        
+        (size, digest), = service._mime_cache
+        assert size == 5000 and len(digest) == 8
+    
+    def test_checksum_cache_concurrent_eviction(self):
+        """Test the checksum cache stays bounded when threads evict at once."""
+        from concurrent.futures import ThreadPoolExecutor
+        from app.services.metadata_service import MetadataService
+        
+        service = MetadataService()
+        service.CHECKSUM_CACHE_SIZE = 4
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(
+                lambda i: service._store_checksum((0, i, 0, 0), str(i)),
+                range(500)
+            ))
+        
+        assert len(service._checksum_cache) <= service.CHECKSUM_CACHE_SIZE
+    
+    def test_get_mime_type_cache_concurrent_eviction(self):
+        """Test the MIME cache stays bounded when threads evict at once."""
+        from concurrent.futures import ThreadPoolExecutor
+        from unittest.mock import MagicMock
+        from app.services.metadata_service import MetadataService
+        
+        service = MetadataService()
+        service._magic = MagicMock()
+        service._magic.from_buffer.return_value = "text/plain"
+        service.MIME_CACHE_SIZE = 4
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda i: service._get_mime_type("a.txt", str(i).encode(), i),
+                range(500)
+            ))
+        
+        assert results == ["text/plain"] * 500
+        assert len(service._mime_cache) <= service.MIME_CACHE_SIZE
+    
     def test_extract_system_metadata(self):
         """Test system metadata extraction."""
         from app.services.metadata_service import MetadataService
@@ -136,9 +319,83 @@ class TestMetadataService:
             assert "unix_inode" in metadata
             assert "unix_nlink" in metadata
             
+            # Values read by tuple position match the named fields
+            assert metadata["unix_uid"] == stat_info.st_uid
+            assert metadata["unix_device"] == stat_info.st_dev
+            assert metadata["unix_inode"] == stat_info.st_ino
+            assert metadata["unix_nlink"] == stat_info.st_nlink
+            
         finally:
             os.unlink(temp_path)
+    
+    def test_extract_batch(self):
+        """Test batch extraction returns full metadata in input order."""
+        from concurrent.futures import ThreadPoolExecutor
+        from unittest.mock import patch
+        from app.services import metadata_service as module
+        
+        service = module.MetadataService()
+        
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', dir=service.upload_dir, delete=False) as f:
+            f.write("one two\nthree")
+            temp_path = f.name
+        name = os.path.basename(temp_path)
+        
+        # Threads stand in for the spawned processes
+        try:
+            with ThreadPoolExecutor(max_workers=2) as pool, \
+                    patch.object(module, "_get_process_pool", return_value=pool):
+                results = service.extract_batch([name, "missing.txt", name])
+            
+            assert list(results) == [name, "missing.txt"]
+            assert results[name]["checksum"] == service._calculate_checksum(temp_path)
+            assert results[name]["text_words"] == 3
+            assert "error" in results["missing.txt"]
+        finally:
+            os.unlink(temp_path)
+    
+    def test_extract_batch_broken_pool(self):
+        """Test a dead worker fails its files instead of the whole batch."""
+        from concurrent.futures import Future
+        from concurrent.futures.process import BrokenProcessPool
+        from unittest.mock import MagicMock, patch
+        from app.services import metadata_service as module
+        
+        service = module.MetadataService()
+        service.PROCESS_WORKERS = 1
+        
+        def submit(fn, chunk):
+            future = Future()
+            future.set_exception(BrokenProcessPool("worker killed"))
+            return future
+        
+        pool = MagicMock()
+        pool.submit.side_effect = submit
+        with patch.object(module, "_get_process_pool", return_value=pool):
+            results = service.extract_batch(["a.txt", "b.txt"])
+        
+        assert list(results) == ["a.txt", "b.txt"]
+        assert all("worker killed" in meta["error"] for meta in results.values())
+        pool.shutdown.assert_called_with(wait=False)
+    
+    def test_defer_checksum_for_large_files(self):
+        """Test large files are handed to the checksum task in batch mode."""
+        from unittest.mock import patch
+        from app.services.metadata_service import MetadataService
+        
+        service = MetadataService()
+        small = {"size": 10, "full_path": "/tmp/small"}
+        large = {"size": service.DEFER_CHECKSUM_SIZE + 1, "full_path": "/tmp/large"}
+        
+        with patch("celery.current_app.send_task") as send_task:
+            send_task.return_value.id = "task-id"
+            assert service._defer_checksum(small) is False
+            assert service._defer_checksum(large) is True
+        
+        send_task.assert_called_once_with("compute_checksum", args=["/tmp/large"])
+        assert large["checksum_task_id"] == "task-id"
+        assert "checksum_task_id" not in small
 
 
 if __name__ == "__main__":
-    pytest.main([__file__, "-v"])
\ No newline at end of file
+    pytest.main([__file__, "-v"])
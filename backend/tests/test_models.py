@@ -2,25 +2,48 @@
 
 import pytest
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
 
 from app.models.base import Base
 from app.models.user import User
-from app.models.document import Document
+from app.models.document_record import DocumentRecord
 from app.models.search_history import SearchHistory
 
 
-@pytest.fixture
-def db_session():
-    """Create a test database session."""
-    engine = create_engine("sqlite:///:memory:")
+@pytest.fixture(scope="session")
+def _engine():
+    """Create the schema once; every test shares the in-memory database."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
     Base.metadata.create_all(bind=engine)
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    session = SessionLocal()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(_engine):
+    """Create a test database session rolled back after each test.
+    
+    Commits inside a test only release a SAVEPOINT; the outer transaction
+    is rolled back on teardown, so tests never see each other's rows.
+    """
+    connection = _engine.connect()
+    transaction = connection.begin()
+    session = Session(
+        bind=connection,
+        autoflush=False,
+        join_transaction_mode="create_savepoint"
+    )
     try:
         yield session
     finally:
         session.close()
+        transaction.rollback()
+        connection.close()
 
 
 def test_user_creation(db_session):
@@ -51,7 +74,7 @@ def test_document_creation(db_session):
     db_session.add(user)
     db_session.commit()
     
-    document = Document(
+    document = DocumentRecord(
         title="Test Document",
         filename="test.pdf",
         file_path="/uploads/test.pdf",
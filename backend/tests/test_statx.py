@@ -0,0 +1,89 @@
+"""Tests for the statx stat wrapper."""
+
+import ctypes
+import errno
+import os
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from app.utils import statx
+
+
+@pytest.fixture
+def temp_path():
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(b"statx test content")
+        path = f.name
+    yield path
+    os.unlink(path)
+
+
+def _failing_statx(error):
+    """A libc statx stand-in that fails with the given errno."""
+    def call(*args):
+        ctypes.set_errno(error)
+        return -1
+    return call
+
+
+@pytest.mark.skipif(not statx.statx_available(), reason="statx not available")
+def test_stat_matches_os_stat(temp_path):
+    """Test statx reports the same fields as os.stat."""
+    result = statx.stat(temp_path)
+    expected = os.stat(temp_path)
+    
+    assert isinstance(result, statx.Statx)
+    for field in ("st_mode", "st_ino", "st_dev", "st_nlink", "st_uid", "st_gid", "st_size", "st_mtime_ns"):
+        assert getattr(result, field) == getattr(expected, field), field
+    assert result.st_mtime == pytest.approx(expected.st_mtime)
+
+
+@pytest.mark.skipif(not statx.statx_available(), reason="statx not available")
+def test_stat_symlink_not_followed(temp_path):
+    """Test follow_symlinks=False stats the link itself."""
+    link = temp_path + ".link"
+    os.symlink(temp_path, link)
+    try:
+        assert statx.stat(link, follow_symlinks=False).st_ino == os.lstat(link).st_ino
+        assert statx.stat(link).st_ino == os.stat(temp_path).st_ino
+    finally:
+        os.unlink(link)
+
+
+def test_stat_missing_file_raises():
+    """Test a missing path raises FileNotFoundError either way."""
+    with pytest.raises(FileNotFoundError):
+        statx.stat("/nonexistent/statx/path")
+
+
+@pytest.mark.parametrize("use_statx", [True, False])
+def test_stat_rejects_embedded_nul(temp_path, use_statx):
+    """Test a NUL byte is rejected rather than truncating the path."""
+    with patch.object(statx, "_statx", statx._statx if use_statx else None):
+        with pytest.raises(ValueError):
+            statx.stat(temp_path + "\x00junk")
+
+
+def test_stat_falls_back_on_enosys(temp_path):
+    """Test a syscall rejected with ENOSYS is answered by os.stat."""
+    with patch.object(statx, "_statx", _failing_statx(errno.ENOSYS)):
+        result = statx.stat(temp_path)
+    
+    assert isinstance(result, os.stat_result)
+    assert result.st_ino == os.stat(temp_path).st_ino
+
+
+def test_stat_reports_other_errors(temp_path):
+    """Test errors other than ENOSYS are raised with their errno."""
+    with patch.object(statx, "_statx", _failing_statx(errno.EACCES)):
+        with pytest.raises(PermissionError):
+            statx.stat(temp_path)
+
+
+def test_stat_without_statx(temp_path):
+    """Test os.stat serves every call when libc has no statx."""
+    with patch.object(statx, "_statx", None):
+        assert isinstance(statx.stat(temp_path), os.stat_result)
+        assert statx.statx_available() is False
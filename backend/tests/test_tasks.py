@@ -1,62 +1,279 @@
+import io
+import numpy as np
+import orjson
 import pytest
-from unittest.mock import patch, MagicMock
-from filemanager.backend.tasks import extract_text, embed_document
+import requests
+from unittest.mock import patch, AsyncMock, MagicMock
+from PIL import Image
+from qdrant_client.http import models
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from filemanager.backend.tasks import (
+    extract_text, embed_document, decode_embedding, decode_embeddings,
+    _cleanup_search_indexes, _reindex_documents, bulk_reindex_documents,
+    _qdrant_options
+)
+from app.core.config import settings
+from app.models.document_record import DocumentRecord
 from celery.exceptions import Retry
 
 @pytest.fixture
 def mock_requests():
-    with patch('requests.get') as mock:
-        yield mock
+    with patch('filemanager.backend.tasks._get_http_session') as mock:
+        mock.return_value.head.return_value.headers = {}
+        yield mock.return_value.get
 
 @pytest.fixture
 def mock_magic():
-    with patch('magic.Magic') as mock:
+    with patch('filemanager.backend.tasks._get_mime_sniffer') as mock:
         yield mock
 
 @pytest.fixture
-def mock_pytesseract():
-    with patch('pytesseract.image_to_string') as mock:
+def mock_pdfium():
+    with patch('pypdfium2.PdfDocument') as mock:
         yield mock
 
 @pytest.fixture
-def mock_pypdf2():
-    with patch('PyPDF2.PdfReader') as mock:
-        yield mock
+def worker_db():
+    """Point the worker's WorkerSession at an in-memory documents table."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    DocumentRecord.__table__.create(bind=engine)
+    session_factory = sessionmaker(bind=engine, expire_on_commit=False)
+    with patch('app.db.session.WorkerSession', session_factory):
+        yield session_factory
+    engine.dispose()
+
+@pytest.fixture
+def mock_search_clients():
+    with patch('filemanager.backend.tasks._get_search_clients') as mock:
+        mock.return_value = (MagicMock(), MagicMock())
+        yield mock.return_value
+
+
+def add_documents(session_factory, *doc_ids, **columns):
+    """Insert minimal document rows with the given IDs."""
+    with session_factory() as db:
+        for doc_id in doc_ids:
+            db.add(DocumentRecord(**{
+                "id": doc_id,
+                "title": f"Document {doc_id}",
+                "filename": f"doc{doc_id}.txt",
+                "file_path": f"/uploads/doc{doc_id}.txt",
+                "file_size": 10,
+                "mime_type": "text/plain",
+                "checksum": f"{doc_id:064x}",
+                "owner_id": 1,
+                **columns
+            }))
+        db.commit()
+
+
+def stream_response(mock_get, content):
+    """Make the mocked streaming session.get yield content in one chunk."""
+    response = mock_get.return_value.__enter__.return_value
+    response.iter_content.return_value = [content]
+    return response
 
 class TestExtractTextTask:
-    def test_extract_text_from_image(self, mock_requests, mock_magic, mock_pytesseract):
-        mock_requests.return_value.content = b'image_data'
+    def test_extract_text_from_image(self, mock_requests, mock_magic):
+        png = io.BytesIO()
+        Image.new('L', (8, 8), 255).save(png, format='PNG')
+        stream_response(mock_requests, png.getvalue())
         mock_magic.return_value.from_buffer.return_value = 'image/png'
-        mock_pytesseract.return_value = 'extracted text'
         
-        result = extract_text('http://example.com/image.png')
+        # Same seams as the PDF OCR test, whichever Tesseract binding is installed
+        with patch('filemanager.backend.tasks._binarize') as binarize, \
+                patch('filemanager.backend.tasks._recognize', return_value='extracted text') as ocr:
+            result = extract_text('http://example.com/image.png')
         assert result == 'extracted text'
+        assert binarize.call_args.args[0].size == (8, 8)
+        ocr.assert_called_once_with(binarize.return_value)
 
-    def test_extract_text_from_pdf(self, mock_requests, mock_magic, mock_pypdf2):
-        mock_requests.return_value.content = b'pdf_data'
+    def test_extract_text_from_pdf(self, mock_requests, mock_magic, mock_pdfium):
+        stream_response(mock_requests, b'pdf_data')
         mock_magic.return_value.from_buffer.return_value = 'application/pdf'
-        mock_reader = MagicMock()
-        mock_reader.pages = [MagicMock(extract_text=lambda: 'page1'), MagicMock(extract_text=lambda: 'page2')]
-        mock_pypdf2.return_value = mock_reader
+        pages = []
+        for text in ('first page of the document', 'second page of the document'):
+            page = MagicMock()
+            page.get_textpage.return_value.get_text_range.return_value = text
+            pages.append(page)
+        mock_pdf = mock_pdfium.return_value
+        mock_pdf.__len__.return_value = len(pages)
+        mock_pdf.__getitem__.side_effect = pages.__getitem__
         
         result = extract_text('http://example.com/doc.pdf')
-        assert result == 'page1\npage2'
+        assert result == 'first page of the document\nsecond page of the document'
+
+    def test_extract_text_ocrs_scanned_pdf_pages(self, mock_requests, mock_magic, mock_pdfium):
+        stream_response(mock_requests, b'pdf_data')
+        mock_magic.return_value.from_buffer.return_value = 'application/pdf'
+        pages = []
+        for text in ('page with a real text layer', '  '):
+            page = MagicMock()
+            page.get_textpage.return_value.get_text_range.return_value = text
+            pages.append(page)
+        mock_pdf = mock_pdfium.return_value
+        mock_pdf.__len__.return_value = len(pages)
+        mock_pdf.__getitem__.side_effect = pages.__getitem__
+        
+        with patch('filemanager.backend.tasks._binarize'), \
+                patch('filemanager.backend.tasks._recognize', return_value='scanned text') as ocr:
+            result = extract_text('http://example.com/scan.pdf')
+        assert result == 'page with a real text layer\nscanned text'
+        ocr.assert_called_once()
+        pages[0].render.assert_not_called()
+
+    def test_extract_text_reuses_text_for_unchanged_url(self, mock_requests):
+        with patch('filemanager.backend.tasks._url_cache_key', return_value='extracted_url:key'), \
+                patch('filemanager.backend.tasks._cache_get', return_value='cached text') as cache_get:
+            result = extract_text('http://example.com/file.txt')
+        assert result == 'cached text'
+        cache_get.assert_called_once_with('extracted_url:key')
+        mock_requests.assert_not_called()
 
     def test_retry_on_failure(self, mock_requests):
-        mock_requests.side_effect = Exception('Failed')
+        mock_requests.side_effect = requests.ConnectionError('Failed')
         task = extract_text.s('http://example.com/file.txt')
         with pytest.raises(Retry):
             task.apply()
 
+    def test_no_retry_on_client_error(self, mock_requests):
+        response = stream_response(mock_requests, b'')
+        error = requests.HTTPError('Not Found', response=MagicMock(status_code=404))
+        response.raise_for_status.side_effect = error
+        with pytest.raises(requests.HTTPError):
+            extract_text('http://example.com/missing.txt')
+
 class TestEmbedDocumentTask:
+    @pytest.fixture
+    def mock_encoder(self):
+        with patch('filemanager.backend.tasks._get_encoder') as mock:
+            mock.return_value.encode.side_effect = lambda texts, batch_size: np.zeros((len(texts), 768))
+            yield mock
+
     @patch('filemanager.backend.tasks.logger')
-    def test_embed_document(self, mock_logger):
+    def test_embed_document(self, mock_logger, mock_encoder):
         result = embed_document('sample text')
-        assert len(result) == 768  # Mock embedding dimension
+        vector = decode_embedding(result)
+        assert vector.shape == (768,)  # Mock embedding dimension
+        assert vector.dtype == np.float32
+        assert decode_embedding(result, np.float16).dtype == np.float16
+
+    @patch('filemanager.backend.tasks.logger')
+    def test_embed_document_batch(self, mock_logger, mock_encoder):
+        result = embed_document(['first', 'second', 'third'])
+        assert len(result) == 3
+        matrix = decode_embeddings(result)
+        assert matrix.shape == (3, 768)
+        assert matrix.dtype == np.float32
+        assert matrix.flags['C_CONTIGUOUS']
+        mock_encoder.return_value.encode.assert_called_once()
         
     @patch('filemanager.backend.tasks.logger')
     def test_retry_on_failure(self, mock_logger):
-        with patch('filemanager.backend.tasks.SOME_EMBEDDING_FUNC', side_effect=Exception('Failed')):
+        with patch('filemanager.backend.tasks._get_encoder', side_effect=Exception('Failed')):
             task = embed_document.s('sample text')
             with pytest.raises(Retry):
-                task.apply()
\ No newline at end of file
+                task.apply()
+
+
+class TestCleanupSearchIndexes:
+    @pytest.fixture(autouse=True)
+    def mock_cache_bump(self):
+        with patch('app.core.search_cache.bump_search_cache_version') as mock:
+            yield mock
+
+    def test_removes_only_deleted_documents(self, worker_db, mock_search_clients, mock_cache_bump):
+        add_documents(worker_db, 1)
+        qdrant_client, meili_client = mock_search_clients
+        
+        assert _cleanup_search_indexes([1, 2, 3]) == [2, 3]
+        mock_cache_bump.assert_called_once_with()
+        delete_kwargs = qdrant_client.delete.call_args.kwargs
+        assert delete_kwargs['collection_name'] == settings.qdrant_collection
+        assert delete_kwargs['points_selector'].points == [2, 3]
+        meili_client.index.assert_called_once_with(settings.meilisearch_index)
+        meili_client.index.return_value.delete_documents.assert_called_once_with([2, 3])
+
+    def test_skips_clients_when_all_documents_exist(self, worker_db, mock_search_clients, mock_cache_bump):
+        add_documents(worker_db, 1, 2)
+        qdrant_client, meili_client = mock_search_clients
+        
+        assert _cleanup_search_indexes([1, 2]) == []
+        qdrant_client.delete.assert_not_called()
+        meili_client.index.assert_not_called()
+        mock_cache_bump.assert_not_called()
+
+
+class TestReindexDocuments:
+    @pytest.fixture
+    def mock_encoder(self):
+        with patch('filemanager.backend.tasks._get_encoder') as mock:
+            mock.return_value.encode.side_effect = lambda texts, batch_size: np.ones((len(texts), 4), dtype=np.float32)
+            yield mock
+
+    @pytest.fixture
+    def mock_upsert(self):
+        with patch('filemanager.backend.tasks._upsert_points', new_callable=AsyncMock) as mock:
+            yield mock
+
+    def test_reindexes_rows_from_database(self, worker_db, mock_search_clients, mock_encoder, mock_upsert):
+        add_documents(worker_db, 1, extracted_text="text layer", ocr_text="ocr", doc_metadata={"pages": 3})
+        add_documents(worker_db, 2, ocr_text="scanned", tags=["invoice"])
+        _, meili_client = mock_search_clients
+        
+        _reindex_documents([1, 2])
+        texts = mock_encoder.return_value.encode.call_args.args[0]
+        assert sorted(texts) == ["scanned", "text layer"]
+        payloads = {point.id: point.payload for point in mock_upsert.call_args.args[0]}
+        assert payloads[1]["title"] == "Document 1"
+        assert payloads[1]["content"] == "text layer"
+        assert payloads[2]["tags"] == ["invoice"]
+        assert payloads[2]["type"] == "text/plain"
+        meili_client.index.assert_called_once_with(settings.meilisearch_index)
+        ndjson = meili_client.index.return_value.add_documents_ndjson.call_args.args[0]
+        lines = {line["id"]: line for line in map(orjson.loads, ndjson.split(b"\n"))}
+        assert lines[1]["title"] == "Document 1"
+        assert lines[1]["content"] == "text layer"
+        assert lines[1]["metadata"] == {"pages": 3}
+
+    def test_missing_documents_raise(self, worker_db, mock_search_clients, mock_encoder, mock_upsert):
+        add_documents(worker_db, 1)
+        
+        with pytest.raises(ValueError):
+            _reindex_documents([1, 2])
+        mock_upsert.assert_not_called()
+
+    def test_bulk_reindex_pauses_configured_collection(self, mock_search_clients):
+        qdrant_client, meili_client = mock_search_clients
+        qdrant_client.get_collection.return_value.status = models.CollectionStatus.GREEN
+        
+        with patch('filemanager.backend.tasks._reindex_documents') as reindex:
+            bulk_reindex_documents.s([1, 2]).apply()
+        reindex.assert_called_once()
+        collections = {call.kwargs['collection_name'] for call in qdrant_client.update_collection.call_args_list}
+        assert collections == {settings.qdrant_collection}
+        qdrant_client.get_collection.assert_called_with(settings.qdrant_collection)
+        meili_client.index.assert_called_once_with(settings.meilisearch_index)
+
+
+class TestQdrantOptions:
+    @pytest.mark.parametrize("prefer_grpc", [True, False])
+    def test_prefer_grpc_follows_settings(self, prefer_grpc):
+        with patch.object(settings, 'qdrant_prefer_grpc', prefer_grpc):
+            assert _qdrant_options()["prefer_grpc"] is prefer_grpc
+
+
+class TestTaskRoutes:
+    def test_every_task_is_routed_by_registered_name(self):
+        from celery.local import Proxy
+        from filemanager.backend import tasks
+        from filemanager.backend.celery import app as celery_app
+        
+        names = {task.name for task in vars(tasks).values() if isinstance(task, Proxy)}
+        assert names == set(celery_app.conf.task_routes)
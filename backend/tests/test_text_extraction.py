@@ -1,16 +1,49 @@
 """Tests for text extraction services."""
 
 import pytest
+import shutil
 import tempfile
 import os
 from pathlib import Path
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.document_record import DocumentRecord
 from app.services.indexing_service import IndexingService
 from app.services.ocr_service import OCRService
 from app.services.text_extraction_service import TextExtractionService
 
 
+@pytest.fixture(scope="session")
+def shm_tmpdir(tmp_path_factory):
+    """Directory for scratch files, on tmpfs when the host has /dev/shm."""
+    if not os.path.isdir("/dev/shm"):
+        yield tmp_path_factory.mktemp("fmtests")
+        return
+    # One directory per xdist worker so parallel sessions never collide
+    path = Path(tempfile.mkdtemp(prefix="fmtests-", dir="/dev/shm"))
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+@pytest.fixture
+def documents_db():
+    """Point the service's SessionLocal at an in-memory documents table."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    DocumentRecord.__table__.create(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    with patch('app.services.text_extraction_service.SessionLocal', session_factory):
+        yield session_factory
+    engine.dispose()
+
+
 class TestIndexingService:
     """Tests for IndexingService."""
     
@@ -20,33 +53,65 @@ class TestIndexingService:
         self.service.tika_url = "http://localhost:9998"
     
     @pytest.mark.asyncio
-    async def test_extract_text_success(self):
+    async def test_extract_text_success(self, shm_tmpdir):
         """Test successful text extraction."""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
+        with tempfile.NamedTemporaryFile(mode='w', dir=shm_tmpdir, suffix='.txt', delete=False) as f:
             f.write("Hello, this is a test document.")
             temp_path = f.name
         
         try:
-            with patch('requests.post') as mock_post, \
-                 patch('requests.put') as mock_put:
-                
-                mock_post.return_value.status_code = 200
-                mock_post.return_value.text = "Hello, this is a test document."
+            with patch.object(self.service._http, 'put', new_callable=AsyncMock) as mock_put:
                 
-                mock_put.return_value.status_code = 200
-                mock_put.return_value.json.return_value = {
+                mock_put.return_value = MagicMock(status_code=200)
+                mock_put.return_value.json.side_effect = lambda: [{
                     'Content-Type': 'text/plain',
-                    'Content-Length': '35'
-                }
+                    'Content-Length': '35',
+                    'X-TIKA:content': "Hello, this is a test document.\n"
+                }]
                 
                 text, metadata = await self.service.extract_text(temp_path, 'text/plain')
                 
                 assert text == "Hello, this is a test document."
                 assert metadata['Content-Type'] == 'text/plain'
                 
+                # Batched calls share the client and keep input order
+                results = await self.service.extract_text_many([
+                    (temp_path, 'text/plain'), (temp_path, 'text/plain')
+                ])
+                assert [text for text, _ in results] == [
+                    "Hello, this is a test document.", "Hello, this is a test document."
+                ]
+                assert mock_put.await_count == 3
+                
         finally:
             os.unlink(temp_path)
     
+    @pytest.mark.asyncio
+    async def test_enqueue_requeues_failed_flush(self):
+        """Test a failed queued flush is retried instead of stopping the flusher."""
+        import asyncio
+        
+        document = MagicMock(id=1)
+        calls = []
+        
+        def index_documents_bulk(items):
+            calls.append(items)
+            if len(calls) == 1:
+                raise RuntimeError("qdrant unavailable")
+            return [str(doc.id) for doc, _, _ in items]
+        
+        self.service.BULK_RETRY_DELAY = 0
+        with patch.object(self.service, 'index_documents_bulk', side_effect=index_documents_bulk):
+            await self.service.enqueue_document(document, [0.1, 0.2], {})
+            for _ in range(100):
+                if len(calls) == 2:
+                    break
+                await asyncio.sleep(0.01)
+        
+        assert calls == [[(document, [0.1, 0.2], {})]] * 2
+        assert not self.service._flusher.done()
+        self.service._flusher.cancel()
+    
     def test_is_supported_type(self):
         """Test MIME type support checking."""
         assert self.service.is_supported_type('application/pdf') is True
@@ -64,17 +129,16 @@ class TestOCRService:
         self.service.mistral_api_key = "test-key"
     
     @pytest.mark.asyncio
-    async def test_extract_image_text_tesseract_success(self):
+    async def test_extract_image_text_tesseract_success(self, shm_tmpdir):
         """Test successful OCR with Tesseract."""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
+        with tempfile.NamedTemporaryFile(mode='w', dir=shm_tmpdir, suffix='.txt', delete=False) as f:
             temp_path = f.name
         
         try:
-            with patch('requests.post') as mock_post, \
-                 patch('requests.get') as mock_get:
+            with patch('app.services.ocr_service.tesserocr', None), \
+                 patch.object(self.service._http, 'post', new_callable=AsyncMock) as mock_post:
                 
-                mock_get.return_value.status_code = 200
-                mock_post.return_value.status_code = 200
+                mock_post.return_value = MagicMock(status_code=200)
                 mock_post.return_value.json.return_value = {
                     'text': 'Extracted text from image'
                 }
@@ -87,6 +151,24 @@ class TestOCRService:
         finally:
             os.unlink(temp_path)
     
+    @pytest.mark.asyncio
+    async def test_tesserocr_runs_on_dedicated_pool(self):
+        """Test in-process recognition stays on the bounded Tesseract threads."""
+        import threading
+        
+        threads = []
+        
+        def run_tesseract(image_path, language):
+            threads.append(threading.current_thread().name)
+            return "Recognized text from the image"
+        
+        with patch('app.services.ocr_service.tesserocr', MagicMock()), \
+             patch.object(self.service, '_run_tesseract', side_effect=run_tesseract):
+            text, metadata = await self.service._extract_with_tesseract("scan.png", "eng")
+        
+        assert text == "Recognized text from the image"
+        assert threads[0].startswith("tesseract")
+    
     def test_is_supported_image(self):
         """Test image format support checking."""
         assert self.service.is_supported_image('image/jpeg') is True
@@ -108,9 +190,9 @@ class TestTextExtractionService:
         assert self.service.is_text_extraction_needed('application/octet-stream') is False
     
     @pytest.mark.asyncio
-    async def test_extract_text_from_document_pdf(self):
+    async def test_extract_text_from_document_pdf(self, shm_tmpdir):
         """Test PDF document text extraction."""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.pdf', delete=False) as f:
+        with tempfile.NamedTemporaryFile(mode='w', dir=shm_tmpdir, suffix='.pdf', delete=False) as f:
             temp_path = f.name
         
         try:
@@ -139,9 +221,9 @@ class TestTextExtractionService:
             os.unlink(temp_path)
     
     @pytest.mark.asyncio
-    async def test_extract_text_from_document_image(self):
+    async def test_extract_text_from_document_image(self, shm_tmpdir):
         """Test image document text extraction."""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.jpg', delete=False) as f:
+        with tempfile.NamedTemporaryFile(mode='w', dir=shm_tmpdir, suffix='.jpg', delete=False) as f:
             temp_path = f.name
         
         try:
@@ -170,6 +252,85 @@ class TestTextExtractionService:
                 
         finally:
             os.unlink(temp_path)
+    
+    @pytest.mark.asyncio
+    async def test_process_pending_documents(self, documents_db):
+        """Test pending documents are read and updated through sync sessions."""
+        with documents_db() as session:
+            for doc_id, status in ((1, 'pending'), (2, 'completed'), (3, 'pending')):
+                session.add(DocumentRecord(
+                    id=doc_id,
+                    title=f"Document {doc_id}",
+                    filename=f"doc{doc_id}.pdf",
+                    file_path=f"/uploads/doc{doc_id}.pdf",
+                    file_size=10,
+                    mime_type='application/pdf',
+                    checksum=f"{doc_id:064x}",
+                    text_extraction_status=status,
+                    ocr_status=status,
+                    owner_id=1
+                ))
+            session.commit()
+        
+        async def extract(document):
+            if document.id == 3:
+                raise FileNotFoundError(document.file_path)
+            return {
+                'text_extraction_status': 'completed',
+                'ocr_status': 'not_required',
+                'extracted_text': f"text {document.id}",
+                'ocr_text': None,
+                'extracted_metadata': {'pages': 1},
+                'ocr_confidence': {}
+            }
+        
+        with patch.object(self.service, '_extract_results', side_effect=extract):
+            assert await self.service.process_pending_documents() == 1
+        
+        with documents_db() as session:
+            extracted = session.get(DocumentRecord, 1)
+            assert extracted.text_extraction_status == 'completed'
+            assert extracted.extracted_text == 'text 1'
+            assert extracted.extracted_metadata == {'pages': 1}
+            failed = session.get(DocumentRecord, 3)
+            assert failed.text_extraction_status == 'failed'
+            assert 'extraction_error' in failed.doc_metadata
+    
+    @pytest.mark.asyncio
+    async def test_process_pending_documents_batches_tika(self, documents_db, shm_tmpdir):
+        """Test a batch's Tika parses go out in one extract_text_many call."""
+        paths = []
+        for doc_id in (1, 2):
+            path = shm_tmpdir / f"pending{doc_id}.txt"
+            path.write_text(f"text {doc_id}")
+            paths.append(str(path))
+        with documents_db() as session:
+            for doc_id, path in zip((1, 2), paths):
+                session.add(DocumentRecord(
+                    id=doc_id,
+                    title=f"Document {doc_id}",
+                    filename=f"pending{doc_id}.txt",
+                    file_path=path,
+                    file_size=6,
+                    mime_type='text/plain',
+                    checksum=f"{doc_id:064x}",
+                    owner_id=1
+                ))
+            session.commit()
+        
+        parsed = [("text 1", {"pages": 1}), RuntimeError("tika down")]
+        with patch('app.services.text_extraction_service.indexing_service') as indexing:
+            indexing.extract_text_many = AsyncMock(return_value=parsed)
+            assert await self.service.process_pending_documents() == 2
+        
+        indexing.extract_text_many.assert_awaited_once_with(
+            [(paths[0], 'text/plain'), (paths[1], 'text/plain')]
+        )
+        with documents_db() as session:
+            extracted = session.get(DocumentRecord, 1)
+            assert extracted.text_extraction_status == 'completed'
+            assert extracted.extracted_text == 'text 1'
+            assert session.get(DocumentRecord, 2).text_extraction_status == 'failed'
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,17 @@
+"""Tests for request parameter validation."""
+
+import pytest
+
+from utils.validate import validate_search_mode
+
+
+@pytest.mark.parametrize("mode", ["hybrid", "keyword", "vector"])
+def test_valid_search_modes(mode):
+    """Test every SearchMode value is accepted."""
+    assert validate_search_mode(mode) is True
+
+
+@pytest.mark.parametrize("mode", ["", "Hybrid", "semantic", " vector", None, 0])
+def test_invalid_search_modes(mode):
+    """Test anything outside SearchMode is rejected."""
+    assert validate_search_mode(mode) is False
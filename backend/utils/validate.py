@@ -1,7 +1,11 @@
-from typing import Literal
+from typing import FrozenSet, Literal, get_args
 
 SearchMode = Literal["hybrid", "keyword", "vector"]
 
+# Resolved once; a hashed lookup instead of reflecting on the Literal per call
+_SEARCH_MODES: FrozenSet[str] = frozenset(get_args(SearchMode))
+
+
 def validate_search_mode(mode: str) -> bool:
     """Validate that search mode is one of the allowed values.
     
@@ -11,4 +15,4 @@ def validate_search_mode(mode: str) -> bool:
     Returns:
         bool: True if valid, False otherwise
     """
-    return mode in SearchMode.__args__
+    return mode in _SEARCH_MODES
@@ -1,4 +1,5 @@
 import pytest
+from backend.services import tagging
 from backend.services.tagging import TaggingService
 
 @pytest.fixture
@@ -15,4 +16,98 @@ def test_auto_tag_contains_expected_tags(tagging_service):
     """Test that expected tags are returned for known inputs"""
     result = tagging_service.auto_tag("Artificial Intelligence in banking")
     assert "AI" in result
-    assert "Finance" in result
\ No newline at end of file
+    assert "Finance" in result
+
+
+def test_auto_tag_named_labels_in_large_text(tagging_service):
+    """Test that labels named verbatim are found anywhere in a long text"""
+    text = "Quarterly report. " * 50000 + "Budget review for Finance."
+    result = tagging_service.auto_tag(text)
+    assert "Finance" in result
+
+
+# Shorter labels first, matching the order matchers report labels that
+# start at the same position ("AI" before "AI Research")
+NAMED_LABELS = ("AI", "AI Research", "Finance", "Machine Learning", "5G")
+
+NAMED_TEXTS = [
+    "AI and ai research; Finance.",
+    "Said the email about finances",
+    "Café AI, naïve finance, Zürich machine learning",
+    "5G rollout in the 5GHz band",
+    "ΑΙ in Greek letters, then AI",
+    "İstanbul AI research",
+    "",
+]
+
+
+def _reference_named_labels(labels, text):
+    """Whole-word label matches in order of first appearance, one label at a time."""
+    lowered = text.lower()
+    found = {}
+    for label in labels:
+        key = label.lower()
+        start = lowered.find(key)
+        while start != -1:
+            end = start + len(key)
+            if (start == 0 or not lowered[start - 1].isalnum()) and (
+                end == len(lowered) or not lowered[end].isalnum()
+            ):
+                found[label] = start
+                break
+            start = lowered.find(key, start + 1)
+    return sorted(found, key=found.get)
+
+
+@pytest.fixture
+def label_matcher(monkeypatch):
+    """Rebuild the label matcher for a given label set and backend."""
+    def build(labels, backend):
+        if backend != "regex":
+            pytest.importorskip(backend)
+        monkeypatch.setattr(tagging, "_load_tag_labels", lambda: labels)
+        if backend != "datrie":
+            monkeypatch.setattr(tagging, "datrie", None)
+        if backend == "regex":
+            monkeypatch.setattr(tagging, "ahocorasick", None)
+        tagging._load_label_matcher.cache_clear()
+        tagging._max_label_length.cache_clear()
+        return tagging._load_label_matcher()
+    
+    yield build
+    tagging._load_label_matcher.cache_clear()
+    tagging._max_label_length.cache_clear()
+
+
+# The regex fallback reports only the longest label starting at a position,
+# so it is not held to the reference for overlapping labels
+@pytest.mark.parametrize("backend", ["datrie", "ahocorasick"])
+@pytest.mark.parametrize("text", NAMED_TEXTS)
+def test_named_labels_backends_agree(label_matcher, backend, text):
+    """Test the trie and the automaton find the same labels in the same order"""
+    matcher = label_matcher(NAMED_LABELS, backend)
+    if backend == "datrie":
+        assert isinstance(matcher, tagging.datrie.Trie)
+    assert tagging._named_labels(text) == _reference_named_labels(NAMED_LABELS, text)
+
+
+@pytest.mark.parametrize("backend", ["datrie", "ahocorasick"])
+def test_named_labels_underscore_separates_words(label_matcher, backend):
+    """Test the trie keeps the automaton's word boundaries around underscores"""
+    label_matcher(NAMED_LABELS, backend)
+    assert tagging._named_labels("x_ai and finance_2024") == ["AI", "Finance"]
+
+
+@pytest.mark.parametrize("labels,max_labels", [
+    (("Café", "Zürich", "AI"), tagging.TRIE_MAX_LABELS),
+    (("C++", "AI"), tagging.TRIE_MAX_LABELS),
+    (NAMED_LABELS, 1),
+])
+def test_named_labels_trie_fallback(label_matcher, monkeypatch, labels, max_labels):
+    """Test label sets the trie cannot hold use another matcher with the same results"""
+    pytest.importorskip("ahocorasick")
+    monkeypatch.setattr(tagging, "TRIE_MAX_LABELS", max_labels)
+    matcher = label_matcher(labels, "datrie")
+    assert not isinstance(matcher, tagging.datrie.Trie)
+    for text in NAMED_TEXTS + ["Zürich café, C++ and AI"]:
+        assert tagging._named_labels(text) == _reference_named_labels(labels, text)